@@ -27,6 +27,11 @@ Public package contents include:
         copying, deleting, and testing for files, as well as a
         controller class for abstracting all configured DPs.
     exceptions: python-jss custom exceptions.
+    dependency_graph: Class for finding which Policies and
+        ComputerGroups use a Package, Script, ComputerGroup, or
+        Category.
+    inventory: Classes for exporting and summarizing Computer and
+        MobileDevice inventory across the JSS.
     jamf_software_server: Class for representing a JSS, and for
         preference files to configure one.
     jssobject: Base class used for JSS objects. Useful for testing
@@ -36,50 +41,139 @@ Public package contents include:
     jss_prefs: Class for loading python-jss configuration via a plist
         file, and for use as an argument to JSS. Includes an
         interactive setup helper.
+    orphans: Classes for looking up Packages and Scripts by filename,
+        and for finding repository files without objects, and objects
+        without files.
+    repository_sync: Class for replicating one file share repository
+        to others, copying and deleting only what differs.
+    scope_index: Class for looking up the policies and configuration
+        profiles scoped to a computer, group, building, or department.
+    smart_groups: Class for previewing smart group membership against
+        cached Computers.
 
 Private package contents include:
+    bulk: Helpers for making many requests concurrently, with retries
+        and a rate limit.
     contrib: Code from other authors used in python-jss.
+    filecopy: Kernel-side file copies, and parallel directory copies,
+        for file share repositories.
     jssobjectlist: Classes for representing lists of objects returned
         from the JSS' GET searches.
     tlsadapter: Adapter to allow python HTTP requests to use TLS, and
         with the correct ciphers to match current JAMF recommendations.
     tools: Assorted functions for common tasks used throughout the
         package.
+    upload: Streaming file uploads, with progress reporting and
+        retries.
+    zipstream: Zips directories as a stream, for uploading bundle
+        packages without a temporary file.
 """
 
 
-from .casper import Casper
-from .distribution_point import (AFPDistributionPoint, SMBDistributionPoint,
-                                 JDS, CDP, LocalRepository)
-from .distribution_points import DistributionPoints
-from .exceptions import (
-    JSSPrefsMissingFileError, JSSPrefsMissingKeyError, JSSGetError,
-    JSSPutError, JSSPostError, JSSDeleteError, JSSMethodNotAllowedError,
-    JSSUnsupportedSearchMethodError, JSSFileUploadParameterError,
-    JSSUnsupportedFileType, JSSError)
-from .jamf_software_server import JSS
-from .jssobject import JSSObject
-from .jssobjectlist import JSSObjectList
-from .jssobjects import (
-    Account, AccountGroup, ActivationCode, AdvancedComputerSearch,
-    AdvancedMobileDeviceSearch, AdvancedUserSearch, Building, BYOProfile,
-    Category, Class, CommandFlush, Computer, ComputerCheckIn, ComputerCommand,
-    ComputerConfiguration, ComputerExtensionAttribute, ComputerGroup,
-    ComputerHistory, ComputerInventoryCollection, ComputerInvitation,
-    ComputerReport, Department, DirectoryBinding, DiskEncryptionConfiguration,
-    DistributionPoint, DockItem, EBook, FileUpload, GSXConnection, IBeacon,
-    JSSUser, LDAPServer, LicensedSoftware, LogFlush, MacApplication,
-    ManagedPreferenceProfile, MobileDevice, MobileDeviceApplication,
-    MobileDeviceCommand, MobileDeviceConfigurationProfile,
-    MobileDeviceEnrollmentProfile, MobileDeviceExtensionAttribute,
-    MobileDeviceInvitation, MobileDeviceGroup, MobileDeviceProvisioningProfile,
-    NetbootServer, NetworkSegment, OSXConfigurationProfile, Package, Patch,
-    Peripheral, PeripheralType, Policy, Printer, RestrictedSoftware,
-    RemovableMACAddress, SavedSearch, Script, Site, SoftwareUpdateServer,
-    SMTPServer, UserExtensionAttribute, User, UserGroup, VPPAccount,
-    VPPAssignment, VPPInvitation)
-from .jss_prefs import JSSPrefs
-from .tools import is_osx, is_linux
+import importlib
+import sys
+import types
 
 
+# Public names, by the submodule they are imported from. Submodules
+# are imported on first use of one of their names (see _LazyModule), so
+# that "import jss" is fast, and scripts only pay for what they use.
+_LAZY_ATTRIBUTES = {
+    "casper": (
+        "Casper",),
+    "distribution_point": (
+        "AFPDistributionPoint", "SMBDistributionPoint", "JDS", "CDP",
+        "LocalRepository",),
+    "distribution_points": (
+        "DistributionPoints",),
+    "dependency_graph": (
+        "DependencyGraph",),
+    "exceptions": (
+        "JSSPrefsMissingFileError", "JSSPrefsMissingKeyError", "JSSGetError",
+        "JSSPutError", "JSSPostError", "JSSDeleteError",
+        "JSSMethodNotAllowedError", "JSSUnsupportedSearchMethodError",
+        "JSSFileUploadParameterError", "JSSUnsupportedFileType",
+        "JSSCopyError", "JSSError",),
+    "inventory": (
+        "InventoryExporter", "ExtensionAttributePivot", "ApplicationInventory",),
+    "jamf_software_server": (
+        "JSS",),
+    "jssobject": (
+        "JSSObject",),
+    "jssobjectlist": (
+        "JSSObjectList",),
+    "jssobjects": (
+        "Account", "AccountGroup", "ActivationCode", "AdvancedComputerSearch",
+        "AdvancedMobileDeviceSearch", "AdvancedUserSearch", "Building",
+        "BYOProfile", "Category", "Class", "CommandFlush", "Computer",
+        "ComputerCheckIn", "ComputerCommand", "ComputerConfiguration",
+        "ComputerExtensionAttribute", "ComputerGroup", "ComputerHistory",
+        "ComputerInventoryCollection", "ComputerInvitation", "ComputerReport",
+        "Department", "DirectoryBinding", "DiskEncryptionConfiguration",
+        "DistributionPoint", "DockItem", "EBook", "FileUpload",
+        "GSXConnection", "IBeacon", "JSSUser", "LDAPServer",
+        "LicensedSoftware", "LogFlush", "MacApplication",
+        "ManagedPreferenceProfile", "MobileDevice", "MobileDeviceApplication",
+        "MobileDeviceCommand", "MobileDeviceConfigurationProfile",
+        "MobileDeviceEnrollmentProfile", "MobileDeviceExtensionAttribute",
+        "MobileDeviceInvitation", "MobileDeviceGroup",
+        "MobileDeviceProvisioningProfile", "NetbootServer", "NetworkSegment",
+        "OSXConfigurationProfile", "Package", "Patch", "Peripheral",
+        "PeripheralType", "Policy", "Printer", "RestrictedSoftware",
+        "RemovableMACAddress", "SavedSearch", "Script", "Site",
+        "SoftwareUpdateServer", "SMTPServer", "UserExtensionAttribute", "User",
+        "UserGroup", "VPPAccount", "VPPAssignment", "VPPInvitation",),
+    "jss_prefs": (
+        "JSSPrefs",),
+    "orphans": (
+        "FilenameIndex", "OrphanReport",),
+    "repository_sync": (
+        "RepositorySync",),
+    "scope_index": (
+        "ScopeIndex",),
+    "smart_groups": (
+        "SmartGroupEvaluator",),
+    "tools": (
+        "is_osx", "is_linux",),
+}
+
+# Submodules, which are likewise imported on first access as attributes
+# (e.g. jss.jssobjects).
+_SUBMODULES = (
+    "bulk", "casper", "contrib", "dependency_graph", "distribution_point",
+    "distribution_points", "exceptions", "filecopy", "inventory",
+    "jamf_software_server", "jss_prefs", "jssobject", "jssobjectlist",
+    "jssobjects", "orphans", "repository_sync", "scope_index", "smart_groups",
+    "tlsadapter", "tools", "upload", "zipstream")
+
+
+class _LazyModule(types.ModuleType):
+    """The jss package, importing submodules on attribute access."""
+
+    def __getattr__(self, name):
+        if name in _SUBMODULES:
+            return importlib.import_module("." + name, self.__name__)
+        for module_name, names in _LAZY_ATTRIBUTES.items():
+            if name in names:
+                module = importlib.import_module(
+                    "." + module_name, self.__name__)
+                value = getattr(module, name)
+                # Cache, so __getattr__ isn't called again for name.
+                setattr(self, name, value)
+                return value
+        raise AttributeError("'module' object has no attribute '%s'" % name)
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(__all__))
+
+
+__all__ = [name for names in _LAZY_ATTRIBUTES.values() for name in names]
 __version__ = "1.5.0"
+
+# Replace this module with a _LazyModule holding the same globals. Keep
+# a reference to the original, or Python 2 will clear its globals
+# (which our functions use) when it is garbage collected.
+_LAZY_MODULE = _LazyModule(__name__, __doc__)
+_LAZY_MODULE.__dict__.update(globals())
+_LAZY_MODULE._original_module = sys.modules[__name__]   # pylint: disable=protected-access
+sys.modules[__name__] = _LAZY_MODULE
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""bulk.py
+
+Helpers for running many JSS API requests concurrently, with retries
+and a rate limit.
+"""
+
+
+from multiprocessing.pool import ThreadPool
+import threading
+import time
+
+import requests
+from requests.packages.urllib3.exceptions import NewConnectionError
+
+
+# Response codes worth retrying; anything else >= 400 (e.g. 409
+# Conflict for invalid or duplicate data) will fail the same way again.
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+# Response codes for which a request that creates an object can safely
+# be sent again, as the server did not act on it. After a 500, 502, or
+# 504, the object may have been created anyway.
+CREATE_RETRY_STATUS_CODES = (503,)
+
+
+class RateLimiter(object):
+    """Spaces out calls to wait() across threads.
+
+    Each call may also count as more than one unit (e.g. a number of
+    bytes, to cap bandwidth).
+
+    Attributes:
+        rate: Float maximum number of calls (or units) per second, or
+            None for no limit.
+    """
+
+    def __init__(self, rate=None):
+        """Create a RateLimiter.
+
+        Args:
+            rate: Float maximum number of calls (or units) per second.
+                Defaults to None (no limit).
+        """
+        self.rate = rate
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, amount=1):
+        """Block until the next call is allowed.
+
+        Args:
+            amount: Number of units this call uses. Defaults to 1.
+        """
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.time()
+            delay = self._next_time - now
+            self._next_time = (max(now, self._next_time) +
+                               float(amount) / self.rate)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class BulkResult(object):
+    """The outcome of one item of a bulk operation.
+
+    Attributes:
+        index: Int position of the item in the input.
+        item: The input item.
+        value: Whatever the operation returned for the item (e.g. the
+            new object's ID), or None if it failed.
+        error: The exception raised by the final attempt, or None.
+        attempts: Int number of attempts made.
+    """
+
+    def __init__(self, index, item):
+        self.index = index
+        self.item = item
+        self.value = None
+        self.error = None
+        self.attempts = 0
+
+    def __repr__(self):
+        if self.error is None:
+            return "<BulkResult %s: %r>" % (self.index, self.value)
+        return "<BulkResult %s: %s: %s>" % (
+            self.index, self.error.__class__.__name__, self.error)
+
+    @property
+    def ok(self):   # pylint: disable=invalid-name
+        """Return whether the item succeeded."""
+        return self.error is None
+
+
+def is_retryable(error):
+    """Return whether an exception is worth another attempt."""
+    if isinstance(error, (requests.exceptions.ConnectionError,
+                          requests.exceptions.Timeout)):
+        return True
+    return getattr(error, "status_code", None) in RETRY_STATUS_CODES
+
+
+def is_create_retryable(error):
+    """Return whether a failed request which creates an object (a POST)
+    can be sent again without risking a duplicate.
+
+    Only failures to connect, and 503 responses, are retried. After a
+    read timeout, a dropped connection, or another 5xx response, the
+    JSS may have created the object despite the error.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        # requests wraps urllib3's MaxRetryError, whose reason is
+        # NewConnectionError if no connection was made.
+        reason = getattr(error.args[0] if error.args else None, "reason",
+                         None)
+        return isinstance(reason, NewConnectionError)
+    return getattr(error, "status_code", None) in CREATE_RETRY_STATUS_CODES
+
+
+def run_bulk(func, items, workers=8, retries=2, rate_limit=None,
+             finish=None, callback=None, retryable=None):
+    """Call func on each item concurrently.
+
+    Errors are caught and recorded per item rather than raised.
+    Connection errors, timeouts, and 5xx responses are retried with
+    exponential backoff (0.5s, 1s, 2s...), unless retryable says
+    otherwise.
+
+    Args:
+        func: Function taking an item, making one request, and
+            returning a value for the result.
+        items: Iterable of items.
+        workers: Int maximum number of concurrent requests. Defaults
+            to 8.
+        retries: Int number of times to retry a failed item. Defaults
+            to 2.
+        rate_limit: Float maximum number of requests per second, across
+            all workers. Defaults to None (no limit).
+        finish: Function to call with each successful BulkResult, in
+            the calling thread, as it completes. Exceptions it raises
+            are recorded as the result's error. Defaults to None.
+        callback: Function to call with each BulkResult, in the
+            calling thread, as it completes. Will be called like:
+                `callback(result, completed_count, total_count)`
+            Defaults to None.
+        retryable: Function to decide whether a failed attempt should
+            be retried (e.g. to not retry creates after a timeout; see
+            is_create_retryable). Will be called like:
+                `retryable(error, item)`
+            Defaults to None, which uses is_retryable.
+
+    Returns:
+        List of BulkResult, in the same order as items.
+    """
+    limiter = RateLimiter(rate_limit)
+    if retryable is None:
+        retryable = lambda error, _: is_retryable(error)
+
+    def run(result):
+        """Attempt one item until it succeeds or runs out of retries."""
+        while True:
+            limiter.wait()
+            result.attempts += 1
+            try:
+                result.value = func(result.item)
+                result.error = None
+                return result
+            except Exception as error:  # pylint: disable=broad-except
+                result.error = error
+                if (result.attempts > retries or
+                        not retryable(error, result.item)):
+                    return result
+            time.sleep(0.5 * 2 ** (result.attempts - 1))
+
+    results = [BulkResult(index, item) for index, item in enumerate(items)]
+    if not results:
+        return results
+    pool = ThreadPool(max(1, min(workers, len(results))))
+    try:
+        for completed, result in enumerate(
+                pool.imap_unordered(run, results), 1):
+            if finish and result.ok:
+                try:
+                    finish(result)
+                except Exception as error:  # pylint: disable=broad-except
+                    result.error = error
+            if callback:
+                callback(result, completed, len(results))
+    finally:
+        pool.terminate()
+    return results
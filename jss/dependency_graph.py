@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""dependency_graph.py
+
+Class for tracking which Policies and ComputerGroups reference which
+Packages, Scripts, ComputerGroups, and Categories.
+"""
+
+
+import cPickle
+import os
+
+from . import jssobjects
+
+
+# Paths to the references each crawled class makes, as
+# (path to referenced Element, referenced class name). Each
+# referenced Element has an "id" and "name".
+REFERENCES = {
+    "Policy": (
+        ("general/category", "Category"),
+        ("package_configuration/packages/package", "Package"),
+        ("scripts/script", "Script"),
+        ("scope/computer_groups/computer_group", "ComputerGroup"),
+        ("scope/exclusions/computer_groups/computer_group",
+         "ComputerGroup")),
+}
+
+# ComputerGroup criteria refer to other groups by name.
+GROUP_CRITERIA = ("Computer Group",)
+
+
+class DependencyGraph(object):
+    """Graph of the objects Policies and ComputerGroups depend on.
+
+    Answering "which policies use this package?" otherwise means
+    retrieving every Policy. The DependencyGraph does that crawl once
+    (concurrently), and keeps adjacency sets in both directions, so
+    both used_by (e.g. the Policies using a Package) and needs (e.g.
+    the Packages, Scripts, groups, and Category a Policy uses) are
+    single dictionary lookups.
+
+    Edges recorded are:
+        Policy -> Category, Package, Script, and scoped or excluded
+            ComputerGroups.
+        ComputerGroup -> ComputerGroups referenced by "Computer Group"
+            criteria.
+
+    Nodes are (class name, int ID) tuples, e.g. ("Package", 12).
+
+    The graph may be pickled and reloaded on later runs, and kept
+    current by registering it with a JSS.
+
+    Attributes:
+        names: Dict of node: object name, for every crawled or
+            referenced object seen.
+    """
+
+    crawled_classes = (jssobjects.Policy, jssobjects.ComputerGroup)
+
+    def __init__(self):
+        """Create an empty DependencyGraph. Use build to populate it."""
+        self.names = {}
+        self._needs = {}
+        self._used_by = {}
+        self._group_names = {}
+
+    def build(self, jss, workers=8):
+        """Crawl all Policies and ComputerGroups.
+
+        Args:
+            jss: A JSS object.
+            workers: Int number of concurrent GET requests. Defaults
+                to 8.
+        """
+        groups = []
+        for obj_class in self.crawled_classes:
+            obj_list = jss.factory.get_object(obj_class)
+            for item in obj_list:
+                self._set_name((obj_class.__name__, int(item.id)), item.name)
+            for obj in obj_list.iter_retrieve_all(workers=workers):
+                if isinstance(obj, jssobjects.ComputerGroup):
+                    # Criteria refer to groups by name; wait until all
+                    # group names are known.
+                    groups.append(obj)
+                else:
+                    self.add(obj)
+        for group in groups:
+            self.add(group)
+
+    def register(self, jss):
+        """Update the graph as objects are saved or deleted through jss.
+
+        Args:
+            jss: A JSS object.
+        """
+        jss.save_callbacks.append(self.add)
+        jss.delete_callbacks.append(self.remove)
+
+    @staticmethod
+    def _node(obj):
+        """Return the (class name, int ID) node for obj.
+
+        Args:
+            obj: A JSSObject, or a (class name, ID) tuple.
+        """
+        if isinstance(obj, tuple):
+            return (obj[0], int(obj[1]))
+        return (obj.__class__.__name__, int(obj.id))
+
+    def _set_name(self, node, name):
+        """Record the name of a node."""
+        self.names[node] = name
+        if node[0] == "ComputerGroup":
+            self._group_names[name] = node
+
+    def _references(self, obj):
+        """Return the set of nodes obj references."""
+        references = set()
+        for path, class_name in REFERENCES.get(obj.__class__.__name__, ()):
+            for element in obj.findall(path):
+                ref_id = element.findtext("id")
+                # Unset references (e.g. no category) have an ID of -1.
+                if not ref_id or int(ref_id) < 1:
+                    continue
+                node = (class_name, int(ref_id))
+                references.add(node)
+                if node not in self.names and element.findtext("name"):
+                    self._set_name(node, element.findtext("name"))
+
+        if isinstance(obj, jssobjects.ComputerGroup):
+            for criterion in obj.findall("criteria/criterion"):
+                if criterion.findtext("name") in GROUP_CRITERIA:
+                    node = self._group_names.get(criterion.findtext("value"))
+                    if node:
+                        references.add(node)
+        return references
+
+    def add(self, obj):
+        """Add or update a Policy's or ComputerGroup's dependencies.
+
+        Objects of other types are ignored, so this may be used as a
+        JSS save callback.
+
+        Args:
+            obj: Full Policy or ComputerGroup object.
+        """
+        if not isinstance(obj, self.crawled_classes):
+            return
+        node = self._node(obj)
+        self._unlink(node)
+        self._set_name(node, obj.name)
+        references = self._references(obj)
+        self._needs[node] = references
+        for reference in references:
+            self._used_by.setdefault(reference, set()).add(node)
+
+    def _unlink(self, node):
+        """Remove the edges out of node."""
+        for reference in self._needs.pop(node, ()):
+            users = self._used_by.get(reference)
+            if users is not None:
+                users.discard(node)
+                if not users:
+                    del self._used_by[reference]
+
+    def remove(self, obj):
+        """Remove an object, and the edges out of it, from the graph.
+
+        Edges into it are kept, so that used_by still reports objects
+        which reference a now-deleted object.
+
+        Args:
+            obj: A JSSObject, or a (class name, ID) tuple.
+        """
+        node = self._node(obj)
+        self._unlink(node)
+        if node not in self._used_by:
+            name = self.names.pop(node, None)
+            if self._group_names.get(name) == node:
+                del self._group_names[name]
+
+    def needs(self, obj):
+        """Return the set of nodes obj depends on.
+
+        Args:
+            obj: A JSSObject, or a (class name, ID) tuple, e.g.
+                ("Policy", 5).
+        """
+        return set(self._needs.get(self._node(obj), ()))
+
+    def used_by(self, obj):
+        """Return the set of nodes which depend on obj.
+
+        Args:
+            obj: A JSSObject, or a (class name, ID) tuple, e.g.
+                ("Package", 12).
+        """
+        return set(self._used_by.get(self._node(obj), ()))
+
+    def unused(self, class_name, ids):
+        """Return the IDs of class_name objects nothing depends on.
+
+        Args:
+            class_name: String class name, e.g. "Package".
+            ids: Iterable of int IDs to check, e.g. the IDs from a
+                Package listing.
+
+        Returns:
+            Sorted list of int IDs.
+        """
+        return sorted(int(obj_id) for obj_id in ids
+                      if (class_name, int(obj_id)) not in self._used_by)
+
+    def pickle(self, path):
+        """Write the graph to a python pickle.
+
+        Args:
+            path: String file path to the file you wish to (over)write.
+                Path will have ~ expanded prior to opening.
+        """
+        with open(os.path.expanduser(path), "wb") as pickle:
+            cPickle.Pickler(pickle, cPickle.HIGHEST_PROTOCOL).dump(self)
+
+    @classmethod
+    def from_pickle(cls, path):
+        """Load a DependencyGraph from a pickle file.
+
+        Args:
+            path: String file path to the file you wish to load from.
+                Path will have ~ expanded prior to opening.
+        """
+        with open(os.path.expanduser(path), "rb") as pickle:
+            return cPickle.Unpickler(pickle).load()
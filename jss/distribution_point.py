@@ -21,22 +21,322 @@ Casper.
 
 
 import os
+import plistlib
 import re
-import shutil
+import select
 import socket
+import stat
 import subprocess
+import threading
+import time
 import urllib
 
 from . import casper
-from .exceptions import JSSError, JSSUnsupportedFileType
-try:
-    from .contrib.mount_shares_better import mount_share
-except ImportError:
-    # mount_shares_better uses PyObjC. If using non-system python,
-    # chances are good user has not set up PyObjC, so fall back to
-    # subprocess to mount. (See mount methods).
-    mount_share = None
-from .tools import (is_osx, is_linux, is_package)
+from .exceptions import JSSError
+from .filecopy import copy_file, copy_tree, remove_path, replace_path
+from .orphans import FilenameIndex
+from .tools import (is_osx, is_linux, is_package, hash_path,
+                    path_signature)
+from .upload import upload_file
+
+
+# The mount_share function, once imported (None if unavailable). False
+# until then.
+_MOUNT_SHARE = False
+
+
+def _get_mount_share():
+    """Return the PyObjC mount_share function, or None.
+
+    mount_shares_better uses PyObjC, which is slow to import, so this
+    waits until something is actually mounted.
+    """
+    global _MOUNT_SHARE   # pylint: disable=global-statement
+    if _MOUNT_SHARE is False:
+        try:
+            from .contrib.mount_shares_better import mount_share
+        except ImportError:
+            # mount_shares_better uses PyObjC. If using non-system
+            # python, chances are good user has not set up PyObjC, so
+            # fall back to subprocess to mount. (See mount methods).
+            mount_share = None
+        _MOUNT_SHARE = mount_share
+    return _MOUNT_SHARE
+
+
+# Linux's mount table, which can be polled for changes.
+MOUNTINFO = "/proc/self/mountinfo"
+
+# Seconds to reuse the output of the mount command, where there is no
+# MOUNTINFO to poll.
+MOUNT_TABLE_TTL = 5
+
+# Seconds to reuse a repository's DNS-derived valid mount strings.
+MOUNT_STRINGS_TTL = 300
+
+# Parsed mount table cache. "mounts" is a list of (source, mount point,
+# fs type) tuples, or None when it needs to be re-read.
+_MOUNT_TABLE = {"mounts": None, "time": 0, "mountinfo": None}
+_MOUNT_TABLE_LOCK = threading.Lock()
+
+
+def _get_mounts():
+    """Return the mounted filesystems, as (source, mount point, fs type)
+    tuples.
+
+    On Linux, /proc/self/mountinfo is read directly, and re-read only
+    when the kernel reports that the mount table has changed (by
+    polling it for POLLPRI). Elsewhere, the output of mount is parsed,
+    and reused for MOUNT_TABLE_TTL seconds. Either way, mounting and
+    unmounting through python-jss invalidates the cache.
+    """
+    with _MOUNT_TABLE_LOCK:
+        mountinfo = _MOUNT_TABLE["mountinfo"]
+        if mountinfo is None and os.path.exists(MOUNTINFO):
+            mountinfo = _MOUNT_TABLE["mountinfo"] = open(MOUNTINFO)
+        if mountinfo:
+            poller = select.poll()
+            poller.register(mountinfo, select.POLLPRI | select.POLLERR)
+            if poller.poll(0):
+                _MOUNT_TABLE["mounts"] = None
+        elif time.time() - _MOUNT_TABLE["time"] > MOUNT_TABLE_TTL:
+            _MOUNT_TABLE["mounts"] = None
+
+        if _MOUNT_TABLE["mounts"] is None:
+            if mountinfo:
+                # Reading from the start also clears the poll event.
+                mountinfo.seek(0)
+                mounts = _parse_mountinfo(mountinfo.read())
+            else:
+                mounts = _parse_mount_output(
+                    subprocess.check_output("mount"))
+            _MOUNT_TABLE["mounts"] = mounts
+            _MOUNT_TABLE["time"] = time.time()
+        return _MOUNT_TABLE["mounts"]
+
+
+def _invalidate_mounts():
+    """Force the next _get_mounts to re-read the mount table."""
+    with _MOUNT_TABLE_LOCK:
+        _MOUNT_TABLE["mounts"] = None
+
+
+def _parse_mountinfo(text):
+    """Parse /proc/self/mountinfo into (source, mount point, fs type).
+
+    Lines look like this (fields after the "-" separator are fs type,
+    source, and superblock options):
+    36 35 0:42 / /mnt/jamf rw,relatime shared:1 - cifs //pretendco.com/jamf
+    rw,vers=3.0,...
+    """
+    mounts = []
+    for line in text.splitlines():
+        fields, _, fs_fields = line.partition(" - ")
+        fields, fs_fields = fields.split(), fs_fields.split()
+        if len(fields) < 5 or len(fs_fields) < 2:
+            continue
+        mounts.append((_unescape_mountinfo(fs_fields[1]),
+                       _unescape_mountinfo(fields[4]), fs_fields[0]))
+    return mounts
+
+
+def _unescape_mountinfo(value):
+    """Unescape the octal escapes (e.g. "\\040" for space) mountinfo
+    uses for whitespace and backslashes."""
+    return re.sub(r"\\([0-7]{3})",
+                  lambda match: chr(int(match.group(1), 8)), value)
+
+
+def _parse_mount_output(text):
+    """Parse the output of mount into (source, mount point, fs type)."""
+    # The mount command returns lines like this on OS X...
+    # //username@pretendco.com/JSS%20REPO on /Volumes/JSS REPO
+    # (afpfs, nodev, nosuid, mounted by local_me)
+    # and like this on Linux...
+    # //pretendco.com/jamf on /mnt/jamf type cifs (rw,relatime,
+    # <options>...)
+    if is_osx():
+        mount_string_regex = re.compile(r"\(([\w]*),*.*\)$")
+        mount_point_regex = re.compile(r"on ([\w/ -]*) \(.*$")
+    elif is_linux():
+        mount_string_regex = re.compile(r"type ([\w]*) \(.*\)$")
+        mount_point_regex = re.compile(r"on ([\w/ -]*) type .*$")
+    else:
+        raise JSSError("Unsupported OS.")
+
+    mounts = []
+    for mount in text.splitlines():
+        fs_match = re.search(mount_string_regex, mount)
+        fs_type = fs_match.group(1) if fs_match else None
+        # Automounts, non-network shares, and network shares
+        # all have a slightly different format, so it's easiest to
+        # just split.
+        mount_string = mount.split(" on ")[0]
+        # Get the mount point string between from the end back to
+        # the last "on", but before the options (wrapped in
+        # parenthesis). Considers alphanumerics, / , _ , - and a
+        # blank space as valid, but no crazy chars.
+        match = re.search(mount_point_regex, mount)
+        mount_point = match.group(1) if match else None
+        mounts.append((mount_string, mount_point, fs_type))
+    return mounts
+
+
+# Package hash_type values, and the matching hashlib algorithm.
+HASH_TYPES = {"MD5": "md5", "SHA_512": "sha512"}
+
+# Name of the file, in each repository folder, recording the size,
+# mtime, and content hash of the files copied there.
+MANIFEST_NAME = ".python-jss-manifest.plist"
+
+# Seconds within which a folder's mtime may not change when it does
+# (FAT and SMB record mtimes to two seconds). A folder listed this soon
+# after its mtime is listed again next time.
+MTIME_RESOLUTION = 2
+
+
+# Folder path: Lock serializing updates to that folder's manifest.
+_MANIFEST_LOCKS = {}
+_MANIFEST_LOCKS_LOCK = threading.Lock()
+
+
+def _manifest_lock(folder):
+    """Return the Lock for updating a folder's copy manifest."""
+    with _MANIFEST_LOCKS_LOCK:
+        return _MANIFEST_LOCKS.setdefault(os.path.abspath(folder),
+                                          threading.Lock())
+
+
+def _temp_name(path, suffix):
+    """Return a hidden path beside path, unique to this thread."""
+    folder, basename = os.path.split(path)
+    return os.path.join(folder, ".%s.%s-%s.%s" % (
+        basename, os.getpid(), threading.current_thread().ident, suffix))
+
+
+def _read_manifest(folder):
+    """Return the copy manifest dict for a repository folder."""
+    try:
+        return plistlib.readPlist(os.path.join(folder, MANIFEST_NAME))
+    except Exception:   # pylint: disable=broad-except
+        # Missing or unreadable; it will be rebuilt.
+        return {}
+
+
+def _write_manifest(folder, manifest):
+    """Write the copy manifest dict for a repository folder."""
+    path = os.path.join(folder, MANIFEST_NAME)
+    temp_path = "%s.%s-%s.tmp" % (path, os.getpid(),
+                                  threading.current_thread().ident)
+    plistlib.writePlist(manifest, temp_path)
+    os.rename(temp_path, path)
+
+
+def _is_identical(source, destination, manifest):
+    """Return whether destination has the same contents as source.
+
+    Args:
+        source: Path to a local file or directory.
+        destination: Path to the copy in a repository.
+        manifest: Copy manifest dict for destination's folder. The
+            manifest file is updated if destination's hash is
+            computed.
+
+    Returns:
+        Tuple of (Bool, source's hash if it was computed, else None).
+    """
+    if not os.path.exists(destination):
+        return False, None
+    source_signature = path_signature(source)
+    destination_signature = path_signature(destination)
+    if source_signature[0] != destination_signature[0]:
+        return False, None
+
+    basename = os.path.basename(destination)
+    entry = manifest.get(basename, {})
+    destination_hash = None
+    if (entry.get("size"), entry.get("mtime")) == destination_signature:
+        # The manifest is still good for destination; if source is
+        # also unchanged since, there's no need to hash.
+        if (entry.get("source_size"),
+                entry.get("source_mtime")) == source_signature:
+            return True, None
+        destination_hash = entry.get("hash")
+    if destination_hash is None:
+        destination_hash = hash_path(destination)
+
+    source_hash = hash_path(source)
+    if source_hash != destination_hash:
+        return False, source_hash
+    _record_copy(source, destination, source_hash)
+    return True, source_hash
+
+
+def _record_copy(source, destination, source_hash=None):
+    """Record a copied (or verified identical) file in its manifest.
+
+    The manifest is re-read and written under the folder's lock, so
+    concurrent copies to the same folder don't lose each other's
+    entries.
+
+    Args:
+        source: Path to the local file or directory.
+        destination: Path to the copy in a repository.
+        source_hash: source's hash, if already computed. Otherwise the
+            entry has no hash, and it is computed when next needed.
+    """
+    folder = os.path.dirname(destination)
+    source_signature = path_signature(source)
+    destination_signature = path_signature(destination)
+    entry = {"size": destination_signature[0],
+             "mtime": destination_signature[1],
+             "source_size": source_signature[0],
+             "source_mtime": source_signature[1]}
+    if source_hash is not None:
+        entry["hash"] = source_hash
+    with _manifest_lock(folder):
+        manifest = _read_manifest(folder)
+        manifest[os.path.basename(destination)] = entry
+        try:
+            _write_manifest(folder, manifest)
+        except (IOError, OSError):
+            # Without a manifest, the next copy just has to hash again.
+            pass
+
+
+def _manifest_entry(path, copy_entry=None):
+    """Return the folder index entry dict for a path.
+
+    Args:
+        path: Path to a file or directory in a repository folder.
+        copy_entry: The path's copy manifest entry, or None.
+    """
+    stats = os.lstat(path)
+    entry = {"size": stats.st_size, "mtime": stats.st_mtime,
+             "is_dir": stat.S_ISDIR(stats.st_mode), "hash": None}
+    # Directory copy manifest entries have a total size, so can't be
+    # checked this cheaply.
+    if (copy_entry and not entry["is_dir"] and
+            (copy_entry.get("size"), copy_entry.get("mtime")) ==
+            (entry["size"], entry["mtime"])):
+        entry["hash"] = copy_entry.get("hash")
+    return entry
+
+
+def _scan_folder(path):
+    """Return a dict of filename: index entry for a repository folder."""
+    copies = _read_manifest(path)
+    files = {}
+    for filename in os.listdir(path):
+        if filename.startswith(MANIFEST_NAME):
+            continue
+        try:
+            files[filename] = _manifest_entry(os.path.join(path, filename),
+                                              copies.get(filename))
+        except OSError:
+            # Deleted since listing.
+            pass
+    return files
 
 
 PKG_FILE_TYPE = '0'
@@ -47,12 +347,12 @@ SCRIPT_FILE_TYPE = '3'
 
 def auto_mounter(original):
     """Decorator for automatically mounting, if needed."""
-    def mounter(*args):
+    def mounter(*args, **kwargs):
         """If not mounted, mount."""
         self = args[0]
         if not self.is_mounted():
             self.mount()
-        return original(*args)
+        return original(*args, **kwargs)
     return mounter
 
 
@@ -98,12 +398,75 @@ class Repository(object):
 # pylint: enable=too-few-public-methods
 
 class FileRepository(Repository):
-    """Local file shares."""
+    """Local file shares.
+
+    The contents of the Packages and Scripts folders are indexed with
+    one directory scan each (see manifest). The index is reused for as
+    long as the folder's mtime is unchanged (and was not too recent to
+    trust when scanned), and is updated in place by copies and deletes
+    made through this object, so exists and exists_many don't need to
+    touch the share for every file they find.
+    """
+
+    def __init__(self, **connection_args):
+        """Set up the repository and its empty folder index."""
+        # Folder path: (folder mtime, time listed, dict of filename:
+        # entry dict).
+        self._listings = {}
+        self._listings_lock = threading.Lock()
+        super(FileRepository, self).__init__(**connection_args)
 
     def _build_url(self):
         """Build a connection URL."""
         pass
 
+    def manifest(self, folder="Packages", refresh=False):
+        """Return an index of a repository folder's contents.
+
+        Args:
+            folder: "Packages" (default) or "Scripts".
+            refresh: Bool; if True, rescan the folder even if its mtime
+                has not changed. Defaults to False.
+
+        Returns:
+            Dict of filename: dict with keys "size", "mtime", "is_dir",
+            and "hash" (the content hash recorded when the file was
+            copied with skip_identical, if still current, or None).
+            Empty if the folder does not exist.
+        """
+        path = os.path.join(self.connection["mount_point"], folder)
+        try:
+            folder_mtime = os.stat(path).st_mtime
+        except OSError:
+            return {}
+        with self._listings_lock:
+            listing = self._listings.get(path)
+            if (refresh or listing is None or listing[0] != folder_mtime or
+                    listing[1] - folder_mtime < MTIME_RESOLUTION):
+                listing = self._listings[path] = (
+                    folder_mtime, time.time(), _scan_folder(path))
+        return listing[2]
+
+    def _update_manifest(self, path):
+        """Update the folder index after path was copied or deleted."""
+        folder, filename = os.path.split(path)
+        with self._listings_lock:
+            if folder not in self._listings:
+                return
+            files = self._listings[folder][2]
+            try:
+                listed = time.time()
+                folder_mtime = os.stat(folder).st_mtime
+                if os.path.lexists(path):
+                    files[filename] = _manifest_entry(
+                        path, _read_manifest(folder).get(filename))
+                else:
+                    files.pop(filename, None)
+            except OSError:
+                del self._listings[folder]
+            else:
+                self._listings[folder] = (folder_mtime, listed, files)
+
     def copy_pkg(self, filename, _):
         """Copy a package to the repo's Package subdirectory.
 
@@ -112,8 +475,8 @@ class FileRepository(Repository):
             _: Ignored. Used for compatibility with JDS repos.
         """
         basename = os.path.basename(filename)
-        self._copy(filename, os.path.join(self.connection["mount_point"],
-                                          "Packages", basename))
+        return self._copy(filename, os.path.join(
+            self.connection["mount_point"], "Packages", basename))
 
     def copy_script(self, filename, id_=-1):
         """Copy a script to the repo's Script subdirectory.
@@ -132,8 +495,8 @@ class FileRepository(Repository):
             self._copy_script_migrated(filename, id_, SCRIPT_FILE_TYPE)
         else:
             basename = os.path.basename(filename)
-            self._copy(filename, os.path.join(self.connection["mount_point"],
-                                              "Scripts", basename))
+            return self._copy(filename, os.path.join(
+                self.connection["mount_point"], "Scripts", basename))
 
     def _copy_script_migrated(self, filename, id_=-1,
                               file_type=SCRIPT_FILE_TYPE):
@@ -150,29 +513,63 @@ class FileRepository(Repository):
         """
         basefname = os.path.basename(filename)
 
-        resource = open(filename, "rb")
         headers = {"DESTINATION": "1", "OBJECT_ID": str(id_), "FILE_TYPE":
                    file_type, "FILE_NAME": basefname}
-        response = self.connection["jss"].session.post(
-            url="%s/%s" % (self.connection["jss"].base_url, "dbfileupload"),
-            data=resource, headers=headers)
+        response = upload_file(
+            self.connection["jss"].session,
+            "%s/%s" % (self.connection["jss"].base_url, "dbfileupload"),
+            filename, headers,
+            timeout=self.connection.get("upload_timeout"),
+            retries=self.connection.get("upload_retries", 2),
+            callback=self.connection.get("progress_callback"))
         return response
 
-    def _copy(self, filename, destination):   # pylint: disable=no-self-use
+    def _copy(self, filename, destination):
         """Copy a file or folder to the repository.
 
-        Will mount if needed.
+        Will mount if needed. Files are copied by the kernel where
+        possible, and bundle contents in parallel (see filecopy).
+
+        If the repository's "skip_identical" connection argument is
+        True, and destination already has the same size and content
+        hash as filename, it is not copied again. Hashes of copied
+        files are kept in a manifest file in the destination folder,
+        so unchanged files need not be re-read to be compared.
 
         Args:
             filename: Path to copy.
             destination: Remote path to copy file to.
+
+        Returns:
+            True if copied, False if skipped as identical.
         """
         full_filename = os.path.abspath(os.path.expanduser(filename))
+        skip_identical = self.connection.get("skip_identical")
+        if skip_identical:
+            identical, source_hash = _is_identical(
+                full_filename, destination,
+                _read_manifest(os.path.dirname(destination)))
+            if identical:
+                return False
+
+        # Copy beside destination, and then replace it, so a failed
+        # copy leaves any existing copy intact (and a bundle is
+        # replaced, rather than merged with).
+        temp_path = _temp_name(destination, "python-jss-copy")
+        try:
+            if os.path.isdir(full_filename):
+                copy_tree(full_filename, temp_path)
+            else:
+                copy_file(full_filename, temp_path)
+            replace_path(temp_path, destination)
+        except BaseException:
+            remove_path(temp_path)
+            raise
 
-        if os.path.isdir(full_filename):
-            shutil.copytree(full_filename, destination)
-        elif os.path.isfile(full_filename):
-            shutil.copyfile(full_filename, destination)
+        if skip_identical:
+            _record_copy(full_filename, destination, source_hash)
+        self._update_manifest(destination)
+        return True
 
     def delete(self, filename):
         """Delete a file from the repository.
@@ -187,10 +584,8 @@ class FileRepository(Repository):
         """
         folder = "Packages" if is_package(filename) else "Scripts"
         path = os.path.join(self.connection["mount_point"], folder, filename)
-        if os.path.isdir(path):
-            shutil.rmtree(path)
-        elif os.path.isfile(path):
-            os.remove(path)
+        remove_path(path)
+        self._update_manifest(path)
 
     def exists(self, filename):
         """Report whether a file exists on the distribution point.
@@ -201,13 +596,36 @@ class FileRepository(Repository):
             filename: Filename you wish to check. (No path! e.g.:
                 "AdobeFlashPlayer-14.0.0.176.pkg")
         """
-        if is_package(filename):
-            filepath = os.path.join(self.connection["mount_point"],
-                                    "Packages", filename)
-        else:
-            filepath = os.path.join(self.connection["mount_point"],
-                                    "Scripts", filename)
-        return os.path.exists(filepath)
+        folder = "Packages" if is_package(filename) else "Scripts"
+        return self._exists(folder, filename, self.manifest(folder))
+
+    def _exists(self, folder, filename, files):
+        """Return whether filename is in a folder.
+
+        Filenames missing from the index are checked on the share, so
+        shares which ignore case (e.g. HFS+ and SMB) still find them.
+        """
+        return filename in files or os.path.exists(
+            os.path.join(self.connection["mount_point"], folder, filename))
+
+    def exists_many(self, filenames):
+        """Report whether each of many files exists on the repository.
+
+        Args:
+            filenames: Iterable of filenames (no paths).
+
+        Returns:
+            Dict of filename: Bool.
+        """
+        manifests = {}
+        results = {}
+        for filename in filenames:
+            folder = "Packages" if is_package(filename) else "Scripts"
+            if folder not in manifests:
+                manifests[folder] = self.manifest(folder)
+            results[filename] = self._exists(folder, filename,
+                                             manifests[folder])
+        return results
 
 
 class LocalRepository(FileRepository):
@@ -229,6 +647,8 @@ class LocalRepository(FileRepository):
                 Optional connection arguments (Migrated script support):
                     jss: A JSS Object. NOTE: jss_migrated must be True
                         for this to do anything.
+                skip_identical: Bool; if True, don't copy files whose
+                    size and content hash match the repository's copy.
         """
         super(LocalRepository, self).__init__(**connection_args)
         self.connection["url"] = "local://%s" % self.connection["mount_point"]
@@ -245,6 +665,8 @@ class MountedRepository(FileRepository):
 
     def __init__(self, **connection_args):
         """Init a MountedRepository by calling super."""
+        # (url, share_name, port), expiration time, and mount strings.
+        self._mount_strings = (None, 0, ())
         super(MountedRepository, self).__init__(**connection_args)
 
     def mount(self):
@@ -256,7 +678,10 @@ class MountedRepository(FileRepository):
             if not is_osx():
                 if not os.path.exists(self.connection["mount_point"]):
                     os.mkdir(self.connection["mount_point"])
-            self._mount()
+            try:
+                self._mount()
+            finally:
+                _invalidate_mounts()
 
     def _mount(self):
         """Private mount method."""
@@ -277,54 +702,31 @@ class MountedRepository(FileRepository):
                        self.connection["mount_point"]]
                 if forced:
                     cmd.insert(2, "force")
-                subprocess.check_call(cmd)
             else:
                 cmd = ["umount", self.connection["mount_point"]]
                 if forced:
                     cmd.insert(1, "-f")
+            try:
                 subprocess.check_call(cmd)
+            finally:
+                _invalidate_mounts()
 
     def is_mounted(self):
         """Test for whether a mount point is mounted.
 
         If it is currently mounted, determine the path where it's
         mounted and update the connection's mount_point accordingly.
-        """
-        mount_check = subprocess.check_output("mount").splitlines()
-        # The mount command returns lines like this on OS X...
-        # //username@pretendco.com/JSS%20REPO on /Volumes/JSS REPO
-        # (afpfs, nodev, nosuid, mounted by local_me)
-        # and like this on Linux...
-        # //pretendco.com/jamf on /mnt/jamf type cifs (rw,relatime,
-        # <options>...)
 
+        The parsed mount table is cached (see _get_mounts), so this is
+        cheap enough to call before every file operation.
+        """
         valid_mount_strings = self._get_valid_mount_strings()
         was_mounted = False
-        if is_osx():
-            mount_string_regex = re.compile(r"\(([\w]*),*.*\)$")
-            mount_point_regex = re.compile(r"on ([\w/ -]*) \(.*$")
-        elif is_linux():
-            mount_string_regex = re.compile(r"type ([\w]*) \(.*\)$")
-            mount_point_regex = re.compile(r"on ([\w/ -]*) type .*$")
-        else:
-            raise JSSError("Unsupported OS.")
 
-        for mount in mount_check:
-            fs_match = re.search(mount_string_regex, mount)
-            fs_type = fs_match.group(1) if fs_match else None
-            # Automounts, non-network shares, and network shares
-            # all have a slightly different format, so it's easiest to
-            # just split.
-            mount_string = mount.split(" on ")[0]
+        for mount_string, mount_point, fs_type in _get_mounts():
             # Does the mount_string match one of our valid_mount_strings?
             if [mstring for mstring in valid_mount_strings if
                     mstring in mount_string] and self.fs_type == fs_type:
-                # Get the mount point string between from the end back to
-                # the last "on", but before the options (wrapped in
-                # parenthesis). Considers alphanumerics, / , _ , - and a
-                # blank space as valid, but no crazy chars.
-                match = re.search(mount_point_regex, mount)
-                mount_point = match.group(1) if match else None
                 was_mounted = True
                 # Reset the connection's mount point to the discovered
                 # value.
@@ -361,7 +763,22 @@ class MountedRepository(FileRepository):
         Then factor in the possibility that the port is included too!
         This gives us a total of up to six valid addresses for mount
         to report.
+
+        The DNS lookups this needs can be slow, so the results are
+        reused for MOUNT_STRINGS_TTL seconds, or until the url,
+        share_name, or port connection arguments change.
         """
+        key = (self.connection["url"], self.connection["share_name"],
+               self.connection["port"])
+        cached_key, expiration, results = self._mount_strings
+        if key != cached_key or time.time() > expiration:
+            results = self._build_valid_mount_strings()
+            self._mount_strings = (key, time.time() + MOUNT_STRINGS_TTL,
+                                   results)
+        return results
+
+    def _build_valid_mount_strings(self):
+        """Return a tuple of potential mount strings, uncached."""
         results = set()
         join = os.path.join
         url = self.connection["url"]
@@ -404,8 +821,11 @@ class MountedRepository(FileRepository):
         Args:
             filename: Path to copy.
             destination: Remote path to copy file to.
+
+        Returns:
+            True if copied, False if skipped as identical.
         """
-        super(MountedRepository, self)._copy(filename, destination)
+        return super(MountedRepository, self)._copy(filename, destination)
 
     @auto_mounter
     def delete(self, filename):
@@ -430,6 +850,26 @@ class MountedRepository(FileRepository):
         """
         return super(MountedRepository, self).exists(filename)
 
+    @auto_mounter
+    def manifest(self, folder="Packages", refresh=False):
+        """Return an index of a repository folder's contents.
+
+        See FileRepository.manifest.
+        """
+        return super(MountedRepository, self).manifest(folder, refresh)
+
+    @auto_mounter
+    def exists_many(self, filenames):
+        """Report whether each of many files exists on the repository.
+
+        Args:
+            filenames: Iterable of filenames (no paths).
+
+        Returns:
+            Dict of filename: Bool.
+        """
+        return super(MountedRepository, self).exists_many(filenames)
+
     def __repr__(self):
         """Return a formatted string of connection info."""
         # Do an "update" to get current mount points.
@@ -474,6 +914,8 @@ class AFPDistributionPoint(MountedRepository):
                 Optional connection arguments (Migrated script support):
                     jss: A JSS Object. NOTE: jss_migrated must be True
                         for this to do anything.
+                skip_identical: Bool; if True, don't copy files whose
+                    size and content hash match the repository's copy.
         """
         super(AFPDistributionPoint, self).__init__(**connection_args)
         # Check to see if share is mounted, and update mount point
@@ -501,6 +943,7 @@ class AFPDistributionPoint(MountedRepository):
         if is_osx():
             if self.connection["jss"].verbose:
                 print self.connection["mount_url"]
+            mount_share = _get_mount_share()
             if mount_share:
                 self.connection["mount_point"] = mount_share(
                     self.connection["mount_url"])
@@ -553,6 +996,8 @@ class SMBDistributionPoint(MountedRepository):
                 Optional connection arguments (Migrated script support):
                     jss: A JSS Object. NOTE: jss_migrated must be True
                         for this to do anything.
+                skip_identical: Bool; if True, don't copy files whose
+                    size and content hash match the repository's copy.
         """
         super(SMBDistributionPoint, self).__init__(**connection_args)
         if is_osx():
@@ -586,6 +1031,7 @@ class SMBDistributionPoint(MountedRepository):
         # username=<user>,password=<password>,domain=<domain>,port=445 \
         # //server/share /mnt/<mountpoint>
         if is_osx():
+            mount_share = _get_mount_share()
             if mount_share:
                 mount_url = "smb:%s" % self.connection["mount_url"]
                 if self.connection["jss"].verbose:
@@ -635,7 +1081,21 @@ class DistributionServer(Repository):
         Args:
             connection_args: Dict, with required key:
                 jss: A JSS Object.
+
+                Optional connection arguments:
+                skip_identical: Bool; if True, don't upload packages
+                    whose filename and hash match their Package's.
+                upload_timeout: Timeout for uploads, as for requests
+                    (a float, or a (connect, read) tuple). Defaults to
+                    None (wait indefinitely).
+                upload_retries: Int number of times to restart a failed
+                    upload. Defaults to 2.
+                progress_callback: Function called with a
+                    jss.upload.UploadProgress (bytes sent, percent,
+                    throughput) about every megabyte while uploading.
         """
+        self._filename_index = None
+        self._filename_index_stale = False
         super(DistributionServer, self).__init__(**connection_args)
         self.connection["url"] = self.connection["jss"].base_url
 
@@ -650,14 +1110,15 @@ class DistributionServer(Repository):
     def copy_pkg(self, filename, id_=-1):
         """Copy a package to the distribution server.
 
-        Bundle-style packages must be zipped prior to copying.
+        Bundle-style packages (directories) are zipped as they are
+        uploaded, and named like "Foo.pkg.zip".
 
         Args:
             filename: Full path to file to upload.
             id_: ID of Package object to associate with, or -1 for new
                 packages (default).
         """
-        self._copy(filename, id_=id_, file_type=PKG_FILE_TYPE)
+        return self._copy(filename, id_=id_, file_type=PKG_FILE_TYPE)
 
     def copy_script(self, filename, id_=-1):
         """Copy a script to the distribution server.
@@ -667,27 +1128,66 @@ class DistributionServer(Repository):
             id_: ID of Script object to associate with, or -1 for new
                 Script (default).
         """
-        self._copy(filename, id_=id_, file_type=SCRIPT_FILE_TYPE)
+        return self._copy(filename, id_=id_, file_type=SCRIPT_FILE_TYPE)
 
     def _copy(self, filename, id_=-1, file_type=0):
         """Upload a file to the distribution server.
 
-        Directories/bundle-style packages must be zipped prior to
-        copying.
+        Directories (bundle-style packages) are zipped as they are
+        uploaded, and named like "Foo.pkg.zip", as Casper Admin does.
+
+        The file is streamed from disk, and the upload restarted if it
+        fails with a connection error, timeout, or 5xx response (see
+        the upload_* and progress_callback connection arguments).
+        Uploads creating a new object (id_ -1) are only restarted if
+        they could not connect or got a 503 response, so as not to
+        create duplicates.
+
+        If the "skip_identical" connection argument is True, packages
+        uploaded for an existing Package whose filename and hash match
+        the file are not uploaded again.
+
+        Returns:
+            True if uploaded, False if skipped as identical.
         """
+        if (self.connection.get("skip_identical") and
+                file_type == PKG_FILE_TYPE and self._package_matches(
+                    filename, id_)):
+            return False
+        basefname = os.path.basename(os.path.normpath(filename))
         if os.path.isdir(filename):
-            raise JSSUnsupportedFileType(
-                "Distribution Server type repos do not permit directory "
-                "uploads. You are probably trying to upload a non-flat "
-                "package. Please zip or create a flat package.")
-        basefname = os.path.basename(filename)
-        resource = open(filename, "rb")
+            basefname += ".zip"
         headers = {"DESTINATION": self.destination, "OBJECT_ID": str(id_),
                    "FILE_TYPE": file_type, "FILE_NAME": basefname}
-        response = self.connection["jss"].session.post(
-            url=self.connection["upload_url"], data=resource, headers=headers)
+        response = upload_file(
+            self.connection["jss"].session, self.connection["upload_url"],
+            filename, headers,
+            timeout=self.connection.get("upload_timeout"),
+            retries=self.connection.get("upload_retries", 2),
+            callback=self.connection.get("progress_callback"))
+        # dbfileupload creates or changes the Package or Script on the
+        # JSS, without a save callback, so the index must be rebuilt.
+        self._filename_index_stale = True
         if self.connection["jss"].verbose:
             print response
+        return True
+
+    def _package_matches(self, filename, id_):
+        """Return whether Package id_ already has filename's contents.
+
+        Compares the filename and the hash the JSS records for the
+        Package (hash_type and hash_value; older JSS versions do not
+        record one, in which case this is always False).
+        """
+        if int(id_) < 0:
+            return False
+        package = self.connection["jss"].Package(int(id_))
+        hash_value = package.findtext("hash_value")
+        algorithm = HASH_TYPES.get(package.findtext("hash_type"))
+        if (not hash_value or not algorithm or
+                package.findtext("filename") != os.path.basename(filename)):
+            return False
+        return hash_path(filename, algorithm) == hash_value.lower()
 
     def delete_with_casper_admin_save(self, pkg):
         """Delete a pkg from the distribution server.
@@ -731,6 +1231,27 @@ class DistributionServer(Repository):
         else:
             self.connection["jss"].Script(filename).delete()
 
+    def filename_index(self, refresh=False):
+        """Return a FilenameIndex of the JSS's Packages and Scripts.
+
+        The index is built on first use, with one concurrent crawl of
+        every Package and Script, and then kept current as Packages
+        and Scripts are saved or deleted through this JSS. Uploads
+        through this repository make it crawl again on next use.
+
+        Args:
+            refresh: Bool; if True, crawl again, to pick up changes
+                made elsewhere. Defaults to False.
+        """
+        if self._filename_index is None:
+            self._filename_index = FilenameIndex()
+            self._filename_index.build(self.connection["jss"])
+            self._filename_index.register(self.connection["jss"])
+        elif refresh or self._filename_index_stale:
+            self._filename_index.build(self.connection["jss"])
+        self._filename_index_stale = False
+        return self._filename_index
+
     def exists(self, filename):
         """Check for the existence of a package or script.
 
@@ -745,27 +1266,27 @@ class DistributionServer(Repository):
         a Package object but never upload a package file, and this
         method will still return "True".
 
-        Also, this may be slow, as it needs to retrieve the complete
-        list of packages from the server.
+        The first check retrieves every package and script; later
+        checks use the cached filename_index.
         """
         # Technically, the results of the casper.jxml page list the
         # package files on the server. This is an undocumented
         # interface, however.
-        result = False
-        if is_package(filename):
-            packages = self.connection["jss"].Package().retrieve_all()
-            for package in packages:
-                if package.findtext("filename") == filename:
-                    result = True
-                    break
-        else:
-            scripts = self.connection["jss"].Script().retrieve_all()
-            for script in scripts:
-                if script.findtext("filename") == filename:
-                    result = True
-                    break
+        class_name = "Package" if is_package(filename) else "Script"
+        return bool(self.filename_index().find(class_name, filename))
 
-        return result
+    def exists_many(self, filenames):
+        """Report whether each of many packages or scripts exists.
+
+        Like exists, using the cached filename_index.
+
+        Args:
+            filenames: Iterable of filenames (no paths).
+
+        Returns:
+            Dict of filename: Bool.
+        """
+        return {filename: self.exists(filename) for filename in filenames}
 
     def exists_using_casper(self, filename):
         """Check for the existence of a package file.
@@ -21,13 +21,33 @@ repositories, CDPs, and JDSs.
 
 
 import os
+import plistlib
+import time
 
+from . import jssobjects
+from .bulk import run_bulk
 from .distribution_point import (AFPDistributionPoint, SMBDistributionPoint,
-                                 JDS, CDP, LocalRepository)
-from .exceptions import JSSError
+                                 JDS, CDP, LocalRepository, FileRepository)
+from .exceptions import JSSError, JSSCopyError
+from .orphans import OrphanReport
+from .repository_sync import RepositorySync
 from .tools import (is_osx, is_linux, is_package)
 
 
+# DistributionPoint settings used to auto-configure a file share.
+# These are cached between runs; passwords are not.
+CACHED_SETTINGS = ("name", "ip_address", "connection_type", "share_name",
+                   "workgroup_or_domain", "share_port",
+                   "read_write_username")
+
+# Seconds to use cached DistributionPoint settings for before
+# retrieving them again.
+SETTINGS_TTL = 24 * 60 * 60
+
+# Optional repo_prefs keys passed through to each DP's connection.
+REPO_OPTIONS = ("skip_identical", "upload_timeout", "upload_retries")
+
+
 class DistributionPoints(object):
     """Manage multiple DistributionPoint objects.
 
@@ -53,7 +73,7 @@ class DistributionPoints(object):
     type-specific properties and configuration.
     """
 
-    def __init__(self, jss):
+    def __init__(self, jss, cache_path=None):
         """Config the DP dict from configuration file.
 
         The JSS API endpoint DistributionPoints is used to automatically
@@ -61,85 +81,201 @@ class DistributionPoints(object):
         dictionary should contain only the name of the repo, as found in
         the web interface, and the password for the RW user.
 
+        The settings retrieved for auto-configured shares (not
+        including passwords) are cached in a plist, so later runs do
+        not need to GET them. Cached settings are retrieved again
+        after SETTINGS_TTL seconds, or once a DistributionPoint is
+        saved or deleted through jss. Use refresh to discard them (and
+        reconfigure) at once if a distribution point's configuration
+        changes.
+
         Please see the docstrings for the different DistributionPoint
         subclasses for information regarding required configuration
         information and properties.
 
         Args:
             jss: JSS server object
+            cache_path: String path to the plist to cache
+                auto-configured distribution point settings in.
+                Defaults to None, which uses:
+                    OS X: "~/Library/Caches/com.github.sheagcraig.python-jss/distribution_points.plist"
+                    Linux: "~/.cache/com.github.sheagcraig.python-jss/distribution_points.plist"
 
         Raises:
             JSSError if an unsupported OS is used.
         """
         self.jss = jss
         self._children = []
+        self._dp_info = None
+        if cache_path is None:
+            if is_osx():
+                cache_dir = "~/Library/Caches"
+            else:
+                cache_dir = "~/.cache"
+            cache_path = os.path.join(
+                cache_dir, "com.github.sheagcraig.python-jss",
+                "distribution_points.plist")
+        self.cache_path = os.path.expanduser(cache_path)
+        self._cache = None
+        jss.save_callbacks.append(self._distribution_point_changed)
+        jss.delete_callbacks.append(self._distribution_point_changed)
+        self._configure()
+
+    def _configure(self):
+        """Create a DP for each of the JSS's repo_prefs."""
+        for repo in self.jss.repo_prefs:
+            # Handle AFP/SMB shares, as they can be auto-configured.
+            # Legacy system did not require explicit type key.
+            if not repo.get("type"):
+                # Must be AFP or SMB.
+                # Use JSS.DistributionPoints information to
+                # automatically configure this DP.
+                dpt = self._get_auto_configured_dp(repo)
+            # Handle Explictly declared DP's.
+            elif repo.get("type") in ["AFP", "SMB"]:
+                dpt = self._get_explictly_configured_dp(repo)
+            elif repo.get("type") == "JDS":
+                dpt = JDS(jss=self.jss)
+            elif repo.get("type") == "CDP":
+                dpt = CDP(jss=self.jss)
+            elif repo.get("type") == "Local":
+                mount_point = repo["mount_point"]
+                share_name = repo["share_name"]
+                dpt = LocalRepository(mount_point=mount_point,
+                                      share_name=share_name, jss=self.jss)
+            else:
+                raise ValueError("Distribution Point Type not recognized.")
+
+            if dpt is not None:
+                for option in REPO_OPTIONS:
+                    if option in repo:
+                        dpt.connection[option] = repo[option]
+
+            # Add the DP to the list.
+            self._children.append(dpt)
+
+    @property
+    def dp_info(self):
+        """All of the JSS's DistributionPoint objects.
+
+        Retrieved on first use.
+        """
+        if self._dp_info is None:
+            self._dp_info = self.jss.DistributionPoint().retrieve_all()
+        return self._dp_info
+
+    def refresh(self):
+        """Discard cached settings and reconfigure from repo_prefs.
+
+        Any distribution points added with add_distribution_point are
+        removed.
+        """
+        self._load_cache().pop(self.jss.base_url, None)
+        self._save_cache()
+        self._dp_info = None
+        self._children = []
+        self._configure()
+
+    def _distribution_point_changed(self, obj):
+        """Discard cached settings when a DistributionPoint changes.
+
+        Objects of other types are ignored. Distribution points
+        already configured are left as they are until refresh.
+        """
+        if isinstance(obj, jssobjects.DistributionPoint):
+            self._load_cache().pop(self.jss.base_url, None)
+            self._save_cache()
+            self._dp_info = None
+
+    def _load_cache(self):
+        """Return the settings cache, reading it on first use."""
+        if self._cache is None:
+            try:
+                self._cache = plistlib.readPlist(self.cache_path)
+            except Exception:  # pylint: disable=broad-except
+                # Missing or unreadable; it will be rebuilt.
+                self._cache = {}
+        return self._cache
+
+    def _save_cache(self):
+        """Write the settings cache, ignoring failures."""
+        try:
+            cache_dir = os.path.dirname(self.cache_path)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            plistlib.writePlist(self._load_cache(), self.cache_path)
+        except (IOError, OSError):
+            pass
+
+    def _get_dp_settings(self, name):
+        """Return a dict of the settings for a named DistributionPoint.
+
+        Settings come from the cache if possible, and no older than
+        SETTINGS_TTL. Otherwise, only the named DistributionPoint is
+        retrieved, and the cache updated.
 
-        # If no distribution points are configured, there's nothing to
-        # do here.
-        if self.jss.repo_prefs:
-            self.dp_info = self.jss.DistributionPoint().retrieve_all()
-
-            for repo in self.jss.repo_prefs:
-                # Handle AFP/SMB shares, as they can be auto-configured.
-                # Legacy system did not require explicit type key.
-                if not repo.get("type"):
-                    # Must be AFP or SMB.
-                    # Use JSS.DistributionPoints information to
-                    # automatically configure this DP.
-                    dpt = self._get_auto_configured_dp(repo)
-                # Handle Explictly declared DP's.
-                elif repo.get("type") in ["AFP", "SMB"]:
-                    dpt = self._get_explictly_configured_dp(repo)
-                elif repo.get("type") == "JDS":
-                    dpt = JDS(jss=self.jss)
-                elif repo.get("type") == "CDP":
-                    dpt = CDP(jss=self.jss)
-                elif repo.get("type") == "Local":
-                    mount_point = repo["mount_point"]
-                    share_name = repo["share_name"]
-                    dpt = LocalRepository(mount_point=mount_point,
-                                          share_name=share_name, jss=self.jss)
-                else:
-                    raise ValueError("Distribution Point Type not recognized.")
-
-                # Add the DP to the list.
-                self._children.append(dpt)
+        Returns:
+            Dict, or None if there is no such DistributionPoint.
+        """
+        jss_cache = self._load_cache().setdefault(self.jss.base_url, {})
+        cached = jss_cache.get(name)
+        if (cached is None or
+                time.time() - cached.get("cache_time", 0) > SETTINGS_TTL):
+            jss_cache.pop(name, None)
+            if self._dp_info is not None:
+                dp_objects = self._dp_info
+            else:
+                dp_objects = [item.retrieve() for item in
+                              self.jss.DistributionPoint() if
+                              item.name == name]
+            for dp_object in dp_objects:
+                if dp_object.findtext("name") == name:
+                    jss_cache[name] = {
+                        key: dp_object.findtext(key) for key in
+                        CACHED_SETTINGS if dp_object.findtext(key)
+                        is not None}
+                    jss_cache[name]["cache_time"] = time.time()
+                    self._save_cache()
+                    break
+            else:
+                return None
+        return jss_cache[name]
 
     def _get_auto_configured_dp(self, repo):
         "Return a file share DP from auto-configured data."""
-        for dp_object in self.dp_info:
-            if repo["name"] == dp_object.findtext("name"):
-                url = dp_object.findtext("ip_address")
-                connection_type = dp_object.findtext("connection_type")
-                share_name = dp_object.findtext("share_name")
-                domain = dp_object.findtext("workgroup_or_domain")
-                port = dp_object.findtext("share_port")
-                username = dp_object.findtext("read_write_username")
-                password = repo.get("password")
-                # Make very sure this password is unicode.
-                if isinstance(password, str):
-                    password = unicode(password, "utf-8")
-
-                if is_osx():
-                    mount_point = os.path.join("/Volumes", share_name)
-                elif is_linux():
-                    mount_point = os.path.join("/mnt", share_name)
-                else:
-                    raise JSSError("Unsupported OS.")
-
-                if connection_type == "AFP":
-                    dpt = AFPDistributionPoint(
-                        url=url, port=port, share_name=share_name,
-                        mount_point=mount_point, username=username,
-                        password=password, jss=self.jss)
-                elif connection_type == "SMB":
-                    dpt = SMBDistributionPoint(
-                        url=url, port=port, share_name=share_name,
-                        mount_point=mount_point, domain=domain,
-                        username=username, password=password,
-                        jss=self.jss)
-
-                return dpt
+        settings = self._get_dp_settings(repo["name"])
+        if settings is not None:
+            url = settings.get("ip_address")
+            connection_type = settings.get("connection_type")
+            share_name = settings.get("share_name")
+            domain = settings.get("workgroup_or_domain")
+            port = settings.get("share_port")
+            username = settings.get("read_write_username")
+            password = repo.get("password")
+            # Make very sure this password is unicode.
+            if isinstance(password, str):
+                password = unicode(password, "utf-8")
+
+            if is_osx():
+                mount_point = os.path.join("/Volumes", share_name)
+            elif is_linux():
+                mount_point = os.path.join("/mnt", share_name)
+            else:
+                raise JSSError("Unsupported OS.")
+
+            if connection_type == "AFP":
+                dpt = AFPDistributionPoint(
+                    url=url, port=port, share_name=share_name,
+                    mount_point=mount_point, username=username,
+                    password=password, jss=self.jss)
+            elif connection_type == "SMB":
+                dpt = SMBDistributionPoint(
+                    url=url, port=port, share_name=share_name,
+                    mount_point=mount_point, domain=domain,
+                    username=username, password=password,
+                    jss=self.jss)
+
+            return dpt
 
     def _get_explictly_configured_dp(self, repo):
         "Return a file share DP from auto-configured data."""
@@ -201,6 +337,11 @@ class DistributionPoints(object):
         Determines appropriate location (for file shares) and type based
         on file extension.
 
+        Repositories are copied to concurrently, one thread per
+        repository, each with its own requests.Session. A failure in
+        one does not stop the others; once all have finished,
+        JSSCopyError is raised if any failed.
+
         Args:
             filename: String path to the local file to copy.
             id_: Package or Script object ID to target. For use with JDS
@@ -209,36 +350,63 @@ class DistributionPoints(object):
                 default.
             pre_callback: Func to call before each distribution point
                 starts copying. Should accept a Repository connection
-                dictionary as a parameter. Will be called like:
+                dictionary as a parameter. Will be called (from that
+                distribution point's thread) like:
                     `pre_callback(repo.connection)`
             post_callback: Func to call after each distribution point
                 finishes copying. Should accept a Repository connection
-                dictionary as a parameter. Will be called like:
-                    `pre_callback(repo.connection)`
+                dictionary as a parameter. Will be called (from that
+                distribution point's thread) like:
+                    `post_callback(repo.connection)`
+
+        Returns:
+            List of BulkResult, one per repository, in order. Each
+            has the repository as its item, and as its value what the
+            repository's copy method returned (for file shares and
+            JDS/CDP, whether the file was copied rather than skipped
+            as identical).
+
+        Raises:
+            JSSCopyError if copying to any repository failed. Its
+            results attribute holds the BulkResults, with the
+            exception raised while copying to each (if any) as its
+            error.
         """
-        for repo in self._children:
-            if is_package(filename):
-                copy_method = repo.copy_pkg
-            else:
-                # All other file types can go to scripts.
-                copy_method = repo.copy_script
+        if is_package(filename):
+            method_name = "copy_pkg"
+        else:
+            # All other file types can go to scripts.
+            method_name = "copy_script"
+
+        def copy_to_repo(repo):
+            """Copy filename to one repo, with callbacks."""
             if pre_callback:
                 pre_callback(repo.connection)
-            copy_method(filename, id_)
+            copied = getattr(repo, method_name)(filename, id_)
             if post_callback:
                 post_callback(repo.connection)
+            return copied
+
+        return self._run_on_repos(copy_to_repo)
 
     def copy_pkg(self, filename, id_=-1):
         """Copy a pkg, dmg, or zip to all repositories.
 
+        Repositories are copied to concurrently; see copy.
+
         Args:
             filename: String path to the local file to copy.
             id_: Integer ID you wish to associate package with for a JDS
                 or CDP only. Default is -1, which is used for creating
                 a new package object in the database.
+
+        Returns:
+            List of BulkResult, one per repository, in order.
+
+        Raises:
+            JSSCopyError if copying to any repository failed.
         """
-        for repo in self._children:
-            repo.copy_pkg(filename, id_)
+        return self._run_on_repos(lambda repo: repo.copy_pkg(filename, id_))
 
     def copy_script(self, filename, id_=-1):
         """Copy a script to all repositories.
@@ -246,14 +414,44 @@ class DistributionPoints(object):
         Takes into account whether a JSS has been migrated. See the
         individual DistributionPoint types for more information.
 
+        Repositories are copied to concurrently; see copy.
+
         Args:
             filename: String path to the local file to copy.
             id_: Integer ID you wish to associate script with for a JDS
                 or CDP only. Default is -1, which is used for creating
                 a new script object in the database.
+
+        Returns:
+            List of BulkResult, one per repository, in order.
+
+        Raises:
+            JSSCopyError if copying to any repository failed.
         """
-        for repo in self._children:
-            repo.copy_script(filename, id_)
+        return self._run_on_repos(
+            lambda repo: repo.copy_script(filename, id_))
+
+    def _run_on_repos(self, func):
+        """Call func on every repository at once, one thread each.
+
+        A requests.Session can't be used from several threads at once,
+        so each thread gets its own from the JSS for the duration.
+
+        Returns:
+            List of BulkResult, one per repository, in order.
+
+        Raises:
+            JSSCopyError, once all have finished, if func raised for
+            any repository.
+        """
+        # Copies are not retried; a failed multi-gigabyte copy is
+        # better reported than silently repeated.
+        with self.jss._thread_sessions():  # pylint: disable=protected-access
+            results = run_bulk(func, self._children,
+                               workers=len(self._children), retries=0)
+        if not all(result.ok for result in results):
+            raise JSSCopyError(results)
+        return results
 
     def delete(self, filename):
         """Delete a file from all repositories which support it.
@@ -299,11 +497,85 @@ class DistributionPoints(object):
         Returns:
             Boolean
         """
-        result = True
+        return self.exists_many([filename])[filename]
+
+    def exists_many(self, filenames):
+        """Report whether each of many files exists on all repositories.
+
+        Each repository checks all of filenames at once (e.g. file
+        shares with one directory scan), rather than once per file.
+
+        Args:
+            filenames: Iterable of filenames (no paths).
+
+        Returns:
+            Dict of filename: Bool, True if the file is on every
+            repository.
+        """
+        filenames = list(filenames)
+        results = dict.fromkeys(filenames, True)
         for repo in self._children:
-            if not repo.exists(filename):
-                result = False
-        return result
+            if hasattr(repo, "exists_many"):
+                found = repo.exists_many(filenames)
+            else:
+                found = {filename: repo.exists(filename)
+                         for filename in filenames}
+            for filename in filenames:
+                results[filename] = results[filename] and found[filename]
+        return results
+
+    def sync(self, source, delete=False, checksum=False, workers=4,
+             bandwidth=None, callback=None):
+        """Replicate a repository to all file share repositories.
+
+        See RepositorySync for details.
+
+        Args:
+            source: FileRepository (e.g. a master LocalRepository) to
+                copy from. It need not be one of the distribution
+                points.
+            delete: Bool; whether to delete files which are not on the
+                source. Defaults to False.
+            checksum: Bool; whether to compare files by content hash
+                rather than size and mtime. Defaults to False.
+            workers: Int number of copies or deletes to run at once.
+                Defaults to 4.
+            bandwidth: Float maximum bytes per second to copy, in
+                total, or None (the default) for no limit.
+            callback: Function to call with each action's BulkResult
+                as it completes. Will be called like:
+                    `callback(result, completed_count, total_count)`
+                Defaults to None.
+
+        Returns:
+            List of BulkResult, one per SyncAction carried out.
+        """
+        targets = [child for child in self._children
+                   if isinstance(child, FileRepository)]
+        syncer = RepositorySync(source, targets, delete, checksum)
+        return syncer.run(workers=workers, bandwidth=bandwidth,
+                          callback=callback)
+
+    def orphans(self, workers=8):
+        """Report files and Package/Script objects which don't match.
+
+        See OrphanReport for details. Packages and Scripts are always
+        crawled afresh (rather than using a JDS or CDP's cached
+        filename_index), as objects created since the index was built
+        would otherwise be reported as orphaned files.
+
+        Args:
+            workers: Int number of concurrent GET requests. Defaults
+                to 8.
+
+        Returns:
+            An OrphanReport for all file share distribution points.
+        """
+        report = OrphanReport()
+        report.build(self.jss, [child for child in self._children
+                                if isinstance(child, FileRepository)],
+                     workers=workers)
+        return report
 
     def __repr__(self):
         """Print out information on distribution points."""
@@ -72,3 +72,22 @@ class JSSFileUploadParameterError(JSSError):
 class JSSUnsupportedFileType(JSSError):
     """Unsupported file type exception."""
     pass
+
+
+class JSSCopyError(JSSError):
+    """Copying to one or more distribution points failed.
+
+    Attributes:
+        results: List of BulkResult, one per distribution point, with
+            the error (if any) raised while copying to it.
+    """
+
+    def __init__(self, results):
+        self.results = results
+        failures = [result for result in results if not result.ok]
+        message = "Copying failed for %d of %d distribution points: %s" % (
+            len(failures), len(results), "; ".join(
+                "%s %s: %s" % (type(result.item).__name__,
+                               result.item.connection.get("url"),
+                               result.error) for result in failures))
+        super(JSSCopyError, self).__init__(message)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""filecopy.py
+
+File and directory copying for file share repositories, done by the
+kernel where possible, and with bundle contents copied in parallel.
+"""
+
+
+import errno
+from multiprocessing.pool import ThreadPool
+import os
+import shutil
+
+from .tools import is_linux
+
+
+# Bytes to ask the kernel to copy per call.
+KERNEL_COPY_SIZE = 1024 ** 3
+
+# Buffer size for copies the kernel can't do.
+BUFFER_SIZE = 1024 * 1024
+
+# errnos meaning a kernel copy method can't be used for a pair of
+# files (e.g. copy_file_range across filesystems on older kernels), so
+# the next method should be tried.
+_UNSUPPORTED_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL,
+                       errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOTSOCK}
+
+# List of the kernel copy functions available, each called like
+# func(in_fd, out_fd, count) and returning the bytes copied; None
+# until looked up.
+_KERNEL_COPY_FUNCTIONS = None
+
+
+def _get_kernel_copy_functions():
+    """Return the kernel copy functions available on this platform.
+
+    Python 3 provides os.copy_file_range and os.sendfile. Python 2
+    doesn't, so on Linux they are called from libc with ctypes.
+    Elsewhere (e.g. OS X, where sendfile only writes to sockets) the
+    list is empty.
+    """
+    global _KERNEL_COPY_FUNCTIONS   # pylint: disable=global-statement
+    if _KERNEL_COPY_FUNCTIONS is not None:
+        return _KERNEL_COPY_FUNCTIONS
+    functions = []
+    if is_linux():
+        # pylint: disable=no-member
+        if hasattr(os, "copy_file_range"):
+            functions.append(os.copy_file_range)
+        if hasattr(os, "sendfile"):
+            functions.append(lambda in_fd, out_fd, count: os.sendfile(
+                out_fd, in_fd, None, count))
+        # pylint: enable=no-member
+        if not functions:
+            functions = _get_libc_copy_functions()
+    _KERNEL_COPY_FUNCTIONS = functions
+    return functions
+
+
+def _get_libc_copy_functions():
+    """Return copy_file_range and sendfile wrappers from libc."""
+    import ctypes
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    functions = []
+
+    def check(result):
+        """Raise OSError for a failed libc call."""
+        if result < 0:
+            error_number = ctypes.get_errno()
+            raise OSError(error_number, os.strerror(error_number))
+        return result
+
+    if hasattr(libc, "copy_file_range"):
+        libc_copy_file_range = libc.copy_file_range
+        libc_copy_file_range.restype = ctypes.c_ssize_t
+        libc_copy_file_range.argtypes = (
+            ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p,
+            ctypes.c_size_t, ctypes.c_uint)
+        functions.append(lambda in_fd, out_fd, count: check(
+            libc_copy_file_range(in_fd, None, out_fd, None, count, 0)))
+    if hasattr(libc, "sendfile"):
+        libc_sendfile = libc.sendfile
+        libc_sendfile.restype = ctypes.c_ssize_t
+        libc_sendfile.argtypes = (ctypes.c_int, ctypes.c_int,
+                                  ctypes.c_void_p, ctypes.c_size_t)
+        functions.append(lambda in_fd, out_fd, count: check(
+            libc_sendfile(out_fd, in_fd, None, count)))
+    return functions
+
+
+def _kernel_copy(in_fd, out_fd):
+    """Copy from in_fd to out_fd in the kernel, from their current
+    positions to the end of in_fd.
+
+    Returns:
+        True if done, False if no kernel copy method works for these
+        files. Any bytes already copied have advanced both files'
+        positions, so the rest can be copied another way.
+    """
+    for func in _get_kernel_copy_functions():
+        try:
+            while func(in_fd, out_fd, KERNEL_COPY_SIZE):
+                pass
+            return True
+        except OSError as error:
+            if error.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+    return False
+
+
+def _buffered_copy(in_fd, out_fd, limiter=None):
+    """Copy from in_fd to out_fd through a buffer.
+
+    Args:
+        limiter: bulk.RateLimiter to wait on for each buffer's bytes,
+            or None.
+    """
+    while True:
+        data = os.read(in_fd, BUFFER_SIZE)
+        if not data:
+            return
+        if limiter:
+            limiter.wait(len(data))
+        while data:
+            data = data[os.write(out_fd, data):]
+
+
+def copy_file(source, destination, limiter=None):
+    """Copy a file's contents, like shutil.copyfile.
+
+    On Linux the data is copied by the kernel with copy_file_range
+    (which lets NFS and CIFS copy server-side, within a share) or
+    sendfile, so it never passes through python. Otherwise, or if the
+    kernel can't copy between these files, or the copy is rate
+    limited, a large buffer is used.
+
+    Args:
+        source: String path to the file to copy.
+        destination: String path to (over)write.
+        limiter: bulk.RateLimiter, with a rate in bytes per second, to
+            cap the bandwidth used (shared by all the copies using it).
+            Defaults to None (no limit).
+    """
+    if (os.path.exists(destination) and
+            os.path.samefile(source, destination)):
+        raise shutil.Error("`%s` and `%s` are the same file" %
+                           (source, destination))
+    binary = getattr(os, "O_BINARY", 0)
+    in_fd = os.open(source, os.O_RDONLY | binary)
+    try:
+        out_fd = os.open(destination,
+                         os.O_WRONLY | os.O_CREAT | os.O_TRUNC | binary,
+                         0o666)
+        try:
+            if limiter or not _kernel_copy(in_fd, out_fd):
+                _buffered_copy(in_fd, out_fd, limiter)
+        finally:
+            os.close(out_fd)
+    finally:
+        os.close(in_fd)
+
+
+def _copy_file_and_stat(source, destination, limiter=None):
+    """Copy a file and its permissions and times, like shutil.copy2.
+
+    Returns:
+        None, or a (source, destination, error string) tuple.
+    """
+    try:
+        copy_file(source, destination, limiter)
+        shutil.copystat(source, destination)
+    except (IOError, OSError, shutil.Error) as error:
+        return (source, destination, str(error))
+
+
+def copy_tree(source, destination, workers=8, limiter=None):
+    """Copy a directory tree, like shutil.copytree.
+
+    Directories (and symlinks) are created first, and then the files
+    are copied concurrently, which is much faster for bundle packages
+    containing thousands of small files, especially to network shares.
+
+    Symlinks (e.g. a framework's Versions/Current) are copied as
+    symlinks, like shutil.copytree(symlinks=True), so that copies
+    compare equal with tools.path_signature and hash_path.
+
+    Args:
+        source: String path to the directory to copy.
+        destination: String path to create. Must not exist.
+        workers: Int number of files to copy at once. Defaults to 8.
+        limiter: bulk.RateLimiter to cap bandwidth, as for copy_file.
+            Defaults to None (no limit).
+
+    Raises:
+        shutil.Error with a list of (source, destination, error)
+        tuples if any files could not be copied.
+    """
+    directories = []
+    files = []
+    errors = []
+    for dirpath, dirnames, filenames in os.walk(source):
+        target = os.path.normpath(
+            os.path.join(destination, os.path.relpath(dirpath, source)))
+        os.makedirs(target)
+        directories.append((dirpath, target))
+        # Symlinks to directories are listed with the directories (and
+        # not walked into).
+        for name in dirnames + filenames:
+            paths = (os.path.join(dirpath, name), os.path.join(target, name))
+            if os.path.islink(paths[0]):
+                try:
+                    os.symlink(os.readlink(paths[0]), paths[1])
+                except OSError as error:
+                    errors.append(paths + (str(error),))
+            elif name in filenames:
+                files.append(paths)
+
+    copy = lambda paths: _copy_file_and_stat(paths[0], paths[1], limiter)
+    if workers > 1 and len(files) > 1:
+        pool = ThreadPool(min(workers, len(files)))
+        try:
+            results = pool.map(copy, files)
+        finally:
+            pool.terminate()
+    else:
+        results = [copy(paths) for paths in files]
+    errors.extend(result for result in results if result)
+
+    # Copying files changes their directory's mtime, so do directories
+    # last, deepest first.
+    for dirpath, target in reversed(directories):
+        try:
+            shutil.copystat(dirpath, target)
+        except OSError as error:
+            errors.append((dirpath, target, str(error)))
+    if errors:
+        raise shutil.Error(errors)
+
+
+def remove_path(path):
+    """Delete a file, symlink, or directory tree, if it exists."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def replace_path(source, destination):
+    """Rename source to destination, replacing whatever is there.
+
+    A file or symlink is replaced atomically by the rename. A directory
+    can't be renamed over (or onto a file), so the existing destination
+    is renamed aside, and only removed once source is in its place; if
+    that fails, it is put back. Either way, a failure leaves the
+    previous destination intact.
+
+    Args:
+        source: String path to rename. Should be in the same folder as
+            destination (e.g. a temporary copy beside it).
+        destination: String path to replace.
+    """
+    if os.path.lexists(destination) and any(
+            os.path.isdir(path) and not os.path.islink(path)
+            for path in (source, destination)):
+        aside = "%s.old" % source
+        os.rename(destination, aside)
+        try:
+            os.rename(source, destination)
+        except OSError:
+            os.rename(aside, destination)
+            raise
+        remove_path(aside)
+    else:
+        os.rename(source, destination)
@@ -0,0 +1,535 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""inventory.py
+
+Classes for exporting and summarizing Computer and MobileDevice
+inventory across an entire JSS.
+"""
+
+
+from array import array
+import os
+
+from . import jssobjects
+from .jssobjectlist import _Interner, _retrieve_objects
+
+
+# Nested sections are exported as parallel list columns per device.
+# Values are (subset name, path to the repeated Element, child tags to
+# keep).
+NESTED_SECTIONS = {
+    jssobjects.Computer: {
+        "extension_attributes": (
+            "extension_attributes",
+            "extension_attributes/extension_attribute",
+            ("id", "name", "value")),
+        "applications": (
+            "software", "software/applications/application",
+            ("name", "version", "path"))},
+    jssobjects.MobileDevice: {
+        "extension_attributes": (
+            "extension_attributes",
+            "extension_attributes/extension_attribute",
+            ("id", "name", "value")),
+        "applications": (
+            "applications", "applications/application",
+            ("application_name", "application_version", "identifier"))}}
+
+
+def _import_pyarrow():
+    """Return the pyarrow module, with its parquet submodule loaded.
+
+    Raises:
+        ImportError if pyarrow is not available.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet  # pylint: disable=unused-variable
+    except ImportError:
+        raise ImportError("pyarrow is required to export inventory. Please "
+                          "install it (e.g. 'pip install pyarrow').")
+    return pyarrow
+
+
+class InventoryExporter(object):
+    """Export Computer or MobileDevice inventory as Arrow columns.
+
+    Full objects are retrieved one at a time (using a subset of only
+    the chosen sections), flattened into rows, and converted to
+    pyarrow RecordBatches of batch_size rows. Only a single batch is
+    ever held in memory, so this can be used to write the inventory of
+    a very large fleet to Parquet.
+
+    Flat sections (e.g. "general", "hardware", "location") become one
+    string column per child tag, named "<section>_<tag>". The
+    "extension_attributes" and "applications" sections become one list
+    column per child tag, also named "<section>_<tag>"; the lists for a
+    device are parallel (e.g. applications_name[i] has version
+    applications_version[i]). Parallel lists are used rather than a
+    list of structs, as older pyarrow releases cannot write the latter
+    to Parquet.
+
+    The schema is fixed by the first batch; tags that first appear in
+    later batches are dropped, and missing tags are null. All values
+    other than "id" are exported as strings, since the JSS does not
+    type its inventory.
+
+    Requires pyarrow.
+
+    Attributes:
+        obj_class: jss.Computer or jss.MobileDevice.
+        sections: List of section names to export.
+        batch_size: Int number of rows per RecordBatch.
+    """
+
+    def __init__(self, obj_class=jssobjects.Computer, sections=None,
+                 batch_size=500):
+        """Configure an InventoryExporter.
+
+        Args:
+            obj_class: jss.Computer or jss.MobileDevice. Defaults to
+                Computer.
+            sections: List of section names to export. Defaults to
+                general, hardware, extension_attributes and
+                applications.
+            batch_size: Int number of rows per RecordBatch. Defaults to
+                500.
+
+        Raises:
+            TypeError if obj_class is not supported.
+        """
+        if obj_class not in NESTED_SECTIONS:
+            raise TypeError("Only Computer and MobileDevice inventory can be "
+                            "exported.")
+        self.obj_class = obj_class
+        self.sections = sections or ["general", "hardware",
+                                     "extension_attributes", "applications"]
+        self.batch_size = batch_size
+        self._schema = None
+
+    @property
+    def subset(self):
+        """List of subset names to request for the chosen sections."""
+        nested = NESTED_SECTIONS[self.obj_class]
+        return [nested[section][0] if section in nested else section for
+                section in self.sections]
+
+    def flatten(self, obj):
+        """Return a dict row of the chosen sections of obj.
+
+        Args:
+            obj: A full Computer or MobileDevice.
+        """
+        nested = NESTED_SECTIONS[self.obj_class]
+        row = {"id": int(obj.id)}
+        for section in self.sections:
+            if section in nested:
+                _, path, tags = nested[section]
+                elements = obj.findall(path)
+                for tag in tags:
+                    row["%s_%s" % (section, tag)] = [
+                        element.findtext(tag) for element in elements]
+            else:
+                element = obj.find(section)
+                if element is None:
+                    continue
+                for child in element:
+                    # Only leaf values are flattened; lists like
+                    # hardware/storage are left for a nested section.
+                    if len(child) == 0:
+                        row["%s_%s" % (section, child.tag)] = child.text
+        return row
+
+    def _build_schema(self, rows):
+        """Determine the Arrow schema from the first batch of rows."""
+        pyarrow = _import_pyarrow()
+
+        nested = NESTED_SECTIONS[self.obj_class]
+        fields = [pyarrow.field("id", pyarrow.int64())]
+        flat_columns = set()
+        for row in rows:
+            flat_columns.update(row)
+        for section in self.sections:
+            if section in nested:
+                fields.extend(
+                    pyarrow.field("%s_%s" % (section, tag),
+                                  pyarrow.list_(pyarrow.string())) for tag in
+                    nested[section][2])
+            else:
+                prefix = "%s_" % section
+                fields.extend(
+                    pyarrow.field(column, pyarrow.string()) for column in
+                    sorted(flat_columns) if column.startswith(prefix))
+        return pyarrow.schema(fields)
+
+    def _to_record_batch(self, rows):
+        """Convert a list of row dicts to a RecordBatch."""
+        pyarrow = _import_pyarrow()
+
+        if self._schema is None:
+            self._schema = self._build_schema(rows)
+        arrays = [
+            pyarrow.array([row.get(field.name) for row in rows],
+                          type=field.type) for field in self._schema]
+        return pyarrow.RecordBatch.from_arrays(arrays,
+                                               self._schema.names)
+
+    def iter_record_batches(self, objects):
+        """Yield RecordBatches of batch_size flattened objects.
+
+        Args:
+            objects: Iterable of full Computer or MobileDevice objects,
+                for example the results of
+                JSSObjectList.iter_retrieve_all.
+        """
+        rows = []
+        for obj in objects:
+            rows.append(self.flatten(obj))
+            if len(rows) >= self.batch_size:
+                yield self._to_record_batch(rows)
+                rows = []
+        if rows:
+            yield self._to_record_batch(rows)
+
+    def write_parquet(self, obj_list, path, workers=1):
+        """Retrieve every object in obj_list and write it to Parquet.
+
+        Args:
+            obj_list: A JSSObjectList or ColumnarJSSObjectList listing
+                of obj_class (e.g. jss_connection.Computer()).
+            path: String file path to the file you wish to (over)write.
+                Path will have ~ expanded prior to opening.
+            workers: Int number of concurrent GET requests. Defaults
+                to 1.
+
+        Returns:
+            Int number of rows written.
+        """
+        pyarrow = _import_pyarrow()
+        batches = self.iter_record_batches(
+            obj_list.iter_retrieve_all(self.subset, workers))
+        count = 0
+        writer = None
+        try:
+            for batch in batches:
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(
+                        os.path.expanduser(path), batch.schema)
+                writer.write_table(
+                    pyarrow.Table.from_batches([batch]))
+                count += batch.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        return count
+
+
+class ExtensionAttributePivot(object):
+    """Extension attribute values for every device, by device and name.
+
+    The pivot is stored column-wise: device IDs are kept in an
+    array("l") of rows, and each extension attribute name has a column
+    holding one value per row. Values are interned, since most
+    extension attributes have only a handful of distinct values across
+    a fleet (those that don't, like a last user, are left alone).
+
+    Devices are fetched with the "extension_attributes" subset, which
+    is far smaller than a full object, using a pool of concurrent
+    workers. Refreshing again later only re-fetches devices that are
+    new or whose inventory report date has changed (when the listing
+    includes a report_date_epoch, e.g. the Computer "basic" subset),
+    and drops devices that are no longer listed.
+
+    Attributes:
+        obj_class: jss.Computer or jss.MobileDevice.
+        ids: array("l") of device IDs, one per row.
+        names: List of extension attribute names, one per column.
+    """
+
+    subset = "extension_attributes"
+
+    def __init__(self, obj_class=jssobjects.Computer):
+        """Create an empty ExtensionAttributePivot.
+
+        Args:
+            obj_class: jss.Computer or jss.MobileDevice. Defaults to
+                Computer.
+        """
+        self.obj_class = obj_class
+        self.ids = array("l")
+        self.names = []
+        self._rows = {}
+        self._columns = []
+        self._column_index = {}
+        self._report_dates = {}
+        self._interner = _Interner()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, device_id):
+        return int(device_id) in self._rows
+
+    def _get_column(self, name):
+        """Return the column for name, adding it if needed."""
+        index = self._column_index.get(name)
+        if index is None:
+            index = self._column_index[name] = len(self.names)
+            self.names.append(name)
+            self._columns.append(len(self.ids) * [None])
+        return self._columns[index]
+
+    def _get_row(self, device_id):
+        """Return the row index for device_id, adding it if needed."""
+        row = self._rows.get(device_id)
+        if row is None:
+            row = self._rows[device_id] = len(self.ids)
+            self.ids.append(device_id)
+            for column in self._columns:
+                column.append(None)
+        return row
+
+    def remove(self, device_id):
+        """Remove a device from the pivot.
+
+        Args:
+            device_id: Int ID of the device.
+        """
+        device_id = int(device_id)
+        row = self._rows.pop(device_id, None)
+        if row is None:
+            return
+        self._report_dates.pop(device_id, None)
+        # Move the last row into the vacated row to keep columns dense.
+        last = len(self.ids) - 1
+        if row != last:
+            last_id = self.ids[last]
+            self.ids[row] = last_id
+            self._rows[last_id] = row
+            for column in self._columns:
+                column[row] = column[last]
+        self.ids.pop()
+        for column in self._columns:
+            column.pop()
+
+    def add(self, obj):
+        """Add or replace the extension attribute values of a device.
+
+        Args:
+            obj: Full (or "extension_attributes" subset) Computer or
+                MobileDevice.
+        """
+        row = self._get_row(int(obj.id))
+        for column in self._columns:
+            column[row] = None
+        for attribute in obj.findall(
+                "extension_attributes/extension_attribute"):
+            name = attribute.findtext("name")
+            column = self._get_column(name)
+            column[row] = self._interner.intern(name, attribute.findtext(
+                "value"))
+
+    def refresh(self, obj_list, workers=8):
+        """Update the pivot from a listing of devices.
+
+        Only devices that are new, or whose report_date_epoch in the
+        listing differs from the last refresh, are retrieved. Devices
+        missing from the listing are removed.
+
+        Args:
+            obj_list: A JSSObjectList or ColumnarJSSObjectList listing
+                of obj_class. For the cheapest refreshes of Computers,
+                use the "basic" subset, which includes each computer's
+                report date.
+            workers: Int number of concurrent GET requests. Defaults
+                to 8.
+
+        Returns:
+            Int number of devices retrieved.
+        """
+        listed = {}
+        for item in obj_list:
+            listed[item.id] = item.get("report_date_epoch")
+
+        for device_id in set(self._rows).difference(listed):
+            self.remove(device_id)
+
+        stale = [device_id for device_id, report_date in listed.items() if
+                 device_id not in self._rows or report_date is None or
+                 self._report_dates.get(device_id) != report_date]
+        for obj in _retrieve_objects(obj_list.factory, self.obj_class, stale,
+                                     self.subset, workers):
+            self.add(obj)
+            self._report_dates[int(obj.id)] = listed.get(int(obj.id))
+
+        return len(stale)
+
+    def get(self, device_id, name, default=None):
+        """Return a device's value for an extension attribute.
+
+        Args:
+            device_id: Int ID of the device.
+            name: String extension attribute name.
+            default: Value to return if the device or attribute is not
+                in the pivot (or has no value).
+        """
+        row = self._rows.get(int(device_id))
+        index = self._column_index.get(name)
+        if row is None or index is None:
+            return default
+        value = self._columns[index][row]
+        return default if value is None else value
+
+    def column(self, name):
+        """Return a dict of device ID: value for an attribute name."""
+        values = self._columns[self._column_index[name]]
+        return {device_id: value for device_id, value in
+                zip(self.ids, values) if value is not None}
+
+    def row(self, device_id):
+        """Return a dict of attribute name: value for a device."""
+        row = self._rows[int(device_id)]
+        return {name: column[row] for name, column in
+                zip(self.names, self._columns) if column[row] is not None}
+
+    def to_dataframe(self):
+        """Return the pivot as a pandas DataFrame indexed by device ID.
+
+        Requires pandas.
+        """
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError("pandas is required to build a DataFrame. "
+                              "Please install it (e.g. 'pip install "
+                              "pandas').")
+        return pandas.DataFrame(
+            dict(zip(self.names, self._columns)), columns=self.names,
+            index=pandas.Index(list(self.ids), name="id"))
+
+
+class ApplicationInventory(object):
+    """Index of installed application versions across devices.
+
+    Devices are retrieved concurrently with only the subset holding
+    their applications ("software" for Computers, "applications" for
+    MobileDevices). Each device's applications are folded into a
+    name: version: device IDs index as it arrives, and the device's
+    Element is then discarded, so only a single pass over the fleet is
+    needed and memory use is proportional to the index, not the
+    inventory.
+
+    Attributes:
+        obj_class: jss.Computer or jss.MobileDevice.
+        index: Dict of application name: {version: array("l") of
+            device IDs}.
+    """
+
+    def __init__(self, obj_class=jssobjects.Computer):
+        """Create an empty ApplicationInventory.
+
+        Args:
+            obj_class: jss.Computer or jss.MobileDevice. Defaults to
+                Computer.
+
+        Raises:
+            TypeError if obj_class is not supported.
+        """
+        if obj_class not in NESTED_SECTIONS:
+            raise TypeError("Only Computer and MobileDevice applications can "
+                            "be indexed.")
+        self.obj_class = obj_class
+        self.index = {}
+        self.subset, self._path, tags = (
+            NESTED_SECTIONS[obj_class]["applications"])
+        self._name_tag, self._version_tag = tags[:2]
+
+    def add(self, obj):
+        """Add a device's applications to the index.
+
+        The device's application Elements are removed once indexed.
+
+        Args:
+            obj: Computer or MobileDevice, retrieved with at least the
+                applications subset.
+        """
+        device_id = int(obj.id)
+        for application in obj.findall(self._path):
+            versions = self.index.setdefault(
+                application.findtext(self._name_tag), {})
+            devices = versions.setdefault(
+                application.findtext(self._version_tag), array("l"))
+            # A device may report the same version at several paths.
+            if not devices or devices[-1] != device_id:
+                devices.append(device_id)
+        container = obj.find(self._path.rsplit("/", 1)[0])
+        if container is not None:
+            container.clear()
+
+    def collect(self, obj_list, workers=8):
+        """Retrieve and index the applications of every listed device.
+
+        Args:
+            obj_list: A JSSObjectList or ColumnarJSSObjectList listing
+                of obj_class.
+            workers: Int number of concurrent GET requests. Defaults
+                to 8.
+
+        Returns:
+            Int number of devices indexed.
+        """
+        count = 0
+        for obj in obj_list.iter_retrieve_all(self.subset, workers):
+            self.add(obj)
+            count += 1
+        return count
+
+    def names(self):
+        """Return a sorted list of all application names."""
+        return sorted(self.index)
+
+    def versions(self, name):
+        """Return a dict of version: device count for an application.
+
+        Args:
+            name: String application name (e.g. "Safari.app").
+        """
+        return {version: len(devices) for version, devices in
+                self.index.get(name, {}).items()}
+
+    def count(self, name, version=None):
+        """Return the number of devices with an application installed.
+
+        Args:
+            name: String application name (e.g. "Safari.app").
+            version: String version to count. Defaults to all versions.
+        """
+        return len(self.devices(name, version))
+
+    def devices(self, name, version=None):
+        """Return a sorted list of IDs of devices with an application.
+
+        Args:
+            name: String application name (e.g. "Safari.app").
+            version: String version to match. Defaults to all versions.
+        """
+        versions = self.index.get(name, {})
+        if version is not None:
+            return sorted(versions.get(version, []))
+        result = set()
+        for devices in versions.values():
+            result.update(devices)
+        return sorted(result)
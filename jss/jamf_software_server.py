@@ -20,24 +20,48 @@ as JSSObjects.
 """
 
 
+import contextlib
 import cPickle
 import os
 import re
+import threading
 from urllib import quote
+import weakref
 from xml.etree import ElementTree
 
 import requests
 
-from . import distribution_points
+from . import bulk
 from .exceptions import (JSSGetError, JSSPutError, JSSPostError,
                          JSSDeleteError, JSSMethodNotAllowedError)
 from .jssobject import JSSFlatObject
 from . import jssobjects
-from .jssobjectlist import (JSSObjectList, JSSListData)
+from .jssobjectlist import (JSSObjectList, JSSListData,
+                            ColumnarJSSObjectList)
 from .tlsadapter import TLSAdapter
 from .tools import error_handler
 
 
+class _ThreadSession(object):
+    """Holds a thread's requests.Session in a threading.local.
+
+    Thread-local values are released when their thread ends (e.g. as
+    each bulk operation's ThreadPool finishes), so the Session's own
+    connection pools are closed then, rather than kept open for the
+    life of the JSS. The TLS adapter shared with the main Session is
+    left open.
+    """
+
+    def __init__(self, session, shared_adapter):
+        self.session = session
+        self._shared_adapter = shared_adapter
+
+    def __del__(self):
+        for adapter in self.session.adapters.values():
+            if adapter is not self._shared_adapter:
+                adapter.close()
+
+
 # Pylint wants us to store our many attributes in a dictionary.
 # However, to maintain backwards compatibility with the interface,
 # we can't do that.
@@ -58,13 +82,24 @@ class JSS(object):
         ssl_verify: Boolean whether to verify SSL traffic from the JSS
             is genuine.
         factory: JSSObjectFactory object for building JSSObjects.
-        distribution_points: DistributionPoints
+        distribution_points: DistributionPoints, created on first
+            access.
+        thread_safe: Boolean whether each thread gets its own
+            requests.Session (see the session property). The bulk
+            methods always give their worker threads their own.
+        save_callbacks: List of funcs to call after a JSSObject is
+            successfully saved. Will be called like:
+                `callback(saved_object)`
+        delete_callbacks: List of funcs to call after a JSSObject is
+            successfully deleted. Will be called like:
+                `callback(deleted_object)`
     """
 
     # pylint: disable=too-many-arguments
     def __init__(self, jss_prefs=None, url=None, user=None, password=None,
                  repo_prefs=None, ssl_verify=True, verbose=False,
-                 jss_migrated=False, suppress_warnings=False):
+                 jss_migrated=False, suppress_warnings=False,
+                 thread_safe=False):
         """Setup a JSS for making API requests.
 
         Provide either a JSSPrefs object OR specify url, user, and
@@ -106,6 +141,11 @@ class JSS(object):
             suppress_warnings: Turns off the urllib3 warnings. Remember,
                 these warnings are there for a reason! Use at your own
                 risk.
+            thread_safe: Boolean whether to give each thread its own
+                requests.Session. Use this if you will make requests
+                from more than one thread. Defaults to False. (The
+                bulk methods, and retrieve_all with workers, do this
+                for their own threads regardless.)
         """
         if jss_prefs is not None:
             url = jss_prefs.url
@@ -125,23 +165,33 @@ class JSS(object):
         self.repo_prefs = repo_prefs if repo_prefs else []
         self.verbose = verbose
         self.jss_migrated = jss_migrated
-        self.session = requests.Session()
-        self.session.auth = (self.user, self.password)
+        self.thread_safe = thread_safe
+        self._forced_thread_sessions = 0
+        self._owner = threading.current_thread()
+        self._local = threading.local()
+        self._sessions = weakref.WeakSet()
+        self._sessions_lock = threading.Lock()
+        self._session = requests.Session()
+        self._session.auth = (self.user, self.password)
         self.ssl_verify = ssl_verify
 
         # For some objects the JSS tries to return JSON, so we explictly
         # request XML.
 
         headers = {"content-type": "text/xml", "Accept": "application/xml"}
-        self.session.headers.update(headers)
+        self._session.headers.update(headers)
 
         # Add a TransportAdapter to force TLS, since JSS no longer
-        # accepts SSLv23, which is the default.
+        # accepts SSLv23, which is the default. Thread sessions share
+        # it, and with it, its connection pool.
 
-        self.session.mount(self.base_url, TLSAdapter())
+        self._adapter = TLSAdapter()
+        self._session.mount(self.base_url, self._adapter)
 
         self.factory = JSSObjectFactory(self)
-        self.distribution_points = distribution_points.DistributionPoints(self)
+        self.save_callbacks = []
+        self.delete_callbacks = []
+        self._distribution_points = None
 
     # pylint: disable=too-many-arguments
 
@@ -161,10 +211,109 @@ class JSS(object):
         # Remove the frequently included yet incorrect trailing slash.
         self._base_url = url.rstrip("/")
 
+    @property
+    def distribution_points(self):
+        """DistributionPoints for the configured repo_prefs.
+
+        Created on first use, so that the JSS need not be queried for
+        distribution point settings unless they are needed.
+        """
+        if self._distribution_points is None:
+            # distribution_points is only imported when needed, as its
+            # dependencies are slow to import.
+            from .distribution_points import DistributionPoints
+            self._distribution_points = DistributionPoints(self)
+        return self._distribution_points
+
+    @distribution_points.setter
+    def distribution_points(self, value):
+        """Replace the DistributionPoints."""
+        self._distribution_points = value
+
+    def __getstate__(self):
+        """Return state for pickling, without thread Sessions, locks,
+        or callbacks.
+        """
+        state = self.__dict__.copy()
+        for key in ("_owner", "_local", "_sessions", "_sessions_lock",
+                    "save_callbacks", "delete_callbacks"):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        """Restore pickled state, recreating what was left out."""
+        self.__dict__.update(state)
+        self._owner = threading.current_thread()
+        self._local = threading.local()
+        self._sessions = weakref.WeakSet()
+        self._sessions_lock = threading.Lock()
+        self._forced_thread_sessions = 0
+        self.save_callbacks = []
+        self.delete_callbacks = []
+
+    @property
+    def session(self):
+        """The requests.Session to make requests with.
+
+        If thread_safe is False, this is the same Session for every
+        thread, except while a bulk method is running (see
+        _thread_sessions).
+
+        Otherwise, the thread which created the JSS gets that Session,
+        and each other thread gets a Session of its own the first time
+        it asks. Thread Sessions copy the auth, headers, and SSL
+        verification of the main one at that time, and share its TLS
+        adapter. Use ssl_verify to change verification for all of them.
+        Thread Sessions are closed when their thread ends.
+        """
+        if (not (self.thread_safe or self._forced_thread_sessions) or
+                threading.current_thread() is self._owner):
+            return self._session
+        holder = getattr(self._local, "session", None)
+        if holder is None:
+            session = requests.Session()
+            session.auth = self._session.auth
+            session.verify = self._session.verify
+            session.headers = self._session.headers.copy()
+            session.mount(self.base_url, self._adapter)
+            holder = self._local.session = _ThreadSession(session,
+                                                          self._adapter)
+            with self._sessions_lock:
+                self._sessions.add(session)
+        return holder.session
+
+    @contextlib.contextmanager
+    def _thread_sessions(self):
+        """Give each thread its own Session within this context, as
+        if thread_safe were True.
+
+        requests.Session is not thread safe, so methods which make
+        requests from a pool of threads use this.
+        """
+        with self._sessions_lock:
+            self._forced_thread_sessions += 1
+        try:
+            yield
+        finally:
+            with self._sessions_lock:
+                self._forced_thread_sessions -= 1
+
+    @session.setter
+    def session(self, session):
+        """Replace the main requests.Session.
+
+        Any thread Sessions are discarded, to be recreated from the
+        new one.
+        """
+        self._session = session
+        with self._sessions_lock:
+            self._local = threading.local()
+            self._sessions = weakref.WeakSet()
+
     @property
     def ssl_verify(self):
         """Boolean value for whether to verify SSL traffic is valid."""
-        return self.session.verify
+        return self._session.verify
 
     @ssl_verify.setter
     def ssl_verify(self, value):
@@ -173,7 +322,10 @@ class JSS(object):
         Args:
             value: Boolean.
         """
-        self.session.verify = value
+        self._session.verify = value
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.verify = value
 
     def get(self, url_path):
         """GET a url, handle errors, and return an etree.
@@ -244,6 +396,15 @@ class JSS(object):
             object on the JSS. The data is what has been returned after
             it has been parsed by the JSS and added to the database.
 
+        Raises:
+            JSSPostError if provided url_path has a >= 400 response.
+        """
+        id_ = self._post(url_path, data)
+        return self.factory.get_object(obj_class, id_)
+
+    def _post(self, url_path, data):
+        """POST data to the JSS and return the new object's int ID.
+
         Raises:
             JSSPostError if provided url_path has a >= 400 response.
         """
@@ -261,9 +422,163 @@ class JSS(object):
         # Get the ID of the new object. JSS returns xml encoded in utf-8
 
         jss_results = response.text.encode("utf-8")
-        id_ = int(re.search(r"<id>([0-9]+)</id>", jss_results).group(1))
+        return int(re.search(r"<id>([0-9]+)</id>", jss_results).group(1))
 
-        return self.factory.get_object(obj_class, id_)
+    def bulk_create(self, obj_class, items, workers=8, retries=2,
+                    rate_limit=None, callback=None):
+        """Create many new objects concurrently.
+
+        Each object is POSTed once. Unlike JSSObject.save, the new
+        object is not then retrieved from the JSS, so objects passed in
+        are left as they are, except for gaining an "id" element.
+
+        To avoid creating duplicates, a POST is only retried if it
+        could not connect, or got a 503 response (see
+        bulk.is_create_retryable); not after a timeout or other error
+        the JSS may have acted on.
+
+        Args:
+            obj_class: JSSObject subclass to create, e.g.
+                jss.Building.
+            items: Iterable of new obj_class objects, or of dicts of
+                keyword arguments for creating them, including "name"
+                (e.g. rows from a csv.DictReader).
+            workers: Int maximum number of concurrent requests.
+                Defaults to 8.
+            retries: Int number of times to retry an object after a
+                failure to connect or a 503 response. Defaults to 2.
+            rate_limit: Float maximum number of requests per second.
+                Defaults to None (no limit).
+            callback: Function to call as each item completes. Will be
+                called like:
+                    `callback(bulk_result, completed_count, total_count)`
+                Defaults to None.
+
+        Returns:
+            Tuple of (dict of item index: new int ID, dict of item
+            index: exception) for the items that succeeded and failed.
+        """
+        def create(item):
+            """POST one item and return its new ID."""
+            if isinstance(item, dict):
+                kwargs = dict(item)
+                obj = obj_class(self, kwargs.pop("name"), **kwargs)
+            else:
+                obj = item
+            id_ = self._post(obj.get_post_url(), obj)
+            if obj is item and obj.id is None:
+                if "/" in obj._name_path:    # pylint: disable=protected-access
+                    parent = obj.find(obj._name_path.rsplit("/", 1)[0])    # pylint: disable=protected-access
+                else:
+                    parent = obj
+                id_element = ElementTree.Element("id")
+                id_element.text = str(id_)
+                parent.insert(0, id_element)
+            return id_
+
+        with self._thread_sessions():
+            results = bulk.run_bulk(
+                create, items, workers, retries, rate_limit,
+                callback=callback,
+                retryable=lambda error, _: bulk.is_create_retryable(error))
+        ids = {result.index: result.value for result in results if result.ok}
+        errors = {result.index: result.error for result in results if
+                  not result.ok}
+        return ids, errors
+
+    def bulk_save(self, objects, workers=8, retries=2, rate_limit=None,
+                  callback=None):
+        """Save many objects concurrently.
+
+        Each object is saved as with JSSObject.save, and its data
+        replaced with the JSS's. Failures do not stop the other saves;
+        they are reported in the results. Objects without an ID are
+        created (POSTed), and retried only as for bulk_create.
+
+        Args:
+            objects: Iterable of JSSObjects to save.
+            workers: Int maximum number of concurrent requests.
+                Defaults to 8.
+            retries: Int number of times to retry an object after a
+                connection error or a 5xx response. Defaults to 2.
+            rate_limit: Float maximum number of saves per second.
+                Defaults to None (no limit).
+            callback: Function to call as each object completes. Will
+                be called like:
+                    `callback(bulk_result, completed_count, total_count)`
+                Defaults to None.
+
+        Returns:
+            List of BulkResult, in the same order as objects. Each has
+            the object as its item, and an error if it failed.
+        """
+        # pylint: disable=protected-access
+        # id(obj): what _write_request returned, for each object whose
+        # PUT or POST has succeeded. Retries then only repeat the GET,
+        # so a failure to read a new object back never POSTs it again.
+        written = {}
+
+        def save(obj):
+            """PUT or POST one object, then GET its updated data."""
+            if id(obj) not in written:
+                written[id(obj)] = obj._write_request()
+            return obj._read_saved(written[id(obj)])
+
+        def retryable(error, obj):
+            """Retry creates only if the POST could not have worked."""
+            if obj.id or id(obj) in written:
+                return bulk.is_retryable(error)
+            return bulk.is_create_retryable(error)
+
+        # Only the requests run concurrently; objects are updated, and
+        # save_callbacks run, in this thread.
+        with self._thread_sessions():
+            return bulk.run_bulk(
+                save, objects, workers, retries, rate_limit,
+                finish=lambda result: result.item._update_from_save(
+                    result.value),
+                callback=callback, retryable=retryable)
+
+    def bulk_delete(self, objects, workers=8, retries=2, rate_limit=None,
+                    callback=None):
+        """Delete many objects concurrently.
+
+        Failures do not stop the other deletions; they are reported in
+        the results.
+
+        Args:
+            objects: Iterable of JSSObjects, or of string API endpoint
+                paths with ID (e.g. "/computers/id/12") to delete.
+            workers: Int maximum number of concurrent requests.
+                Defaults to 8.
+            retries: Int number of times to retry an object after a
+                connection error or a 5xx response. Defaults to 2.
+            rate_limit: Float maximum number of deletions per second.
+                Defaults to None (no limit).
+            callback: Function to call as each object completes. Will
+                be called like:
+                    `callback(bulk_result, completed_count, total_count)`
+                Defaults to None.
+
+        Returns:
+            List of BulkResult, in the same order as objects.
+        """
+        # pylint: disable=protected-access
+        def delete(item):
+            """DELETE one object or URL."""
+            if isinstance(item, basestring):
+                self.delete(item)
+            else:
+                item._delete_request()
+
+        def finish(result):
+            """Run delete_callbacks for deleted objects."""
+            if not isinstance(result.item, basestring):
+                result.item._run_callbacks("delete_callbacks")
+
+        with self._thread_sessions():
+            return bulk.run_bulk(delete, objects, workers, retries,
+                                 rate_limit, finish, callback)
 
     def put(self, url_path, data):
         """Update an existing object on the JSS.
@@ -880,7 +1195,7 @@ class JSSObjectFactory(object):
         else:
             raise ValueError
 
-    def get_list(self, obj_class, data, subset):
+    def get_list(self, obj_class, data, subset, columnar=False):
         """Get a list of objects as JSSObjectList.
 
         Args:
@@ -888,9 +1203,12 @@ class JSSObjectFactory(object):
             data: None
             subset: Some objects support a subset for listing; namely
                 Computer, with subset="basic".
+            columnar: Bool whether to return the listing as a
+                ColumnarJSSObjectList, which is considerably smaller for
+                very large listings. Defaults to False.
 
         Returns:
-            JSSObjectList
+            JSSObjectList, or ColumnarJSSObjectList if columnar.
         """
         url = obj_class.get_url(data)
         if obj_class.can_list and obj_class.can_get:
@@ -903,6 +1221,9 @@ class JSSObjectFactory(object):
             if obj_class.container:
                 result = result.find(obj_class.container)
 
+            if columnar:
+                return ColumnarJSSObjectList.from_response(self, obj_class,
+                                                           result)
             return self._build_jss_object_list(result, obj_class)
 
         # Single object
@@ -24,7 +24,7 @@ import os
 from xml.etree import ElementTree
 
 from .exceptions import (JSSUnsupportedSearchMethodError,
-                         JSSMethodNotAllowedError, JSSPutError, JSSPostError)
+                         JSSMethodNotAllowedError, JSSPostError)
 from .tools import element_repr
 
 
@@ -36,6 +36,9 @@ from .tools import element_repr
 # useful than just the tag name when not assigned.
 ElementTree.Element.__repr__ = element_repr
 
+# Marks the template node which holds a new object's name.
+_NAME_SLOT = object()
+
 
 class SearchCriteria(ElementTree.Element):
     """Object for encapsulating a smart group search criteria."""
@@ -130,6 +133,8 @@ class JSSObject(ElementTree.Element):
     search_types = {"name": "/name/"}
     list_type = "JSSObject"
     data_keys = {}
+    # Compiled _new() templates, by class. See _get_template.
+    _templates = {}
 
     def __init__(self, jss, data, **kwargs):
         """Initialize a new JSSObject
@@ -158,7 +163,8 @@ class JSSObject(ElementTree.Element):
         """Create a new JSSObject with name and "keys".
 
         Generate a default XML template for this object, based on
-        the class attribute "keys".
+        the class attribute "keys". The template is compiled once per
+        class (see _get_template), and then copied for each new object.
 
         Args:
             name: String name of the object to use as the
@@ -173,19 +179,89 @@ class JSSObject(ElementTree.Element):
 
                 Ignores kwargs that aren't in object's keys attribute.
         """
-        # Name is required, so set it outside of the helper func.
-        if self._name_path:
-            parent = self
-            for path_element in self._name_path.split("/"):
-                self._set_xml_from_keys(parent, (path_element, None))
-                parent = parent.find(path_element)
-
-            parent.text = name
-        else:
-            ElementTree.SubElement(self, "name").text = name
+        elements = [self]
+        for parent, tag, slot, default in self._get_template():
+            element = ElementTree.SubElement(elements[parent], tag)
+            elements.append(element)
+            if slot is _NAME_SLOT:
+                element.text = name
+            elif slot is not None:
+                if slot in kwargs:
+                    element.text = self._kwarg_to_text(kwargs[slot])
+                else:
+                    element.text = default
+
+    @classmethod
+    def _get_template(cls):
+        """Return the compiled _new() template for this class.
+
+        The name path and data_keys are walked once per class, rather
+        than once per new object, into a tuple of nodes in document
+        order. Each node is a tuple of:
+            (index of parent node, with 0 being the object itself,
+             tag,
+             _NAME_SLOT, the data_keys key whose kwarg sets the text,
+                or None,
+             default text from data_keys)
+
+        The result matches building the tree with _set_xml_from_keys.
+        If you change a class's data_keys at runtime, delete its entry
+        from JSSObject._templates.
+        """
+        template = JSSObject._templates.get(cls)
+        if template is None:
+            nodes = []
+            # Tag: node index maps, for finding existing children.
+            children = [{}]
+
+            def child(parent, tag, find=True):
+                """Return the index of parent's tag child, adding it
+                if find is False or no such child exists.
+                """
+                if find and tag in children[parent]:
+                    return children[parent][tag]
+                nodes.append([parent, tag, None, None])
+                children.append({})
+                children[parent].setdefault(tag, len(nodes))
+                return len(nodes)
+
+            def add_keys(parent, key, val):
+                """Add nodes for a data_keys item."""
+                index = child(parent, key)
+                if isinstance(val, dict):
+                    for item in val.items():
+                        add_keys(index, *item)
+                else:
+                    nodes[index - 1][2:] = [key, val]
 
-        for item in self.data_keys.items():
-            self._set_xml_from_keys(self, item, **kwargs)
+            # Name is required, so set it outside of the data_keys.
+            if cls._name_path:
+                index = 0
+                for path_element in cls._name_path.split("/"):
+                    index = child(index, path_element)
+            else:
+                index = child(0, "name", find=False)
+            nodes[index - 1][2] = _NAME_SLOT
+
+            for item in cls.data_keys.items():
+                add_keys(0, *item)
+
+            template = JSSObject._templates[cls] = tuple(
+                tuple(node) for node in nodes)
+        return template
+
+    @staticmethod
+    def _kwarg_to_text(kwarg):
+        """Convert a _new() kwarg to the appropriate string."""
+        if isinstance(kwarg, bool):
+            return str(kwarg).lower()
+        elif kwarg is None:
+            return ""
+        elif isinstance(kwarg, int):
+            return str(kwarg)
+        elif isinstance(kwarg, JSSObject):
+            return kwarg.name
+        return kwarg
 
     def _set_xml_from_keys(self, root, item, **kwargs):
         """Create SubElements of root with kwargs.
@@ -215,17 +291,9 @@ class JSSObject(ElementTree.Element):
 
         # Convert kwarg data to the appropriate string.
         if key in kwargs:
-            kwarg = kwargs[key]
-            if isinstance(kwarg, bool):
-                kwargs[key] = str(kwargs[key]).lower()
-            elif kwarg is None:
-                kwargs[key] = ""
-            elif isinstance(kwarg, int):
-                kwargs[key] = str(kwargs[key])
-            elif isinstance(kwarg, JSSObject):
-                kwargs[key] = kwargs[key].name
-
-        target_key.text = kwargs.get(key, val)
+            target_key.text = self._kwarg_to_text(kwargs[key])
+        else:
+            target_key.text = val
 
     def makeelement(self, tag, attrib):
         """Return an Element."""
@@ -300,6 +368,11 @@ class JSSObject(ElementTree.Element):
 
     def delete(self, data=None):
         """Delete this object from the JSS."""
+        self._delete_request(data)
+        self._run_callbacks("delete_callbacks")
+
+    def _delete_request(self, data=None):
+        """DELETE this object, without running any callbacks."""
         if not self.can_delete:
             raise JSSMethodNotAllowedError(self.__class__.__name__)
         if data:
@@ -307,6 +380,11 @@ class JSSObject(ElementTree.Element):
         else:
             self.jss.delete(self.url)
 
+    def _run_callbacks(self, name):
+        """Call each of the JSS's callbacks in list attribute name."""
+        for callback in getattr(self.jss, name, []):
+            callback(self)
+
     def save(self):
         """Update or create a new object on the JSS.
 
@@ -317,6 +395,24 @@ class JSSObject(ElementTree.Element):
         Data validation is up to the client; The JSS in most cases will
         at least give you some hints as to what is invalid.
         """
+        self._update_from_save(self._save_request())
+
+    def _save_request(self):
+        """PUT or POST this object and return the JSS's updated data.
+
+        The object itself is not changed.
+        """
+        return self._read_saved(self._write_request())
+
+    def _write_request(self):
+        """PUT or POST this object, without reading it back.
+
+        The object itself is not changed.
+
+        Returns:
+            The int ID of a newly created object, or None if an
+            existing object was updated.
+        """
         # Object probably exists if it has an ID (user can't assign
         # one).  The only objects that don't have an ID are those that
         # cannot list.
@@ -331,26 +427,33 @@ class JSSObject(ElementTree.Element):
                 if cat_tag.text == "No category assigned":
                     cat_tag.text = ""
 
-            try:
-                self.jss.put(self.url, self)
-                updated_data = self.jss.get(self.url)
-            except JSSPutError as put_error:
-                # Something when wrong.
-                raise JSSPutError(put_error)
+            self.jss.put(self.url, self)
+            return None
         elif self.can_post:
-            url = self.get_post_url()
-            try:
-                updated_data = self.jss.post(self.__class__, url, self)
-            except JSSPostError as err:
-                raise JSSPostError(err)
+            # pylint: disable=protected-access
+            return self.jss._post(self.get_post_url(), self)
         else:
             raise JSSMethodNotAllowedError(self.__class__.__name__)
 
+    def _read_saved(self, new_id=None):
+        """GET the JSS's data for this object after _write_request.
+
+        Args:
+            new_id: The ID returned by _write_request.
+        """
+        if new_id is None:
+            return self.jss.get(self.url)
+        return self.jss.factory.get_object(self.__class__, new_id)
+
+    def _update_from_save(self, updated_data):
+        """Replace this object's data with the data from a save."""
         # Replace current instance's data with new, JSS-validated data.
         self.clear()
         for child in updated_data.getchildren():
             self._children.append(child)
 
+        self._run_callbacks("save_callbacks")
+
     @property
     def name(self):
         """Return object name or None."""
@@ -20,11 +20,147 @@ JSS.
 """
 
 
-from collections import MutableMapping
+from array import array
+from collections import MutableMapping, deque
 import cPickle
+from multiprocessing.pool import ThreadPool
 import os
 
 
+# Number of values to intern in each column before deciding whether to
+# continue, and the greatest fraction of them that may be distinct.
+INTERN_SAMPLE_SIZE = 1000
+INTERN_MAX_DISTINCT = 0.5
+
+
+def _build_dataframe(columns, fields, dtypes=None):
+    """Return a pandas DataFrame from a dict of column lists.
+
+    Values are left as the JSS's strings, except that "id" is always
+    converted to integers, and any columns named in dtypes to their
+    dtype. Many numeric-looking values (e.g. OS version "10.10" or a
+    zero-padded asset tag) are not numbers, so nothing else is guessed.
+
+    Args:
+        columns: Dict of field: list of values.
+        fields: List of field names, in column order.
+        dtypes: Dict of field: dtype (anything DataFrame.astype
+            accepts, e.g. int, float, or "category") to convert.
+            Missing values (empty or absent elements) become None
+            first, so use float for numeric columns which may be
+            missing. Defaults to None.
+
+    Raises:
+        ImportError if pandas is not available.
+    """
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError("pandas is required to build a DataFrame. Please "
+                          "install it (e.g. 'pip install pandas').")
+
+    frame = pandas.DataFrame(columns, columns=fields)
+    dtypes = dict(dtypes or {})
+    if "id" in fields:
+        dtypes.setdefault("id", int)
+    for field, dtype in dtypes.items():
+        column = frame[field]
+        if column.dtype == object:
+            # The JSS represents missing values as empty elements.
+            column = column.where(column != "", None)
+        frame[field] = column.astype(dtype)
+    return frame
+
+
+class _Interner(object):
+    """Stores one copy of each repeated value, per column.
+
+    Interning only saves memory if values repeat, and costs a dict
+    entry per distinct value, so a column is only interned while
+    enough of its values are repeats: once INTERN_SAMPLE_SIZE values
+    have been seen, columns with more than INTERN_MAX_DISTINCT of them
+    distinct (e.g. serial numbers or UDIDs) are no longer interned.
+    """
+
+    def __init__(self):
+        # Column key: dict of value: stored value, or None once the
+        # column is no longer interned.
+        self._tables = {}
+        self._counts = {}
+
+    def intern(self, key, value):
+        """Return the stored copy of a column's value."""
+        table = self._tables.get(key)
+        if table is None:
+            if key in self._tables:
+                return value
+            table = self._tables[key] = {}
+        value = table.setdefault(value, value)
+        count = self._counts[key] = self._counts.get(key, 0) + 1
+        if (count == INTERN_SAMPLE_SIZE and
+                len(table) > INTERN_MAX_DISTINCT * count):
+            self._tables[key] = None
+        return value
+
+
+def _get_field(item, field):
+    """Return the text value of field from a list member.
+
+    Args:
+        item: JSSListData or JSSObject.
+        field: Listing data key, or path for Element.findtext. "id" and
+            "name" use the object's properties, so they are found
+            regardless of where the object type stores them.
+    """
+    if isinstance(item, JSSListData):
+        return item.get(field)
+    elif field in ("id", "name"):
+        return getattr(item, field)
+    return item.findtext(field)
+
+
+def _retrieve_objects(factory, obj_class, ids, subset=None, workers=1):
+    """Yield full JSSObjects for each id, in order.
+
+    With more than one worker, GETs are made concurrently by a pool of
+    threads, each with its own Session. No more than twice as many
+    objects as there are workers are requested ahead of the consumer,
+    so memory use stays bounded regardless of the number of ids.
+
+    Args:
+        factory: A JSSObjectFactory.
+        obj_class: A JSSObject class (e.g. jss.Computer).
+        ids: Iterable of int object IDs.
+        subset: For objects which support it, a list of sub-tags to
+            request, or an "&" delimited string.
+        workers: Int number of concurrent requests. Defaults to 1.
+    """
+    # The factory modifies subset lists in place, so give each request
+    # its own copy by passing the string form.
+    if isinstance(subset, list):
+        subset = "&".join(subset)
+
+    if workers <= 1:
+        for id_ in ids:
+            yield factory.get_object(obj_class, id_, subset)
+        return
+
+    # pylint: disable=protected-access
+    with factory.jss._thread_sessions():
+        pool = ThreadPool(workers)
+        pending = deque()
+        try:
+            for id_ in ids:
+                pending.append(pool.apply_async(factory.get_object,
+                                                (obj_class, id_, subset)))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            pool.terminate()
+
+
 class JSSListData(MutableMapping):
     """Holds overview information returned from a listing GET."""
 
@@ -158,26 +294,79 @@ class JSSObjectList(list):
         if len(items_with_id) == 1:
             return items_with_id[0].retrieve()
 
-    def retrieve_all(self, subset=None):
+    def retrieve_all(self, subset=None, workers=1):
         """Return a list of all JSSListData elements as full JSSObjects.
 
         This can take a long time given a large number of objects,
         and depending on the size of each object. Subsetting to only
-        include the data you need can improve performance.
+        include the data you need can improve performance, as can
+        using more than one worker.
 
         Args:
             subset: For objects which support it, a list of sub-tags to
                 request, or an "&" delimited string, (e.g.
                 "general&purchasing").  Default to None.
+            workers: Int number of concurrent GET requests. Defaults
+                to 1.
         """
-        # Attempt to speed this procedure up as much as can be done.
+        full_objects = list(self.iter_retrieve_all(subset, workers))
+        return JSSObjectList(self.factory, self.obj_class, full_objects)
 
-        get_object = self.factory.get_object
-        obj_class = self.obj_class
+    def iter_retrieve_all(self, subset=None, workers=1):
+        """Yield each JSSListData element as a full JSSObject.
 
-        full_objects = [get_object(obj_class, list_obj.id, subset) for list_obj
-                        in self]
-        return JSSObjectList(self.factory, obj_class, full_objects)
+        Unlike retrieve_all, only a few full objects are held at a
+        time, so this is suitable for streaming through very large
+        lists.
+
+        Args:
+            subset: For objects which support it, a list of sub-tags to
+                request, or an "&" delimited string, (e.g.
+                "general&purchasing").  Default to None.
+            workers: Int number of concurrent GET requests. Defaults
+                to 1.
+        """
+        return _retrieve_objects(self.factory, self.obj_class,
+                                 [list_obj.id for list_obj in self], subset,
+                                 workers)
+
+    def to_dataframe(self, fields=None, dtypes=None):
+        """Return a pandas DataFrame of fields from each list member.
+
+        Values are extracted in a single pass over the list. Members
+        may be JSSListData (fields are keys of the listing data) or
+        full JSSObjects (fields are Element.findtext paths, e.g.
+        "general/serial_number" or "hardware/total_ram_mb"). Fields a
+        member lacks are None. Values are strings, except for "id";
+        use dtypes to convert other columns.
+
+        Requires pandas.
+
+        Args:
+            fields: List of keys or paths to use as columns. Defaults
+                to ["id", "name"].
+            dtypes: Dict of field: dtype to convert columns to, e.g.
+                {"hardware/total_ram_mb": float}. Defaults to None.
+
+        Returns:
+            pandas.DataFrame with one row per list member.
+        """
+        fields = list(fields) if fields else ["id", "name"]
+        columns = {field: [] for field in fields}
+        for item in self:
+            for field in fields:
+                columns[field].append(_get_field(item, field))
+
+        return _build_dataframe(columns, fields, dtypes)
+
+    def to_columnar(self):
+        """Return a ColumnarJSSObjectList of this list's JSSListData.
+
+        Only JSSListData members can be stored in columns; full
+        JSSObjects will raise a TypeError.
+        """
+        return ColumnarJSSObjectList.from_list_data(self.factory,
+                                                    self.obj_class, self)
 
     def pickle(self, path):
         """Write objects to python pickle.
@@ -216,3 +405,293 @@ class JSSObjectList(list):
         """
         with open(os.path.expanduser(path), "rb") as pickle:
             return cPickle.Unpickler(pickle).load()
+
+
+class ColumnarJSSObjectList(object):
+    """A column-oriented alternative to a JSSObjectList of JSSListData.
+
+    Large listings (e.g. every Computer with the "basic" subset) are
+    mostly used to iterate, sort, and compare ids and names. Rather
+    than holding a JSSListData dict per row, the ColumnarJSSObjectList
+    stores each field as a parallel array: ids in an array("l"), names
+    in a list, and any additional fields (for example, the Computer
+    "basic" subset's serial_number or model) as extra columns. Columns
+    whose values repeat (e.g. model) are interned so that each
+    distinct string is only stored once.
+
+    Rows are materialized as JSSListData only when they are accessed
+    by index or iteration, so the list can be used in most places a
+    JSSObjectList of JSSListData is.
+
+    Attributes:
+        factory: A JSSObjectFactory for managing object construction and
+            searching.
+        obj_class: A JSSObject class (e.g. jss.Computer) that the list
+            contains.
+        ids: array("l") of object IDs.
+        names: List of object names.
+        columns: Dict of column name: list of values for all other
+            fields included in the listing.
+    """
+
+    def __init__(self, factory, obj_class):
+        """Construct an empty ColumnarJSSObjectList.
+
+        Use the from_response or from_list_data classmethods to build
+        a populated list.
+
+        Args:
+            factory: A JSSObjectFactory for managing object construction
+                in the event one of the retrieval methods is used.
+            obj_class: A JSSObject class (e.g. jss.Computer) that the
+                list contains.
+        """
+        self.factory = factory
+        self.obj_class = obj_class
+        self.ids = array("l")
+        self.names = []
+        self.columns = {}
+        self._interner = _Interner()
+
+    @classmethod
+    def from_response(cls, factory, obj_class, response):
+        """Build a ColumnarJSSObjectList from a listing GET's Element.
+
+        Args:
+            factory: A JSSObjectFactory.
+            obj_class: A JSSObject class (e.g. jss.Computer).
+            response: Element containing the listed items. Any "size"
+                element is skipped.
+        """
+        columnar = cls(factory, obj_class)
+        for item in response:
+            if item is not None and item.tag != "size":
+                columnar.append(
+                    (child.tag, child.text) for child in item)
+        return columnar
+
+    @classmethod
+    def from_list_data(cls, factory, obj_class, list_data):
+        """Build a ColumnarJSSObjectList from JSSListData items.
+
+        Args:
+            factory: A JSSObjectFactory.
+            obj_class: A JSSObject class (e.g. jss.Computer).
+            list_data: Iterable of JSSListData (or dicts) with at
+                least an "id" key.
+
+        Raises:
+            TypeError if an item is not a mapping of listing data.
+        """
+        columnar = cls(factory, obj_class)
+        for item in list_data:
+            if not isinstance(item, (JSSListData, dict)):
+                raise TypeError("Only listing data can be stored in a "
+                                "ColumnarJSSObjectList.")
+            columnar.append(item.items())
+        return columnar
+
+    def append(self, fields):
+        """Add a row to the end of the list.
+
+        Args:
+            fields: Dict or iterable of (key, value) pairs for the row.
+                "id" is required.
+        """
+        row = dict(fields)
+        position = len(self.ids)
+        self.ids.append(int(row.pop("id")))
+        name = row.pop("name", None)
+        self.names.append(self._interner.intern("name", name))
+        for key, val in row.items():
+            column = self.columns.get(key)
+            if column is None:
+                # Backfill rows that predate this column.
+                column = self.columns[key] = position * [None]
+            column.append(self._interner.intern(key, val))
+        for key, column in self.columns.items():
+            if len(column) == position:
+                column.append(None)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        """Return a JSSListData for an int index, or a new
+        ColumnarJSSObjectList for a slice.
+        """
+        if isinstance(index, slice):
+            return self._take(range(*index.indices(len(self))))
+        return self._row(index)
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self._row(index)
+
+    def __repr__(self):
+        """Make data human readable."""
+        return self.to_list().__repr__()
+
+    def _row(self, index):
+        """Materialize the JSSListData at index."""
+        data = {"id": str(self.ids[index]), "name": self.names[index]}
+        for key, column in self.columns.items():
+            data[key] = column[index]
+        return JSSListData(self.obj_class, data, self.factory)
+
+    def _take(self, order):
+        """Return a new ColumnarJSSObjectList of the rows in order."""
+        result = ColumnarJSSObjectList(self.factory, self.obj_class)
+        result._interner = self._interner   # pylint: disable=protected-access
+        ids = self.ids
+        names = self.names
+        result.ids = array("l", (ids[index] for index in order))
+        result.names = [names[index] for index in order]
+        result.columns = {key: [column[index] for index in order] for
+                          key, column in self.columns.items()}
+        return result
+
+    def _apply_order(self, order):
+        """Reorder all columns in place according to index list order."""
+        reordered = self._take(order)
+        self.ids = reordered.ids
+        self.names = reordered.names
+        self.columns = reordered.columns
+
+    def argsort(self, key="id"):
+        """Return a list of row indexes that would sort the list.
+
+        Args:
+            key: Column to sort on: "id", "name", or any other column
+                name. Defaults to "id".
+        """
+        if key == "id":
+            column = self.ids
+        elif key == "name":
+            column = self.names
+        else:
+            column = self.columns[key]
+        return sorted(xrange(len(self)), key=column.__getitem__)
+
+    def sort(self):
+        """Sort list elements by ID."""
+        self._apply_order(self.argsort("id"))
+
+    def sort_by_name(self):
+        """Sort list elements by name."""
+        self._apply_order(self.argsort("name"))
+
+    def diff(self, other):
+        """Compare the IDs in this list against another list.
+
+        Args:
+            other: A ColumnarJSSObjectList, JSSObjectList, or iterable
+                of int IDs.
+
+        Returns:
+            Tuple of two sorted lists: (IDs only in this list, IDs only
+            in other).
+        """
+        if isinstance(other, ColumnarJSSObjectList):
+            other_ids = set(other.ids)
+        else:
+            other_ids = set(int(getattr(item, "id", item)) for item in other)
+        own_ids = set(self.ids)
+        return (sorted(own_ids - other_ids), sorted(other_ids - own_ids))
+
+    def column(self, key):
+        """Return the values of column key in list order.
+
+        Args:
+            key: "id", "name", or any other column name.
+        """
+        if key == "id":
+            return self.ids
+        elif key == "name":
+            return self.names
+        return self.columns[key]
+
+    def retrieve(self, index):
+        """Return a JSSObject for the element at index."""
+        return self.factory.get_object(self.obj_class, self.ids[index])
+
+    def retrieve_by_id(self, id_):
+        """Return a JSSObject for the element with ID id_"""
+        if self.ids.count(int(id_)) == 1:
+            return self.factory.get_object(self.obj_class, int(id_))
+
+    def retrieve_all(self, subset=None, workers=1):
+        """Return a JSSObjectList of all elements as full JSSObjects.
+
+        Args:
+            subset: For objects which support it, a list of sub-tags to
+                request, or an "&" delimited string, (e.g.
+                "general&purchasing").  Default to None.
+            workers: Int number of concurrent GET requests. Defaults
+                to 1.
+        """
+        full_objects = list(self.iter_retrieve_all(subset, workers))
+        return JSSObjectList(self.factory, self.obj_class, full_objects)
+
+    def iter_retrieve_all(self, subset=None, workers=1):
+        """Yield each element as a full JSSObject, in list order.
+
+        Args:
+            subset: For objects which support it, a list of sub-tags to
+                request, or an "&" delimited string, (e.g.
+                "general&purchasing").  Default to None.
+            workers: Int number of concurrent GET requests. Defaults
+                to 1.
+        """
+        return _retrieve_objects(self.factory, self.obj_class,
+                                 array("l", self.ids), subset, workers)
+
+    def to_dataframe(self, fields=None, dtypes=None):
+        """Return a pandas DataFrame of columns from this list.
+
+        Columns are taken directly from storage, with no rows
+        materialized. As with JSSObjectList.to_dataframe, values are
+        strings except for "id", and unknown fields are all None.
+
+        Requires pandas.
+
+        Args:
+            fields: List of column names. Defaults to all columns, with
+                "id" and "name" first.
+            dtypes: Dict of field: dtype to convert columns to.
+                Defaults to None.
+        """
+        if not fields:
+            fields = ["id", "name"] + sorted(self.columns)
+        columns = {}
+        for field in fields:
+            if field in ("id", "name") or field in self.columns:
+                columns[field] = list(self.column(field))
+            else:
+                columns[field] = len(self) * [None]
+        return _build_dataframe(columns, fields, dtypes)
+
+    def to_list(self):
+        """Return a JSSObjectList with every row as JSSListData."""
+        return JSSObjectList(self.factory, self.obj_class, list(self))
+
+    def pickle(self, path):
+        """Write the columnar list to a python pickle.
+
+        Args:
+            path: String file path to the file you wish to (over)write.
+                Path will have ~ expanded prior to opening.
+        """
+        with open(os.path.expanduser(path), "wb") as pickle:
+            cPickle.Pickler(pickle, cPickle.HIGHEST_PROTOCOL).dump(self)
+
+    @classmethod
+    def from_pickle(cls, path):
+        """Load a ColumnarJSSObjectList from a pickle file.
+
+        Args:
+            path: String file path to the file you wish to load from.
+                Path will have ~ expanded prior to opening.
+        """
+        with open(os.path.expanduser(path), "rb") as pickle:
+            return cPickle.Unpickler(pickle).load()
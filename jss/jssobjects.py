@@ -30,6 +30,7 @@ from .exceptions import (JSSMethodNotAllowedError, JSSPostError,
                          JSSDeleteError)
 from .jssobject import (JSSContainerObject, JSSFlatObject,
                         JSSGroupObject, JSSDeviceObject, JSSObject)
+from .jssobjectlist import JSSListData
 from .tools import error_handler
 
 
@@ -1065,6 +1066,94 @@ class Policy(JSSContainerObject):
         else:
             raise TypeError
 
+    def add_objects_to_scope(self, objects):
+        """Add many objects to the appropriate scope blocks.
+
+        Objects already in scope (by ID), and repeated objects, are
+        skipped.
+
+        Args:
+            objects: Iterable of Computer, ComputerGroup, Building,
+                and Department objects, or JSSListData items of those
+                types (e.g. a JSSObjectList of Computers), in any mix.
+
+        Returns:
+            Int number of objects added.
+
+        Raises:
+            TypeError if invalid obj type is provided.
+            ValueError if the Policy lacks the scope list needed.
+            Nothing is added if either is raised.
+        """
+        return self._add_objects_to_scope_section(objects, "scope")
+
+    def add_objects_to_exclusions(self, objects):
+        """Add many objects to the appropriate scope exclusions blocks.
+
+        Objects already excluded (by ID), and repeated objects, are
+        skipped.
+
+        Args:
+            objects: Iterable of Computer, ComputerGroup, Building,
+                and Department objects, or JSSListData items of those
+                types, in any mix.
+
+        Returns:
+            Int number of objects added.
+
+        Raises:
+            TypeError if invalid obj type is provided.
+            ValueError if the Policy lacks the scope list needed.
+            Nothing is added if either is raised.
+        """
+        return self._add_objects_to_scope_section(objects,
+                                                  "scope/exclusions")
+
+    def _add_objects_to_scope_section(self, objects, section):
+        """Add objects to the lists of a scope section in one pass.
+
+        Each target list is scanned for existing IDs once, rather than
+        once per object added. All objects are checked before any are
+        added, so a bad object leaves the scope unchanged.
+        """
+        scope_lists = {Computer: "computers",
+                       ComputerGroup: "computer_groups",
+                       Building: "buildings",
+                       Department: "departments"}
+        # List of (scope class, str ID, name) to add.
+        additions = []
+        for obj in objects:
+            obj_class = (obj.obj_class if isinstance(obj, JSSListData) else
+                         type(obj))
+            scope_class = [cls for cls in scope_lists if
+                           issubclass(obj_class, cls)]
+            if not scope_class:
+                raise TypeError("Cannot scope a %s object." %
+                                obj_class.__name__)
+            additions.append((scope_class[0], str(obj.id), obj.name))
+
+        # Map of class to (list Element, set of str IDs in it).
+        targets = {}
+        for scope_class in set(addition[0] for addition in additions):
+            path = "%s/%s" % (section, scope_lists[scope_class])
+            location = self.find(path)
+            if location is None:
+                raise ValueError("%s has no %s element." % (self.name, path))
+            targets[scope_class] = (
+                location, set(item.findtext("id") for item in location))
+
+        added = 0
+        for scope_class, obj_id, name in additions:
+            location, ids = targets[scope_class]
+            if obj_id in ids:
+                continue
+            ids.add(obj_id)
+            element = ElementTree.SubElement(location, scope_class.list_type)
+            ElementTree.SubElement(element, "id").text = obj_id
+            ElementTree.SubElement(element, "name").text = name
+            added += 1
+        return added
+
     def add_package(self, pkg, action_type="Install"):
         """Add a Package object to the policy with action=install.
 
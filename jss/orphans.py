@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""orphans.py
+
+Classes for looking up Packages and Scripts by filename, and for
+finding repository files with no Package or Script object, and objects
+whose file is missing from a repository.
+"""
+
+
+from multiprocessing.pool import ThreadPool
+
+from . import jssobjects
+
+
+# Repository folder for each indexed class.
+FOLDERS = {"Package": "Packages", "Script": "Scripts"}
+
+
+class FilenameIndex(object):
+    """Index of Package and Script objects by filename.
+
+    The JSS API can't search packages or scripts by filename, so this
+    retrieves every Package and Script once (concurrently), and keeps a
+    filename to IDs mapping for each class. Register it with a JSS to
+    keep it current as Packages and Scripts are saved or deleted.
+
+    Attributes:
+        filenames: Dict of class name ("Package" or "Script"): dict of
+            filename: set of int IDs.
+    """
+
+    indexed_classes = (jssobjects.Package, jssobjects.Script)
+
+    def __init__(self):
+        """Create an empty FilenameIndex. Use build to populate it."""
+        self.filenames = {"Package": {}, "Script": {}}
+        self._by_id = {}
+
+    def build(self, jss, workers=8):
+        """Retrieve all Packages and Scripts, replacing the index.
+
+        Args:
+            jss: A JSS object.
+            workers: Int number of concurrent GET requests. Defaults
+                to 8.
+        """
+        self.filenames = {"Package": {}, "Script": {}}
+        self._by_id = {}
+        for obj_class in self.indexed_classes:
+            obj_list = jss.factory.get_object(obj_class)
+            for obj in obj_list.iter_retrieve_all(workers=workers):
+                self.update(obj)
+
+    def register(self, jss):
+        """Update the index as objects are saved or deleted through jss.
+
+        Args:
+            jss: A JSS object.
+        """
+        jss.save_callbacks.append(self.update)
+        jss.delete_callbacks.append(self.remove)
+
+    def update(self, obj):
+        """Add or re-index a Package or Script.
+
+        Objects of other types are ignored, so this may be used as a
+        JSS save callback.
+
+        Args:
+            obj: Full Package or Script object.
+        """
+        if not isinstance(obj, self.indexed_classes):
+            return
+        self.remove(obj)
+        filename = obj.findtext("filename")
+        if filename:
+            key = (obj.__class__.__name__, int(obj.id))
+            self._by_id[key] = filename
+            self.filenames[key[0]].setdefault(filename, set()).add(key[1])
+
+    def remove(self, obj):
+        """Remove a Package or Script from the index.
+
+        Args:
+            obj: Package or Script, or a (class name, ID) tuple.
+        """
+        if isinstance(obj, tuple):
+            key = (obj[0], int(obj[1]))
+        elif isinstance(obj, self.indexed_classes):
+            key = (obj.__class__.__name__, int(obj.id))
+        else:
+            return
+        filename = self._by_id.pop(key, None)
+        ids = self.filenames.get(key[0], {}).get(filename)
+        if ids is not None:
+            ids.discard(key[1])
+            if not ids:
+                del self.filenames[key[0]][filename]
+
+    def find(self, class_name, filename):
+        """Return the set of IDs of class_name objects for filename.
+
+        Args:
+            class_name: "Package" or "Script".
+            filename: String filename (no path).
+        """
+        return set(self.filenames[class_name].get(filename, ()))
+
+
+class OrphanReport(object):
+    """Repository files without objects, and objects without files.
+
+    build crawls all Packages and Scripts (see FilenameIndex) while
+    each repository's Packages and Scripts folders are scanned (see
+    FileRepository.manifest), then compares them with set operations.
+
+    Hidden files (e.g. .DS_Store) are ignored. On a migrated JSS,
+    scripts are stored in the database, so Scripts are not expected on
+    repositories, and are not reported as missing.
+
+    Attributes:
+        index: The FilenameIndex used.
+        orphaned_files: List of (repository, folder, filename) tuples
+            for files with no Package or Script object.
+        missing_files: List of (repository, class name, ID, filename)
+            tuples for objects whose file is not on a repository.
+    """
+
+    def __init__(self):
+        """Create an empty OrphanReport. Use build to populate it."""
+        self.index = None
+        self.orphaned_files = []
+        self.missing_files = []
+
+    def build(self, jss, repositories, index=None, workers=8):
+        """Compare repositories' contents with the JSS's objects.
+
+        Args:
+            jss: A JSS object.
+            repositories: Iterable of file share repositories (e.g.
+                LocalRepository, AFPDistributionPoint).
+            index: A FilenameIndex to use rather than crawling the JSS.
+                Defaults to None.
+            workers: Int number of concurrent GET requests. Defaults
+                to 8.
+        """
+        repositories = list(repositories)
+        pool = ThreadPool(max(1, len(repositories)))
+        try:
+            manifests = pool.map_async(
+                lambda repo: dict((class_name, repo.manifest(folder, True))
+                                  for class_name, folder in FOLDERS.items()),
+                repositories)
+            if index is None:
+                index = FilenameIndex()
+                index.build(jss, workers)
+            manifests = manifests.get()
+        finally:
+            pool.terminate()
+        self.index = index
+
+        check_scripts = not getattr(jss, "jss_migrated", False)
+        self.orphaned_files = []
+        self.missing_files = []
+        for repo, manifest in zip(repositories, manifests):
+            for class_name, folder in sorted(FOLDERS.items()):
+                files = set(filename for filename in manifest[class_name]
+                            if not filename.startswith("."))
+                known = index.filenames[class_name]
+                self.orphaned_files.extend(
+                    (repo, folder, filename)
+                    for filename in sorted(files.difference(known)))
+                if class_name == "Script" and not check_scripts:
+                    continue
+                for filename in sorted(set(known).difference(files)):
+                    self.missing_files.extend(
+                        (repo, class_name, obj_id, filename)
+                        for obj_id in sorted(known[filename]))
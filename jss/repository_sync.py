@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""repository_sync.py
+
+Class for replicating the Packages and Scripts of one file share
+repository to others, copying and deleting only what differs.
+"""
+
+
+import os
+import shutil
+
+from .bulk import RateLimiter, run_bulk
+from .distribution_point import FileRepository
+from .filecopy import copy_file, copy_tree, remove_path, replace_path
+from .tools import hash_path, path_signature
+
+
+# Repository folders which are synced.
+FOLDERS = ("Packages", "Scripts")
+
+# Seconds mtimes may differ by and still be considered equal, as SMB
+# and AFP shares may store them with 1-2 second precision.
+MODIFY_WINDOW = 2
+
+
+class SyncAction(object):
+    """One step of a sync plan.
+
+    Attributes:
+        action: String "copy" (new file), "update" (replace a file
+            which differs), or "delete" (remove a file not on the
+            source).
+        target: The FileRepository to change.
+        folder: String folder ("Packages" or "Scripts").
+        filename: String filename.
+        size: Int bytes to copy (0 for deletes).
+    """
+
+    def __init__(self, action, target, folder, filename, size=0):
+        self.action = action
+        self.target = target
+        self.folder = folder
+        self.filename = filename
+        self.size = size
+
+    def __repr__(self):
+        return "<SyncAction %s %s/%s on %s>" % (
+            self.action, self.folder, self.filename,
+            self.target.connection.get("url"))
+
+
+class RepositorySync(object):
+    """Replicates a source repository's files to target repositories.
+
+    Like rsync, but aware of the Packages/Scripts layout: each folder's
+    manifest (one directory scan per repository) on the source is
+    compared with each target's, and a plan is made of only the files
+    to copy, replace, and (optionally) delete. Files are considered
+    the same if their sizes match and their mtimes are within
+    MODIFY_WINDOW seconds (synced copies keep the source's mtime), or,
+    with checksum=True, if their content hashes match.
+
+    Bundle packages are compared by total size and latest mtime of
+    their contents.
+
+    Files are copied to a temporary name and then renamed into place,
+    so a target never has a partial copy under the real name. Hidden
+    files (e.g. .DS_Store, and the copy manifest) are ignored.
+
+    Only file share repositories (Local, AFP, and SMB) can be synced;
+    JDS and CDP servers have no file listing.
+
+    Attributes:
+        source: FileRepository to copy from.
+        targets: List of FileRepositories to copy to.
+        delete: Bool; whether to delete target files not on the
+            source.
+        checksum: Bool; whether to compare content hashes, rather
+            than size and mtime.
+    """
+
+    def __init__(self, source, targets, delete=False, checksum=False):
+        """Set up a RepositorySync.
+
+        Args:
+            source: FileRepository to copy from.
+            targets: Iterable of FileRepositories to copy to. source
+                is skipped if included.
+            delete: Bool; whether to delete target files which are not
+                on the source. Defaults to False.
+            checksum: Bool; whether to compare files by content hash
+                (which reads every file that might differ) rather than
+                by size and mtime. Defaults to False.
+        """
+        self.source = source
+        self.targets = [target for target in targets if
+                        target is not source]
+        for repo in [source] + self.targets:
+            if not isinstance(repo, FileRepository):
+                raise TypeError("Only file share repositories can be "
+                                "synced.")
+        self.delete = delete
+        self.checksum = checksum
+
+    def plan(self):
+        """Return the list of SyncActions needed to sync the targets."""
+        actions = []
+        for folder in FOLDERS:
+            source_files = _visible(self.source.manifest(folder, True))
+            for target in self.targets:
+                target_files = _visible(target.manifest(folder, True))
+                for filename, entry in sorted(source_files.items()):
+                    target_entry = target_files.get(filename)
+                    if target_entry is None:
+                        action = "copy"
+                    elif self._differs(folder, filename, entry, target,
+                                       target_entry):
+                        action = "update"
+                    else:
+                        continue
+                    actions.append(SyncAction(
+                        action, target, folder, filename,
+                        self._size(folder, filename, entry)))
+                if self.delete:
+                    actions.extend(
+                        SyncAction("delete", target, folder, filename)
+                        for filename in sorted(target_files)
+                        if filename not in source_files)
+        return actions
+
+    def run(self, plan=None, workers=4, bandwidth=None, callback=None):
+        """Carry out a sync plan.
+
+        Args:
+            plan: List of SyncActions, as returned by plan. Defaults to
+                None, which makes a new plan.
+            workers: Int number of actions to run at once (across all
+                targets). Defaults to 4.
+            bandwidth: Float maximum bytes per second to copy, in
+                total, or None (the default) for no limit.
+            callback: Function to call with each action's BulkResult
+                as it completes. Will be called like:
+                    `callback(result, completed_count, total_count)`
+                Defaults to None.
+
+        Returns:
+            List of BulkResult, one per SyncAction, in order. Failed
+            actions have an error, and do not stop the others.
+        """
+        if plan is None:
+            plan = self.plan()
+        limiter = RateLimiter(bandwidth) if bandwidth else None
+        return run_bulk(lambda action: self._run_action(action, limiter),
+                        plan, workers=workers, retries=0, callback=callback)
+
+    def _path(self, repo, folder, filename):
+        """Return the full path to a file in a repository."""
+        return os.path.join(repo.connection["mount_point"], folder, filename)
+
+    def _size(self, folder, filename, entry):
+        """Return the number of bytes a copy of a source file moves."""
+        if entry["is_dir"]:
+            return path_signature(self._path(self.source, folder,
+                                             filename))[0]
+        return entry["size"]
+
+    def _differs(self, folder, filename, entry, target, target_entry):
+        """Return whether a target's copy of a file differs."""
+        if entry["is_dir"] != target_entry["is_dir"]:
+            return True
+        source_path = self._path(self.source, folder, filename)
+        target_path = self._path(target, folder, filename)
+        if self.checksum:
+            source_hash = entry["hash"] or hash_path(source_path)
+            target_hash = target_entry["hash"] or hash_path(target_path)
+            return source_hash != target_hash
+        if entry["is_dir"]:
+            source_signature = path_signature(source_path)
+            target_signature = path_signature(target_path)
+        else:
+            source_signature = (entry["size"], entry["mtime"])
+            target_signature = (target_entry["size"], target_entry["mtime"])
+        return (source_signature[0] != target_signature[0] or
+                abs(source_signature[1] - target_signature[1]) >
+                MODIFY_WINDOW)
+
+    def _run_action(self, action, limiter):
+        """Carry out one SyncAction."""
+        target = action.target
+        if hasattr(target, "mount") and not target.is_mounted():
+            target.mount()
+        path = self._path(target, action.folder, action.filename)
+        if action.action == "delete":
+            # Not target.delete, which picks the folder by extension.
+            remove_path(path)
+            target._update_manifest(path)   # pylint: disable=protected-access
+            return action
+
+        source_path = self._path(self.source, action.folder, action.filename)
+        temp_path = os.path.join(os.path.dirname(path),
+                                 ".%s.python-jss-sync" % action.filename)
+        remove_path(temp_path)
+        try:
+            if os.path.isdir(source_path):
+                copy_tree(source_path, temp_path, limiter=limiter)
+            else:
+                copy_file(source_path, temp_path, limiter)
+            # Keep the mtime, so the next plan can skip this file.
+            shutil.copystat(source_path, temp_path)
+            replace_path(temp_path, path)
+        except BaseException:
+            remove_path(temp_path)
+            raise
+        target._update_manifest(path)   # pylint: disable=protected-access
+        return action
+
+
+def _visible(manifest):
+    """Return a manifest without hidden files."""
+    return {filename: entry for filename, entry in manifest.items()
+            if not filename.startswith(".")}
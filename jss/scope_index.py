@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""scope_index.py
+
+Class for answering "what is scoped to this?" for computers, computer
+groups, buildings, and departments, without walking every Policy and
+configuration profile's scope.
+"""
+
+
+from . import jssobjects
+
+
+# Scope target types, as (scope container tag, list_type tag).
+SCOPE_TARGETS = (("computers", "computer"),
+                 ("computer_groups", "computer_group"),
+                 ("buildings", "building"),
+                 ("departments", "department"))
+
+# Map the JSSObject classes which can be scope targets to their scope
+# container tag.
+TARGET_CLASSES = {jssobjects.Computer: "computers",
+                  jssobjects.ComputerGroup: "computer_groups",
+                  jssobjects.Building: "buildings",
+                  jssobjects.Department: "departments"}
+
+
+class ScopeIndex(object):
+    """Inverted index from scope targets to the objects scoped to them.
+
+    The ScopeIndex crawls the scope of every Policy and
+    OSXConfigurationProfile once (with concurrent "scope" subset
+    requests) and builds, for each computer, computer group, building
+    and department, the set of objects targeting it and the set of
+    objects excluding it.
+
+    Objects are identified by (class name, int ID) tuples, e.g.
+    ("Policy", 12).
+
+    To keep the index current as you make changes, register it with a
+    JSS; saved and deleted policies and profiles are then re-indexed
+    automatically.
+
+    Attributes:
+        scoped_classes: Tuple of the JSSObject classes crawled.
+        names: Dict of (class name, ID): object name.
+    """
+
+    scoped_classes = (jssobjects.Policy, jssobjects.OSXConfigurationProfile)
+
+    def __init__(self):
+        """Create an empty ScopeIndex. Use build to populate it."""
+        self.names = {}
+        self._targets = {}
+        self._exclusions = {}
+        self._all_computers = set()
+        self._target_names = {}
+        self._entries = {}
+
+    def build(self, jss, workers=8):
+        """Crawl all Policies and OSXConfigurationProfiles' scopes.
+
+        Args:
+            jss: A JSS object.
+            workers: Int number of concurrent GET requests. Defaults
+                to 8.
+        """
+        for obj_class in self.scoped_classes:
+            obj_list = jss.factory.get_object(obj_class)
+            for obj in obj_list.iter_retrieve_all("scope", workers):
+                self.update(obj)
+
+    def register(self, jss):
+        """Re-index objects as they are saved or deleted through jss.
+
+        Args:
+            jss: A JSS object.
+        """
+        jss.save_callbacks.append(self.update)
+        jss.delete_callbacks.append(self.remove)
+
+    @staticmethod
+    def _key(obj):
+        """Return the (class name, int ID) key for a JSSObject."""
+        return (obj.__class__.__name__, int(obj.id))
+
+    @staticmethod
+    def _target_key(target):
+        """Return the (scope container tag, int ID) for a target.
+
+        Args:
+            target: Computer, ComputerGroup, Building, or Department
+                object, or a (scope container tag, ID) tuple, e.g.
+                ("computer_groups", 4).
+        """
+        if isinstance(target, tuple):
+            return (target[0], int(target[1]))
+        for obj_class, container in TARGET_CLASSES.items():
+            if isinstance(target, obj_class):
+                return (container, int(target.id))
+        raise TypeError("Scope targets must be a Computer, ComputerGroup, "
+                        "Building, or Department.")
+
+    def update(self, obj):
+        """Add or re-index a Policy or OSXConfigurationProfile.
+
+        Objects of other types are ignored, so this may be used as a
+        JSS save callback.
+
+        Args:
+            obj: Policy or OSXConfigurationProfile, retrieved with at
+                least the "scope" subset.
+        """
+        if not isinstance(obj, self.scoped_classes):
+            return
+        key = self._key(obj)
+        self.remove(obj)
+        self.names[key] = obj.name
+        entries = self._entries[key] = []
+
+        if obj.findtext("scope/all_computers") == "true":
+            self._all_computers.add(key)
+        for section, index in (("scope", self._targets),
+                               ("scope/exclusions", self._exclusions)):
+            for container, list_type in SCOPE_TARGETS:
+                path = "%s/%s/%s" % (section, container, list_type)
+                for target in obj.findall(path):
+                    target_id = target.findtext("id")
+                    if not target_id:
+                        continue
+                    target_key = (container, int(target_id))
+                    index.setdefault(target_key, set()).add(key)
+                    entries.append((index, target_key))
+                    name = target.findtext("name")
+                    if name:
+                        self._target_names[(container, name)] = target_key
+
+    def remove(self, obj):
+        """Remove an object from the index.
+
+        Args:
+            obj: Policy or OSXConfigurationProfile, or a (class name,
+                ID) key.
+        """
+        if isinstance(obj, tuple):
+            key = (obj[0], int(obj[1]))
+        elif isinstance(obj, self.scoped_classes):
+            key = self._key(obj)
+        else:
+            return
+        for index, target_key in self._entries.pop(key, []):
+            objects = index.get(target_key)
+            if objects is not None:
+                objects.discard(key)
+                if not objects:
+                    del index[target_key]
+        self._all_computers.discard(key)
+        self.names.pop(key, None)
+
+    def targeting(self, target):
+        """Return the set of object keys directly targeting target.
+
+        Args:
+            target: Computer, ComputerGroup, Building, or Department
+                object, or a (scope container tag, ID) tuple, e.g.
+                ("computer_groups", 4).
+        """
+        return set(self._targets.get(self._target_key(target), ()))
+
+    def excluding(self, target):
+        """Return the set of object keys directly excluding target.
+
+        Args:
+            target: Computer, ComputerGroup, Building, or Department
+                object, or a (scope container tag, ID) tuple.
+        """
+        return set(self._exclusions.get(self._target_key(target), ()))
+
+    def for_computer(self, computer):
+        """Return the set of object keys in scope for a computer.
+
+        Includes objects scoped to all computers, to the computer
+        itself, and to its building, department, and computer groups,
+        less any of those which exclude any of them.
+
+        Args:
+            computer: Full Computer object (the location and
+                groups_accounts sections are used).
+        """
+        target_keys = [("computers", int(computer.id))]
+        for container, path in (
+                ("buildings", "location/building"),
+                ("departments", "location/department")):
+            name = computer.findtext(path)
+            if name and (container, name) in self._target_names:
+                target_keys.append(self._target_names[(container, name)])
+        for group in computer.findall(
+                "groups_accounts/computer_group_memberships/group"):
+            if ("computer_groups", group.text) in self._target_names:
+                target_keys.append(
+                    self._target_names[("computer_groups", group.text)])
+
+        included = set(self._all_computers)
+        excluded = set()
+        for target_key in target_keys:
+            included.update(self._targets.get(target_key, ()))
+            excluded.update(self._exclusions.get(target_key, ()))
+        return included - excluded
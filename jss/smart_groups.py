@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""smart_groups.py
+
+Class for previewing smart group membership locally, by evaluating
+SearchCriteria against cached Computer objects.
+"""
+
+
+from .jssobject import JSSGroupObject
+
+
+# Paths to the inventory data used by the JSS's criteria names. Any
+# other name is looked up as an extension attribute.
+CRITERIA_PATHS = {
+    "Computer Name": "general/name",
+    "Serial Number": "general/serial_number",
+    "UDID": "general/udid",
+    "Asset Tag": "general/asset_tag",
+    "IP Address": "general/ip_address",
+    "Last Reported IP Address": "general/last_reported_ip",
+    "MAC Address": "general/mac_address",
+    "Jamf Version": "general/jamf_version",
+    "JAMF Version": "general/jamf_version",
+    "Platform": "general/platform",
+    "Managed": "general/remote_management/managed",
+    "Site": "general/site/name",
+    "Username": "location/username",
+    "Full Name": "location/real_name",
+    "Email Address": "location/email_address",
+    "Position": "location/position",
+    "Department": "location/department",
+    "Building": "location/building",
+    "Room": "location/room",
+    "Model": "hardware/model",
+    "Model Identifier": "hardware/model_identifier",
+    "Operating System": "hardware/os_name",
+    "Operating System Version": "hardware/os_version",
+    "Operating System Build": "hardware/os_build",
+    "Architecture Type": "hardware/processor_architecture",
+    "Processor Type": "hardware/processor_type",
+    "Processor Speed MHz": "hardware/processor_speed_mhz",
+    "Number of Processors": "hardware/number_processors",
+    "Total RAM MB": "hardware/total_ram_mb",
+    "Application Title": "software/applications/application/name",
+    "Application Version": "software/applications/application/version",
+}
+
+GROUP_CRITERIA = ("Computer Group",)
+
+
+class _ColumnIndex(object):
+    """Inventory values for one criterion name across all computers.
+
+    Attributes:
+        lookup: Dict of lowercased value: set of computer IDs.
+    """
+
+    def __init__(self):
+        self.lookup = {}
+
+    def add(self, computer_id, values):
+        """Index a computer's values."""
+        for value in values:
+            self.lookup.setdefault(value, set()).add(computer_id)
+
+    def remove(self, computer_id):
+        """Remove a computer from the index."""
+        for value, computer_ids in self.lookup.items():
+            computer_ids.discard(computer_id)
+            if not computer_ids:
+                del self.lookup[value]
+
+    def matching(self, predicate):
+        """Return the set of IDs with any value passing predicate."""
+        result = set()
+        for value, computer_ids in self.lookup.items():
+            if predicate(value):
+                result.update(computer_ids)
+        return result
+
+
+def _to_number(value):
+    """Return value as a float, or None if it is not numeric."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class SmartGroupEvaluator(object):
+    """Evaluate smart group criteria against cached Computers.
+
+    Saving a smart ComputerGroup to see who it would include makes the
+    JSS recalculate its membership. The SmartGroupEvaluator instead
+    interprets the group's criteria locally, against full Computer
+    objects you have already retrieved (e.g. with retrieve_all, or
+    from a pickle).
+
+    Each criterion name used is indexed once, as a hash of each
+    distinct (lowercased) value to the set of computers having it.
+    Criteria then only have to test the distinct values, and are
+    combined with set operations, so previewing a group takes
+    milliseconds even for large fleets.
+
+    Supported search types are "is", "is not", "like", "not like",
+    "has", "does not have", "greater than", "less than", "greater than
+    or equal", "less than or equal", "member of", and "not member of".
+    Comparisons are case-insensitive, as they are on the JSS. Criteria
+    are combined in priority order, honoring parentheses, with "and"
+    taking precedence over "or".
+
+    Criterion names are mapped to inventory paths with CRITERIA_PATHS;
+    any other name is treated as an extension attribute name. "member
+    of" criteria require the referenced ComputerGroups to be provided.
+
+    This is a preview; the JSS remains the authority on membership, and
+    criteria that depend on data not in the cached Computers (or not
+    covered above) will not match.
+
+    Attributes:
+        criteria_paths: Dict of criterion name: Element.findall path.
+            Defaults to a copy of CRITERIA_PATHS; add to it for other
+            criteria.
+    """
+
+    def __init__(self, computers, groups=None):
+        """Create a SmartGroupEvaluator.
+
+        Args:
+            computers: Iterable of full Computer objects.
+            groups: Iterable of ComputerGroup objects which may be
+                referenced by "member of" criteria. Defaults to None.
+        """
+        self.criteria_paths = dict(CRITERIA_PATHS)
+        self._computers = {}
+        self._indexes = {}
+        self._groups = {}
+        for computer in computers:
+            self.add(computer)
+        for group in groups or []:
+            self.add_group(group)
+
+    @property
+    def computer_ids(self):
+        """Set of the IDs of all cached computers."""
+        return set(self._computers)
+
+    def add(self, computer):
+        """Add or replace a cached Computer.
+
+        Args:
+            computer: Full Computer object.
+        """
+        computer_id = int(computer.id)
+        if computer_id in self._computers:
+            self.remove(computer_id)
+        self._computers[computer_id] = computer
+        for name, index in self._indexes.items():
+            index.add(computer_id, self._values(computer, name))
+
+    def remove(self, computer_id):
+        """Remove a cached Computer by ID."""
+        computer_id = int(computer_id)
+        if self._computers.pop(computer_id, None) is not None:
+            for index in self._indexes.values():
+                index.remove(computer_id)
+
+    def add_group(self, group):
+        """Add or replace a ComputerGroup for "member of" criteria.
+
+        Args:
+            group: ComputerGroup object.
+        """
+        self._groups[group.name.lower()] = group
+
+    def _values(self, computer, name):
+        """Return a tuple of lowercased values of criterion name."""
+        path = self.criteria_paths.get(name)
+        if path:
+            elements = computer.findall(path)
+        else:
+            elements = [
+                attribute.find("value") for attribute in
+                computer.findall("extension_attributes/extension_attribute")
+                if attribute.findtext("name") == name]
+        return tuple((element.text or "").lower() for element in elements
+                     if element is not None)
+
+    def _get_index(self, name):
+        """Return the column index for a criterion name, building it if
+        this is the first use.
+        """
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = _ColumnIndex()
+            for computer_id, computer in self._computers.items():
+                index.add(computer_id, self._values(computer, name))
+        return index
+
+    def _group_members(self, group_name, evaluating):
+        """Return the set of IDs of members of a ComputerGroup."""
+        group = self._groups.get(group_name)
+        if group is None:
+            raise ValueError("ComputerGroup '%s' was not provided to the "
+                             "evaluator." % group_name)
+        if group.findtext("is_smart") == "true":
+            return self._evaluate_criteria(group.find("criteria"),
+                                           evaluating | {group_name})
+        return set(int(computer_id.text) for computer_id in
+                   group.findall("computers/computer/id"))
+
+    def _match(self, criterion, evaluating):
+        """Return the set of IDs matching a single criterion."""
+        name = criterion.findtext("name")
+        search_type = (criterion.findtext("search_type") or "").lower()
+        value = (criterion.findtext("value") or "").lower()
+
+        if name in GROUP_CRITERIA:
+            if value in evaluating:
+                raise ValueError("ComputerGroup '%s' is a member of itself."
+                                 % value)
+            members = self._group_members(value, evaluating)
+            if search_type == "member of":
+                return members
+            elif search_type == "not member of":
+                return self.computer_ids - members
+            raise ValueError("Unsupported search type '%s' for %s." %
+                             (search_type, name))
+
+        index = self._get_index(name)
+        if search_type in ("is", "is not"):
+            result = set(index.lookup.get(value, ()))
+            if value == "":
+                # Computers without the value at all also match "".
+                result |= self.computer_ids - index.matching(bool)
+        elif search_type in ("like", "not like", "has", "does not have"):
+            result = index.matching(lambda item: value in item)
+        elif search_type in ("greater than", "less than",
+                             "greater than or equal", "less than or equal"):
+            number = _to_number(value)
+            if number is None:
+                raise ValueError("Search type '%s' requires a number." %
+                                 search_type)
+            compare = {
+                "greater than": lambda item: item > number,
+                "less than": lambda item: item < number,
+                "greater than or equal": lambda item: item >= number,
+                "less than or equal": lambda item: item <= number,
+            }[search_type]
+            result = index.matching(
+                lambda item: _to_number(item) is not None and
+                compare(_to_number(item)))
+        else:
+            raise ValueError("Unsupported search type '%s'." % search_type)
+
+        if search_type in ("is not", "not like", "does not have"):
+            result = self.computer_ids - result
+        return result
+
+    def _evaluate_criteria(self, criteria, evaluating=frozenset()):
+        """Return the set of IDs matched by a criteria Element."""
+        if criteria is None:
+            return set()
+        # A group's criteria Element also holds a "size" Element.
+        criteria = sorted(
+            (crit for crit in criteria if crit.tag == "criterion"),
+            key=lambda crit: int(crit.findtext("priority") or 0))
+        if not criteria:
+            return set()
+
+        # Shunting-yard over the criteria, with "and" binding more
+        # tightly than "or".
+        precedence = {"or": 1, "and": 2}
+        operands = []
+        operators = []
+
+        def reduce_top():
+            """Apply the top operator to the top two operands."""
+            operator = operators.pop()
+            right = operands.pop()
+            left = operands.pop()
+            operands.append(left & right if operator == "and" else
+                            left | right)
+
+        for position, criterion in enumerate(criteria):
+            if position:
+                operator = (criterion.findtext("and_or") or "and").lower()
+                while (operators and operators[-1] != "(" and
+                       precedence[operators[-1]] >= precedence[operator]):
+                    reduce_top()
+                operators.append(operator)
+            if criterion.findtext("opening_paren") == "true":
+                operators.append("(")
+            operands.append(self._match(criterion, evaluating))
+            if criterion.findtext("closing_paren") == "true":
+                while operators[-1] != "(":
+                    reduce_top()
+                operators.pop()
+
+        while operators:
+            if operators[-1] == "(":
+                operators.pop()
+            else:
+                reduce_top()
+        return operands[0]
+
+    def evaluate(self, criteria):
+        """Return the IDs of computers matching smart group criteria.
+
+        Args:
+            criteria: A smart ComputerGroup, its "criteria" Element, or
+                an iterable of SearchCriteria (criterion) Elements.
+
+        Returns:
+            Sorted list of int computer IDs.
+        """
+        evaluating = frozenset()
+        if isinstance(criteria, JSSGroupObject):
+            if criteria.name:
+                evaluating = frozenset([criteria.name.lower()])
+            criteria = criteria.find("criteria")
+            if criteria is None:
+                return []
+        return sorted(self._evaluate_criteria(criteria, evaluating))
+
+    def computers(self, criteria):
+        """Return the cached Computers matching smart group criteria.
+
+        Args:
+            criteria: A smart ComputerGroup, its "criteria" Element, or
+                an iterable of SearchCriteria (criterion) Elements.
+        """
+        return [self._computers[computer_id] for computer_id in
+                self.evaluate(criteria)]
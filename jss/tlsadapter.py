@@ -23,7 +23,6 @@ import ssl
 
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.poolmanager import PoolManager
-from requests.packages.urllib3.contrib import pyopenssl
 
 
 # This is the list JAMF specifies here:
@@ -71,6 +70,8 @@ class TLSAdapter(HTTPAdapter):
 
     def init_poolmanager(self, connections, maxsize, block=False):
         """Set up a poolmanager to use TLS and our cipher list."""
+        # pyopenssl is slow to import, so wait until it's needed.
+        from requests.packages.urllib3.contrib import pyopenssl
         self.poolmanager = PoolManager(
             num_pools=connections, maxsize=maxsize, block=block,
             ssl_version=ssl.PROTOCOL_TLSv1_2)   # pylint: disable=no-member
@@ -20,13 +20,21 @@ Helper functions for python-jss.
 
 
 import copy
+import hashlib
 import os
 import re
+import threading
 from xml.etree import ElementTree
 
 
 PKG_TYPES = [".PKG", ".DMG", ".ZIP"]
 
+# Memoized hash_path results, keyed by (path, algorithm, signature),
+# and locks to keep threads from hashing the same file at once.
+_HASHES = {}
+_HASH_LOCKS = {}
+_HASH_LOCKS_LOCK = threading.Lock()
+
 
 def is_osx():
     """Convenience function for testing OS version."""
@@ -63,6 +71,78 @@ def is_script(filename):
     return not is_package(filename)
 
 
+def path_signature(path):
+    """Return a (size, mtime) tuple for a file or directory.
+
+    For directories, size is the total size of all files and symlinks
+    within, and mtime is the latest mtime of the directory or any file
+    within. Symlinks are not followed, and their own mtimes (which
+    can't be copied) are ignored.
+    """
+    stat = os.stat(path)
+    if not os.path.isdir(path):
+        return (stat.st_size, stat.st_mtime)
+    size, mtime = 0, stat.st_mtime
+    for filepath in _walk_files(path):
+        stat = os.lstat(filepath)
+        size += stat.st_size
+        if not os.path.islink(filepath):
+            mtime = max(mtime, stat.st_mtime)
+    return (size, mtime)
+
+
+def _walk_files(path):
+    """Yield the paths of the files and symlinks in a directory tree,
+    in sorted order, without following symlinks.
+    """
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        # Symlinks to directories are listed with the directories.
+        for name in sorted(filenames + [
+                name for name in dirnames
+                if os.path.islink(os.path.join(dirpath, name))]):
+            yield os.path.join(dirpath, name)
+
+
+def hash_path(path, algorithm="md5"):
+    """Return the hex digest of a file's or directory's contents.
+
+    Directories are hashed as their files' relative paths and
+    contents (or for symlinks, targets), in sorted order. Results are
+    memoized for as long as the path's size and mtime are unchanged,
+    so hashing the same package for several repositories only reads
+    it once.
+
+    Args:
+        path: String path to a file or directory.
+        algorithm: String hashlib algorithm name. Defaults to "md5".
+    """
+    key = (os.path.abspath(path), algorithm, path_signature(path))
+    with _HASH_LOCKS_LOCK:
+        lock = _HASH_LOCKS.setdefault(key[:2], threading.Lock())
+    with lock:
+        if key not in _HASHES:
+            digest = hashlib.new(algorithm)
+            if os.path.isdir(path):
+                for filepath in _walk_files(path):
+                    digest.update(os.path.relpath(filepath, path))
+                    if os.path.islink(filepath):
+                        digest.update(os.readlink(filepath))
+                    else:
+                        _update_digest(digest, filepath)
+            else:
+                _update_digest(digest, path)
+            _HASHES[key] = digest.hexdigest()
+    return _HASHES[key]
+
+
+def _update_digest(digest, path):
+    """Update a hashlib digest with a file's contents."""
+    with open(path, "rb") as ifile:
+        for chunk in iter(lambda: ifile.read(1024 * 1024), ""):
+            digest.update(chunk)
+
+
 def convert_response_to_text(response):
     """Convert a JSS HTML response to plaintext."""
     # Responses are sent as html. Split on the newlines and give us
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""upload.py
+
+Streaming file uploads to the JSS's dbfileupload endpoint, with
+progress reporting and retries.
+"""
+
+
+import os
+import time
+
+import requests
+
+from .bulk import (CREATE_RETRY_STATUS_CODES, RETRY_STATUS_CODES,
+                   is_create_retryable)
+from .exceptions import JSSPostError
+from .tools import error_handler, path_signature
+from .zipstream import ZipStream, prefetch
+
+
+# Report progress at most once per this many bytes sent (plus once at
+# the start and end of each attempt).
+PROGRESS_INTERVAL = 1024 * 1024
+
+
+class UploadProgress(object):
+    """The state of an upload, as passed to progress callbacks.
+
+    Attributes:
+        filename: String path of the file being uploaded.
+        total_bytes: Int size of the file (or, for directories, of the
+            files within).
+        bytes_sent: Int bytes read for sending so far, this attempt.
+        attempt: Int attempt number, starting at 1.
+        start_time: Float time the current attempt started.
+        done: Bool, True once the server has responded successfully.
+    """
+
+    def __init__(self, filename, total_bytes):
+        self.filename = filename
+        self.total_bytes = total_bytes
+        self.bytes_sent = 0
+        self.attempt = 0
+        self.start_time = time.time()
+        self.done = False
+
+    def __repr__(self):
+        return "<UploadProgress %s: %.1f%% at %.0f KB/s (attempt %s)>" % (
+            os.path.basename(self.filename), self.percent,
+            self.bytes_per_second / 1024, self.attempt)
+
+    @property
+    def elapsed(self):
+        """Return the float seconds since the current attempt began."""
+        return time.time() - self.start_time
+
+    @property
+    def percent(self):
+        """Return the float percentage of the file sent."""
+        if not self.total_bytes:
+            return 100.0
+        return 100.0 * self.bytes_sent / self.total_bytes
+
+    @property
+    def bytes_per_second(self):
+        """Return the float average throughput of the current attempt."""
+        elapsed = self.elapsed
+        return self.bytes_sent / elapsed if elapsed > 0 else 0.0
+
+
+class _ProgressReader(object):
+    """File wrapper which reports progress as it is read.
+
+    requests streams objects with a read method, rather than loading
+    them into memory, and takes the Content-Length from __len__.
+    """
+
+    def __init__(self, handle, progress, callback):
+        self._handle = handle
+        self._progress = progress
+        self._callback = callback
+        self._reported = 0
+
+    def __len__(self):
+        return self._progress.total_bytes
+
+    def read(self, size=-1):
+        """Read from the file, reporting progress."""
+        data = self._handle.read(size)
+        progress = self._progress
+        progress.bytes_sent += len(data)
+        if self._callback and (
+                not data or
+                progress.bytes_sent - self._reported >= PROGRESS_INTERVAL):
+            self._reported = progress.bytes_sent
+            self._callback(progress)
+        return data
+
+
+def _zip_body(path, progress, callback):
+    """Yield a zip of directory path, reporting progress as it goes.
+
+    requests sends generators with chunked transfer encoding, so the
+    zip's final size needn't be known in advance.
+    """
+    stream = ZipStream(path)
+    reported = 0
+    for chunk in prefetch(stream):
+        progress.bytes_sent = stream.bytes_read
+        if callback and (progress.bytes_sent - reported >=
+                         PROGRESS_INTERVAL):
+            reported = progress.bytes_sent
+            callback(progress)
+        yield chunk
+    if callback:
+        callback(progress)
+
+
+def upload_file(session, url, filename, headers, timeout=None, retries=2,
+                callback=None):
+    """POST a file to the JSS, streaming it from disk.
+
+    The file is read in blocks as it is sent, rather than all at once,
+    and closed when done. Directories (e.g. bundle-style packages) are
+    zipped as they are sent, without a temporary file; name them with
+    a ".zip" extension in headers.
+
+    dbfileupload has no way to resume a partial upload, so after a
+    connection error, timeout, or 5xx response the upload is restarted
+    from the beginning, after a backoff of 1s, 2s, 4s...
+
+    Uploads for a new object (an OBJECT_ID header of -1) create it, so
+    to avoid duplicates they are only restarted if they could not
+    connect, or got a 503 response (see bulk.is_create_retryable).
+
+    Args:
+        session: requests.Session to POST with.
+        url: String upload URL.
+        filename: String path to the file or directory.
+        headers: Dict of extra request headers.
+        timeout: Timeout for the requests, as for requests (a float, or
+            a (connect, read) tuple), or None (the default) to wait
+            indefinitely.
+        retries: Int number of times to restart a failed upload.
+            Defaults to 2.
+        callback: Function to call with an UploadProgress as the file
+            is sent (about every megabyte) and when it completes. Will
+            be called like:
+                `callback(progress)`
+            Defaults to None.
+
+    Returns:
+        The requests.Response for the successful attempt.
+
+    Raises:
+        JSSPostError (with a status_code attribute) if the final
+            attempt gets an error response.
+        requests.exceptions.ConnectionError or Timeout if the final
+            attempt fails with one.
+    """
+    is_directory = os.path.isdir(filename)
+    creates = int(headers.get("OBJECT_ID", -1)) < 0
+    retry_status_codes = (CREATE_RETRY_STATUS_CODES if creates else
+                          RETRY_STATUS_CODES)
+    progress = UploadProgress(filename, path_signature(filename)[0])
+    while True:
+        progress.attempt += 1
+        progress.bytes_sent = 0
+        progress.start_time = time.time()
+        try:
+            if is_directory:
+                response = session.post(
+                    url, data=_zip_body(filename, progress, callback),
+                    headers=headers, timeout=timeout)
+            else:
+                with open(filename, "rb") as handle:
+                    response = session.post(
+                        url, data=_ProgressReader(handle, progress, callback),
+                        headers=headers, timeout=timeout)
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as error:
+            if progress.attempt > retries or (
+                    creates and not is_create_retryable(error)):
+                raise
+        else:
+            if (response.status_code not in retry_status_codes or
+                    progress.attempt > retries):
+                if response.status_code >= 400:
+                    error_handler(JSSPostError, response)
+                progress.done = True
+                if callback:
+                    callback(progress)
+                return response
+        time.sleep(2 ** (progress.attempt - 1))
@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""zipstream.py
+
+Zip a directory (e.g. a bundle-style package) as a stream of chunks,
+without a temporary file.
+"""
+
+
+import os
+import Queue
+import stat
+import struct
+import threading
+import time
+import zipfile
+import zlib
+
+
+CHUNK_SIZE = 1024 * 1024
+
+# Sizes and offsets this large use zip64 records (as in zipfile).
+ZIP64_LIMIT = (1 << 31) - 1
+
+# Value of a 32 bit field whose real value is in a zip64 record.
+ZIP64_MARKER = 0xFFFFFFFF
+
+# General purpose flags: sizes and CRC follow the data in a data
+# descriptor, and names are UTF-8.
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+
+# "Version made by" upper byte for Unix, so that modes are restored.
+MADE_BY_UNIX = 3 << 8
+
+
+class ZipStream(object):
+    """Iterable zip archive of a directory, produced as it is read.
+
+    zipfile needs to seek back to write each member's sizes and CRC,
+    so it can't write to a socket. ZipStream instead writes them after
+    each member's data, in a data descriptor (as zip allows for
+    streamed archives), and keeps the central directory in memory
+    until the end. Zip64 records are used for members, offsets, or
+    member counts too large for a classic zip.
+
+    Members are named relative to the directory's parent, so that
+    zipping "Foo.pkg" unzips to "Foo.pkg". Unix modes and symlinks are
+    preserved.
+
+    Attributes:
+        path: String path to the directory.
+        compression: zipfile.ZIP_DEFLATED (default) or ZIP_STORED.
+        bytes_read: Int bytes of file data read so far.
+    """
+
+    def __init__(self, path, compression=zipfile.ZIP_DEFLATED):
+        self.path = os.path.abspath(path)
+        self.compression = compression
+        self.bytes_read = 0
+
+    def __iter__(self):
+        offset = 0
+        central_directory = []
+        for path in self._walk():
+            local_header, data, entry = self._member(path, offset)
+            offset += len(local_header)
+            yield local_header
+            for chunk in data:
+                offset += len(chunk)
+                yield chunk
+            central_directory.append(entry)
+        yield self._end_records(central_directory, offset)
+
+    def _walk(self):
+        """Yield the paths to archive, in order, parents first."""
+        yield self.path
+        for dirpath, dirnames, filenames in os.walk(self.path):
+            dirnames.sort()
+            for name in sorted(dirnames + filenames):
+                yield os.path.join(dirpath, name)
+
+    def _member(self, path, offset):
+        """Return the parts of one archive member.
+
+        Returns:
+            Tuple of (local header string, iterable of data strings,
+            which ends with the data descriptor, and a dict of the
+            values for its central directory entry).
+        """
+        stats = os.lstat(path)
+        name = os.path.relpath(path, os.path.dirname(self.path))
+        name = name.replace(os.sep, "/")
+        is_dir = stat.S_ISDIR(stats.st_mode)
+        if is_dir:
+            name += "/"
+            method = zipfile.ZIP_STORED
+        elif stat.S_ISLNK(stats.st_mode):
+            method = zipfile.ZIP_STORED
+        else:
+            method = self.compression
+        # Compressed data can be a little larger than the input.
+        zip64 = stats.st_size + stats.st_size // 100 + 1024 > ZIP64_LIMIT
+        flags = 0 if is_dir else FLAG_DATA_DESCRIPTOR
+        try:
+            name.decode("ascii")
+        except UnicodeDecodeError:
+            flags |= FLAG_UTF8
+        dos_time, dos_date = _dos_time(stats.st_mtime)
+        external_attr = (stats.st_mode & 0xFFFF) << 16
+        if is_dir:
+            # MS-DOS directory attribute.
+            external_attr |= 0x10
+
+        entry = {"name": name, "flags": flags, "method": method,
+                 "time": dos_time, "date": dos_date, "crc": 0,
+                 "compressed_size": 0, "size": 0, "offset": offset,
+                 "external_attr": external_attr,
+                 "version": 45 if zip64 else 20}
+        if zip64:
+            extra = struct.pack("<HHQQ", 1, 16, 0, 0)
+            header_size = ZIP64_MARKER
+        else:
+            extra = ""
+            header_size = 0
+        local_header = struct.pack(
+            "<IHHHHHIIIHH", 0x04034b50, entry["version"], flags, method,
+            dos_time, dos_date, 0, header_size, header_size, len(name),
+            len(extra)) + name + extra
+        if is_dir:
+            data = ()
+        else:
+            data = self._data(path, stats, entry, zip64)
+        return local_header, data, entry
+
+    def _data(self, path, stats, entry, zip64):
+        """Yield a file's (or symlink's target's) compressed data, then
+        its data descriptor, filling in entry's sizes and CRC."""
+        if entry["method"] == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(
+                zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        else:
+            compressor = None
+        crc = 0
+        if stat.S_ISLNK(stats.st_mode):
+            chunks = [os.readlink(path)]
+        else:
+            chunks = _read_chunks(path)
+        for chunk in chunks:
+            self.bytes_read += len(chunk)
+            entry["size"] += len(chunk)
+            crc = zlib.crc32(chunk, crc)
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                entry["compressed_size"] += len(chunk)
+                yield chunk
+        if compressor:
+            chunk = compressor.flush()
+            entry["compressed_size"] += len(chunk)
+            yield chunk
+        entry["crc"] = crc & 0xFFFFFFFF
+
+        if zip64:
+            yield struct.pack("<IIQQ", 0x08074b50, entry["crc"],
+                              entry["compressed_size"], entry["size"])
+        elif max(entry["size"], entry["compressed_size"]) > ZIP64_LIMIT:
+            raise IOError("%s grew while being zipped." % path)
+        else:
+            yield struct.pack("<IIII", 0x08074b50, entry["crc"],
+                              entry["compressed_size"], entry["size"])
+
+    @staticmethod
+    def _end_records(central_directory, offset):
+        """Return the central directory and end of archive records."""
+        records = []
+        for entry in central_directory:
+            # Zip64 extra values, in the order the format requires,
+            # for only the fields which overflow.
+            zip64_values = []
+            sizes = []
+            for key in ("size", "compressed_size", "offset"):
+                if entry[key] > ZIP64_LIMIT or (
+                        key != "offset" and entry["version"] == 45):
+                    zip64_values.append(entry[key])
+                    sizes.append(ZIP64_MARKER)
+                else:
+                    sizes.append(entry[key])
+            if zip64_values:
+                extra = struct.pack("<HH", 1, 8 * len(zip64_values))
+                extra += struct.pack("<%dQ" % len(zip64_values),
+                                     *zip64_values)
+                version = 45
+            else:
+                extra = ""
+                version = entry["version"]
+            records.append(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014b50, MADE_BY_UNIX | version,
+                version, entry["flags"], entry["method"], entry["time"],
+                entry["date"], entry["crc"], sizes[1], sizes[0],
+                len(entry["name"]), len(extra), 0, 0, 0,
+                entry["external_attr"], sizes[2]) + entry["name"] + extra)
+
+        directory = "".join(records)
+        count = len(central_directory)
+        size = len(directory)
+        if count >= 0xFFFF or size > ZIP64_LIMIT or offset > ZIP64_LIMIT:
+            directory += struct.pack(
+                "<IQHHIIQQQQ", 0x06064b50, 44, MADE_BY_UNIX | 45, 45, 0, 0,
+                count, count, size, offset)
+            directory += struct.pack("<IIQI", 0x07064b50, 0, offset + size, 1)
+            count = min(count, 0xFFFF)
+            size = ZIP64_MARKER if size > ZIP64_LIMIT else size
+            offset = ZIP64_MARKER if offset > ZIP64_LIMIT else offset
+        directory += struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, count,
+                                 count, size, offset, 0)
+        return directory
+
+
+def _read_chunks(path):
+    """Yield a file's contents in CHUNK_SIZE pieces."""
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), ""):
+            yield chunk
+
+
+def _dos_time(mtime):
+    """Return the (time, date) MS-DOS timestamp zip uses for mtime."""
+    local = time.localtime(mtime)
+    if local.tm_year < 1980:
+        return (0, (1 << 5) | 1)
+    return ((local.tm_hour << 11) | (local.tm_min << 5) | (local.tm_sec // 2),
+            ((local.tm_year - 1980) << 9) | (local.tm_mon << 5) |
+            local.tm_mday)
+
+
+def prefetch(iterable, depth=4):
+    """Iterate over iterable in a background thread.
+
+    For example, lets a ZipStream read and compress the next chunks
+    while the last ones are being sent (zlib and socket I/O both run
+    without the GIL). Exceptions are re-raised in the consumer.
+
+    Args:
+        iterable: The iterable to consume.
+        depth: Int number of items to produce ahead. Defaults to 4.
+    """
+    items = Queue.Queue(depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        """Put item on the queue, unless the consumer has stopped."""
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def produce():
+        """Put each item, then done (or an exception), on the queue."""
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as error:  # pylint: disable=broad-except
+            put((None, error))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        # If the consumer stops early, let the producer exit.
+        stop.set()
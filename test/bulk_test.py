@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""Tests for bulk operations and their retries.
+
+Requests are answered by a stand-in server, so no JSS is needed.
+
+"""
+
+
+import threading
+
+import requests
+from requests.packages.urllib3.exceptions import (MaxRetryError,
+                                                  NewConnectionError)
+
+from nose.tools import *
+
+from jss import Building
+from jss.bulk import is_create_retryable, is_retryable, run_bulk
+
+from fake_jss import fake_jss
+
+
+def connect_error():
+    """Return the error requests raises when it can't connect."""
+    reason = NewConnectionError(None, "Connection refused")
+    return requests.exceptions.ConnectionError(
+        MaxRetryError(None, "/", reason))
+
+
+class FakeServer(object):
+    """Answers Building requests, first failing with each of the
+    errors (exceptions, or status codes) given for an HTTP method.
+    """
+
+    def __init__(self, **errors):
+        self.errors = {method.upper(): list(method_errors)
+                       for method, method_errors in errors.items()}
+        self.methods = []
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, body):
+        with self.lock:
+            self.methods.append(method)
+            if self.errors.get(method):
+                error = self.errors[method].pop(0)
+                if isinstance(error, Exception):
+                    return error
+                return (error, "<html><body>Error</body></html>")
+            if method == "POST":
+                return (201, "<building><id>%s</id></building>" %
+                        self.count("POST"))
+            return (200, "<building><id>%s</id><name>Building</name>"
+                    "</building>" % url.rsplit("/", 1)[1])
+
+    def count(self, method):
+        """Return the number of requests made with method."""
+        return self.methods.count(method)
+
+
+class TestRetries(object):
+
+    def test_is_retryable(self):
+        assert_true(is_retryable(requests.exceptions.ReadTimeout()))
+        assert_true(is_retryable(connect_error()))
+        assert_false(is_retryable(ValueError()))
+
+    def test_is_create_retryable(self):
+        assert_true(is_create_retryable(connect_error()))
+        assert_true(is_create_retryable(requests.exceptions.ConnectTimeout()))
+        assert_false(is_create_retryable(requests.exceptions.ReadTimeout()))
+        assert_false(is_create_retryable(
+            requests.exceptions.ConnectionError("Connection aborted.")))
+
+    def test_run_bulk_retries(self):
+        attempts = []
+
+        def fail_once(item):
+            attempts.append(item)
+            if attempts.count(item) == 1:
+                raise requests.exceptions.ReadTimeout()
+            return item
+
+        results = run_bulk(fail_once, [1, 2], retries=1)
+        assert_equal([result.value for result in results], [1, 2])
+        assert_equal([result.attempts for result in results], [2, 2])
+
+    def test_run_bulk_retryable(self):
+        def fail(item):
+            raise requests.exceptions.ReadTimeout()
+
+        results = run_bulk(fail, [1], retryable=lambda error, item: False)
+        assert_equal(results[0].attempts, 1)
+
+
+class TestBulkCreate(object):
+
+    def test_create(self):
+        server = FakeServer()
+        jss = fake_jss(server)
+        ids, errors = jss.bulk_create(
+            Building, [{"name": "A"}, {"name": "B"}], workers=1)
+        assert_equal(ids, {0: 1, 1: 2})
+        assert_equal(errors, {})
+
+    def test_no_retry_after_read_timeout(self):
+        server = FakeServer(post=[requests.exceptions.ReadTimeout()])
+        ids, errors = fake_jss(server).bulk_create(Building, [{"name": "A"}])
+        assert_equal(server.count("POST"), 1)
+        assert_is_instance(errors[0], requests.exceptions.ReadTimeout)
+
+    def test_no_retry_after_500(self):
+        server = FakeServer(post=[500])
+        ids, errors = fake_jss(server).bulk_create(Building, [{"name": "A"}])
+        assert_equal(server.count("POST"), 1)
+        assert_equal(ids, {})
+
+    def test_retry_after_connect_error(self):
+        server = FakeServer(post=[connect_error(), 503])
+        ids, errors = fake_jss(server).bulk_create(Building, [{"name": "A"}])
+        assert_equal(server.count("POST"), 3)
+        assert_equal(ids, {0: 3})
+
+
+class TestBulkSave(object):
+
+    def test_new_object_not_posted_again_after_get_fails(self):
+        server = FakeServer(get=[connect_error()])
+        jss = fake_jss(server)
+        building = Building(jss, "New")
+        results = jss.bulk_save([building])
+        assert_true(results[0].ok, results[0].error)
+        assert_equal(server.count("POST"), 1)
+        assert_equal(server.count("GET"), 2)
+        assert_equal(building.id, "1")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+"""Tests for dependency_graph.
+
+These use Policies and ComputerGroups built from JSS API XML, or
+served by a stand-in server, so no JSS is needed.
+
+"""
+
+
+import os
+import shutil
+import tempfile
+from xml.etree import ElementTree
+
+from nose.tools import *
+
+from jss import ComputerGroup, Package, Policy
+from jss.dependency_graph import DependencyGraph
+
+from fake_jss import fake_jss
+
+
+POLICY = """<policy>
+  <general>
+    <id>%s</id><name>%s</name>
+    <category><id>%s</id><name>Category %s</name></category>
+  </general>
+  <package_configuration><packages>%s</packages></package_configuration>
+  <scripts>%s</scripts>
+  <scope>
+    <computer_groups>%s</computer_groups>
+    <exclusions><computer_groups>%s</computer_groups></exclusions>
+  </scope>
+</policy>"""
+
+GROUP = """<computer_group>
+  <id>%s</id>
+  <name>%s</name>
+  <is_smart>true</is_smart>
+  <criteria>%s</criteria>
+</computer_group>"""
+
+CRITERION = """<criterion>
+  <name>%s</name><priority>0</priority><and_or>and</and_or>
+  <search_type>member of</search_type><value>%s</value>
+</criterion>"""
+
+
+def references(tag, ids):
+    """Return XML for references to objects with ids."""
+    return "".join("<%s><id>%s</id><name>%s %s</name></%s>" % (
+        tag, id_, tag, id_, tag) for id_ in ids)
+
+
+def policy_xml(id_, category=-1, packages=(), scripts=(), groups=(),
+               excluded_groups=()):
+    """Return a Policy's XML."""
+    return POLICY % (id_, "Policy %s" % id_, category, category,
+                     references("package", packages),
+                     references("script", scripts),
+                     references("computer_group", groups),
+                     references("computer_group", excluded_groups))
+
+
+def make_policy(*args, **kwargs):
+    """Return a Policy as retrieved from the JSS."""
+    return Policy(None, ElementTree.fromstring(policy_xml(*args, **kwargs)))
+
+
+def group_xml(id_, name, *criteria):
+    """Return a ComputerGroup's XML, with (name, value) criteria."""
+    return GROUP % (id_, name, "".join(CRITERION % criterion for
+                                       criterion in criteria))
+
+
+def make_group(*args):
+    """Return a ComputerGroup as retrieved from the JSS."""
+    return ComputerGroup(None, ElementTree.fromstring(group_xml(*args)))
+
+
+class TestDependencyGraph(object):
+
+    def setup(self):
+        self.graph = DependencyGraph()
+        self.graph.add(make_group(4, "Lab"))
+        self.graph.add(make_group(5, "Lab Macs", ("Computer Group", "Lab"),
+                                  ("Operating System", "10.12")))
+        self.graph.add(make_policy(1, category=3, packages=[10, 11],
+                                   scripts=[20], groups=[5],
+                                   excluded_groups=[4]))
+        self.graph.add(make_policy(2, packages=[10]))
+
+    def test_needs(self):
+        assert_equal(self.graph.needs(("Policy", 1)),
+                     {("Category", 3), ("Package", 10), ("Package", 11),
+                      ("Script", 20), ("ComputerGroup", 5),
+                      ("ComputerGroup", 4)})
+        assert_equal(self.graph.needs(("Policy", 2)), {("Package", 10)})
+        assert_equal(self.graph.needs(("ComputerGroup", "5")),
+                     {("ComputerGroup", 4)})
+
+    def test_used_by(self):
+        assert_equal(self.graph.used_by(("Package", 10)),
+                     {("Policy", 1), ("Policy", 2)})
+        assert_equal(self.graph.used_by(("ComputerGroup", 4)),
+                     {("Policy", 1), ("ComputerGroup", 5)})
+        package = Package(None, ElementTree.fromstring(
+            "<package><id>11</id><name>Package 11</name></package>"))
+        assert_equal(self.graph.used_by(package), {("Policy", 1)})
+
+    def test_names(self):
+        assert_equal(self.graph.names[("Package", 10)], "package 10")
+        assert_equal(self.graph.names[("Policy", 2)], "Policy 2")
+
+    def test_add_replaces(self):
+        self.graph.add(make_policy(1, packages=[12]))
+        assert_equal(self.graph.needs(("Policy", 1)), {("Package", 12)})
+        assert_equal(self.graph.used_by(("Package", 11)), set())
+        assert_equal(self.graph.used_by(("Package", 10)), {("Policy", 2)})
+
+    def test_remove(self):
+        self.graph.remove(("Policy", 2))
+        assert_equal(self.graph.used_by(("Package", 10)), {("Policy", 1)})
+        assert_false(("Policy", 2) in self.graph.names)
+        # Edges into a removed object are kept.
+        self.graph.remove(("ComputerGroup", 4))
+        assert_equal(self.graph.used_by(("ComputerGroup", 4)),
+                     {("Policy", 1), ("ComputerGroup", 5)})
+
+    def test_other_objects_ignored(self):
+        self.graph.add(Package(None, "Pkg"))
+        assert_equal(self.graph.needs(("Package", 10)), set())
+
+    def test_unused(self):
+        assert_equal(self.graph.unused("Package", [10, 11, 12, "13"]),
+                     [12, 13])
+
+    def test_pickle(self):
+        root = tempfile.mkdtemp()
+        try:
+            path = os.path.join(root, "graph.pickle")
+            self.graph.pickle(path)
+            graph = DependencyGraph.from_pickle(path)
+        finally:
+            shutil.rmtree(root)
+        assert_equal(graph.used_by(("Package", 10)),
+                     {("Policy", 1), ("Policy", 2)})
+
+
+class TestDependencyGraphBuild(object):
+
+    def handler(self, method, url, body):
+        """Serve one Policy and two ComputerGroups, and accept changes."""
+        if url.endswith("/policies"):
+            return (200, "<policies><size>1</size><policy><id>1</id>"
+                    "<name>Policy 1</name></policy></policies>")
+        elif url.endswith("/computergroups"):
+            return (200, "<computer_groups><size>2</size>%s%s"
+                    "</computer_groups>" % (
+                        "<computer_group><id>5</id><name>Lab Macs</name>"
+                        "</computer_group>",
+                        "<computer_group><id>4</id><name>Lab</name>"
+                        "</computer_group>"))
+        elif url.endswith("/policies/id/1"):
+            return (200, policy_xml(1, groups=[5]))
+        elif url.endswith("/computergroups/id/5"):
+            return (200, group_xml(5, "Lab Macs", ("Computer Group", "Lab")))
+        return (200, group_xml(4, "Lab"))
+
+    def test_build(self):
+        graph = DependencyGraph()
+        graph.build(fake_jss(self.handler), workers=2)
+        assert_equal(graph.used_by(("ComputerGroup", 5)), {("Policy", 1)})
+        # Lab Macs is retrieved before Lab, but refers to it by name.
+        assert_equal(graph.used_by(("ComputerGroup", 4)),
+                     {("ComputerGroup", 5)})
+
+    def test_register(self):
+        jss = fake_jss(self.handler)
+        graph = DependencyGraph()
+        graph.register(jss)
+        policy = make_policy(1)
+        policy.jss = jss
+        policy.save()
+        assert_equal(graph.needs(("Policy", 1)), {("ComputerGroup", 5)})
+        policy.delete()
+        assert_equal(graph.needs(("Policy", 1)), set())
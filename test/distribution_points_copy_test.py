@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Tests for copying to several repositories at once.
+
+Repositories are configured from repo_prefs: Local ones in a temporary
+directory, and JDSs whose requests are answered by a stand-in server,
+so no JSS or file share is needed.
+
+"""
+
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from nose.tools import *
+
+from jss import JSSCopyError, JSSPostError
+from jss.distribution_points import DistributionPoints
+
+from fake_jss import fake_jss
+
+
+class Concurrency(object):
+    """Records the most calls in progress at once."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.1)
+        with self.lock:
+            self.active -= 1
+
+
+class TestCopy(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.filename = os.path.join(self.root, "Test.pkg")
+        with open(self.filename, "w") as handle:
+            handle.write("python-jss")
+        self.uploads = Concurrency()
+        self.sessions = []
+        repo_prefs = [{"type": "JDS"} for _ in range(3)]
+        for name in ("one", "two"):
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.join(path, "Packages"))
+            repo_prefs.append(
+                {"type": "Local", "mount_point": path, "share_name": name})
+        self.jss = fake_jss(self.handler, repo_prefs=repo_prefs)
+        self.dps = DistributionPoints(
+            self.jss, cache_path=os.path.join(self.root, "cache.plist"))
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def handler(self, method, url, body):
+        """Accept uploads, recording their Sessions."""
+        self.sessions.append(id(self.jss.session))
+        self.uploads()
+        return (201, "")
+
+    def test_copy_to_all(self):
+        results = self.dps.copy(self.filename)
+        assert_equal([result.value for result in results], [True] * 5)
+        assert_equal(len(self.sessions), 3)
+        for name in ("one", "two"):
+            assert_true(os.path.isfile(
+                os.path.join(self.root, name, "Packages", "Test.pkg")))
+
+    def test_repositories_copy_concurrently(self):
+        repos = Concurrency()
+        self.dps.copy(self.filename, pre_callback=repos)
+        assert_equal(repos.peak, 5)
+        assert_equal(self.uploads.peak, 3)
+
+    def test_session_not_shared_between_threads(self):
+        self.dps.copy(self.filename)
+        assert_equal(len(set(self.sessions)), 3)
+        assert_false(id(self.jss.session) in self.sessions)
+
+    def test_failure_raised_after_all_copies(self):
+        shutil.rmtree(os.path.join(self.root, "one", "Packages"))
+        try:
+            self.dps.copy_pkg(self.filename)
+        except JSSCopyError as error:
+            assert_equal([result.ok for result in error.results],
+                         [True, True, True, False, True])
+        else:
+            raise AssertionError("JSSCopyError not raised")
+        assert_true(os.path.isfile(
+            os.path.join(self.root, "two", "Packages", "Test.pkg")))
+
+    def test_upload_error_response_raised(self):
+        self.jss._adapter.handler = lambda method, url, body: (500, "")
+        with assert_raises(JSSCopyError) as context:
+            self.dps.copy_pkg(self.filename)
+        errors = [result.error for result in context.exception.results]
+        assert_true(all(isinstance(error, JSSPostError)
+                        for error in errors[:3]))
+        assert_equal(errors[3:], [None, None])
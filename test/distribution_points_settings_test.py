@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Tests for caching auto-configured distribution point settings.
+
+DistributionPoint objects come from a stand-in server, so no JSS or
+file share is needed.
+
+"""
+
+
+import os
+import plistlib
+import shutil
+import tempfile
+
+from nose.tools import *
+
+from jss import distribution_points, Building
+from jss.distribution_points import DistributionPoints
+
+from fake_jss import fake_jss, URL
+
+
+LISTING = """<distribution_points>
+  <size>1</size>
+  <distribution_point><id>1</id><name>Share</name></distribution_point>
+</distribution_points>"""
+
+DISTRIBUTION_POINT = """<distribution_point>
+  <id>1</id>
+  <name>Share</name>
+  <ip_address>127.0.0.1</ip_address>
+  <connection_type>SMB</connection_type>
+  <share_name>CasperShare</share_name>
+  <workgroup_or_domain>EXAMPLE</workgroup_or_domain>
+  <share_port>445</share_port>
+  <read_write_username>casperadmin</read_write_username>
+</distribution_point>"""
+
+
+class TestSettingsCache(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.root, "distribution_points.plist")
+        self.gets = []
+        self.jss = fake_jss(self.handler, repo_prefs=[
+            {"name": "Share", "password": "password"}])
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def handler(self, method, url, body):
+        """Serve the one DistributionPoint, and accept saves."""
+        if method == "GET":
+            self.gets.append(url)
+            if url.endswith("/distributionpoints"):
+                return (200, LISTING)
+            return (200, DISTRIBUTION_POINT)
+        return (201, DISTRIBUTION_POINT)
+
+    def make_distribution_points(self):
+        return DistributionPoints(self.jss, cache_path=self.cache_path)
+
+    def test_settings_cached(self):
+        dps = self.make_distribution_points()
+        assert_equal(dps._children[0].connection["share_name"],
+                     "CasperShare")
+        assert_equal(len(self.gets), 2)
+        self.make_distribution_points()
+        assert_equal(len(self.gets), 2)
+
+    def test_settings_expire(self):
+        self.make_distribution_points()
+        cache = plistlib.readPlist(self.cache_path)
+        cache[URL]["Share"]["cache_time"] -= (
+            distribution_points.SETTINGS_TTL + 1)
+        plistlib.writePlist(cache, self.cache_path)
+        self.make_distribution_points()
+        assert_equal(len(self.gets), 4)
+
+    def test_saving_distribution_point_discards_settings(self):
+        self.make_distribution_points()
+        self.jss.DistributionPoint(1).save()
+        assert_false(URL in plistlib.readPlist(self.cache_path))
+
+    def test_other_saves_ignored(self):
+        self.make_distribution_points()
+        self.jss.factory.get_object(Building, 1).save()
+        assert_true("Share" in plistlib.readPlist(self.cache_path)[URL])
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""A JSS whose requests are answered by a function rather than a
+server, for tests which need no real JSS.
+
+The function is installed as the JSS's transport adapter, so it is used
+by the main Session and by every thread's Session.
+"""
+
+
+import requests
+from requests.adapters import BaseAdapter
+
+from jss import JSS
+
+
+URL = "https://jss.example.com:8443"
+
+
+class FakeAdapter(BaseAdapter):
+    """Transport adapter which calls handler for each request.
+
+    handler is called like `handler(method, url, body)`, where body is
+    the full request body as a string (streamed bodies are read), and
+    returns a (status code, text) tuple, or an exception to raise.
+    """
+
+    def __init__(self, handler):
+        super(FakeAdapter, self).__init__()
+        self.handler = handler
+
+    def send(self, request, **kwargs):
+        body = request.body
+        if hasattr(body, "read"):
+            body = "".join(iter(lambda: body.read(64 * 1024), ""))
+        elif body is not None and not isinstance(body, basestring):
+            body = "".join(body)
+        result = self.handler(request.method, request.url, body)
+        if isinstance(result, Exception):
+            raise result
+        response = requests.Response()
+        response.status_code, response._content = result
+        response.encoding = "utf-8"
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def fake_jss(handler, **kwargs):
+    """Return a JSS whose requests are answered by handler."""
+    jss = JSS(url=URL, user="user", password="password", **kwargs)
+    # pylint: disable=protected-access
+    jss._adapter = FakeAdapter(handler)
+    jss.session.mount(jss.base_url, jss._adapter)
+    return jss
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+"""Tests for file share repositories.
+
+These run against LocalRepositories in a temporary directory, so no
+JSS or file share is needed.
+
+"""
+
+
+import os
+import shutil
+import tempfile
+import time
+
+from nose.tools import *
+
+from jss import distribution_point, LocalRepository
+from jss.bulk import run_bulk
+
+
+def write(path, contents="python-jss"):
+    """Write a file, creating its directory if needed."""
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, "w") as handle:
+        handle.write(contents)
+
+
+def make_bundle(path):
+    """Make a bundle package with framework-style symlinks."""
+    versions = os.path.join(path, "Contents", "Versions")
+    write(os.path.join(versions, "A", "Resources", "Info.plist"))
+    write(os.path.join(versions, "A", "Framework"), "binary")
+    os.symlink("A", os.path.join(versions, "Current"))
+    os.symlink("Versions/Current/Resources",
+               os.path.join(path, "Contents", "Resources"))
+    os.symlink("Versions/Current/Framework",
+               os.path.join(path, "Contents", "Framework"))
+
+
+class TestSkipIdentical(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.repo_path = os.path.join(self.root, "repo")
+        for folder in ("Packages", "Scripts"):
+            os.makedirs(os.path.join(self.repo_path, folder))
+        self.repo = LocalRepository(mount_point=self.repo_path,
+                                    share_name="repo", skip_identical=True)
+        self.package = os.path.join(self.root, "Test.pkg")
+        write(self.package)
+        self.bundle = os.path.join(self.root, "Bundle.pkg")
+        make_bundle(self.bundle)
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def test_skip_identical_file(self):
+        assert_true(self.repo.copy_pkg(self.package, -1))
+        assert_false(self.repo.copy_pkg(self.package, -1))
+        write(self.package, "changed")
+        assert_true(self.repo.copy_pkg(self.package, -1))
+
+    def test_skip_identical_bundle_with_symlinks(self):
+        assert_true(self.repo.copy_pkg(self.bundle, -1))
+        copy = os.path.join(self.repo_path, "Packages", "Bundle.pkg")
+        assert_true(os.path.islink(
+            os.path.join(copy, "Contents", "Versions", "Current")))
+        assert_false(self.repo.copy_pkg(self.bundle, -1))
+
+    def test_recopy_changed_bundle(self):
+        self.repo.copy_pkg(self.bundle, -1)
+        write(os.path.join(self.bundle, "Contents", "Versions", "A",
+                           "Framework"), "changed binary")
+        assert_true(self.repo.copy_pkg(self.bundle, -1))
+        with open(os.path.join(self.repo_path, "Packages", "Bundle.pkg",
+                               "Contents", "Framework")) as handle:
+            assert_equal(handle.read(), "changed binary")
+
+
+    def test_no_source_rehash(self):
+        hashed = []
+        hash_path = distribution_point.hash_path
+        distribution_point.hash_path = lambda path: (
+            hashed.append(path) or hash_path(path))
+        try:
+            self.repo.copy_pkg(self.package, -1)
+            assert_equal(hashed, [])
+            write(self.package, "python-JSS")
+            self.repo.copy_pkg(self.package, -1)
+        finally:
+            distribution_point.hash_path = hash_path
+        # The copy's hash, and the source's once, to compare.
+        assert_equal(len(hashed), 2)
+        assert_false(self.repo.copy_pkg(self.package, -1))
+
+    def test_failed_copy_keeps_existing(self):
+        self.repo.copy_pkg(self.bundle, -1)
+        copy_tree = distribution_point.copy_tree
+
+        def fail(source, destination):
+            copy_tree(source, destination)
+            raise OSError("Copy failed")
+
+        distribution_point.copy_tree = fail
+        try:
+            write(os.path.join(self.bundle, "Contents", "Versions", "A",
+                               "Framework"), "changed binary")
+            assert_raises(OSError, self.repo.copy_pkg, self.bundle, -1)
+        finally:
+            distribution_point.copy_tree = copy_tree
+        packages = os.path.join(self.repo_path, "Packages")
+        with open(os.path.join(packages, "Bundle.pkg", "Contents",
+                               "Framework")) as handle:
+            assert_equal(handle.read(), "binary")
+        assert_equal(sorted(os.listdir(packages)),
+                     [distribution_point.MANIFEST_NAME, "Bundle.pkg"])
+
+    def test_concurrent_copies_all_recorded(self):
+        packages = []
+        for index in range(16):
+            packages.append(os.path.join(self.root, "%s.pkg" % index))
+            write(packages[-1], str(index))
+        results = run_bulk(lambda path: self.repo.copy_pkg(path, -1),
+                           packages, workers=8)
+        assert_true(all(result.value for result in results))
+        manifest = distribution_point._read_manifest(
+            os.path.join(self.repo_path, "Packages"))
+        assert_equal(len(manifest), 16)
+
+
+class TestManifest(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        for path in ("Packages/Test.pkg", "Packages/Bundle.pkg/Contents/a",
+                     "Scripts/test.sh"):
+            write(os.path.join(self.root, path))
+        self.repo = LocalRepository(mount_point=self.root, share_name="test")
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def test_manifest(self):
+        manifest = self.repo.manifest("Packages")
+        assert_equal(sorted(manifest), ["Bundle.pkg", "Test.pkg"])
+        assert_equal(manifest["Test.pkg"]["size"], len("python-jss"))
+        assert_false(manifest["Test.pkg"]["is_dir"])
+        assert_true(manifest["Bundle.pkg"]["is_dir"])
+        assert_equal(self.repo.manifest("Missing"), {})
+
+    def test_exists(self):
+        assert_true(self.repo.exists("Test.pkg"))
+        assert_true(self.repo.exists("Bundle.pkg"))
+        assert_true(self.repo.exists("test.sh"))
+        assert_false(self.repo.exists("Other.pkg"))
+
+    def test_exists_follows_filesystem_case(self):
+        # True on filesystems which ignore case, like HFS+ and SMB.
+        assert_equal(self.repo.exists("test.pkg"), os.path.exists(
+            os.path.join(self.root, "Packages", "test.pkg")))
+
+    def test_exists_many(self):
+        assert_equal(
+            self.repo.exists_many(["Test.pkg", "test.sh", "Other.pkg"]),
+            {"Test.pkg": True, "test.sh": True, "Other.pkg": False})
+
+    def test_copy_and_delete_update_manifest(self):
+        self.repo.manifest("Packages")
+        new = os.path.join(self.root, "New.pkg")
+        write(new)
+        self.repo.copy_pkg(new, -1)
+        assert_true(self.repo.exists("New.pkg"))
+        self.repo.delete("New.pkg")
+        assert_false(self.repo.exists("New.pkg"))
+
+    def test_changes_made_elsewhere(self):
+        self.repo.manifest("Packages")
+        os.remove(os.path.join(self.root, "Packages", "Test.pkg"))
+        assert_false(self.repo.exists("Test.pkg"))
+        write(os.path.join(self.root, "Packages", "Other.pkg"))
+        assert_true("Other.pkg" in self.repo.manifest("Packages", True))
+
+    def test_recent_listing_not_trusted(self):
+        packages = os.path.join(self.root, "Packages")
+        self.repo.manifest("Packages")
+        mtime = os.stat(packages).st_mtime
+        os.remove(os.path.join(packages, "Test.pkg"))
+        # As if the folder's mtime were too coarse to change.
+        os.utime(packages, (mtime, mtime))
+        assert_false("Test.pkg" in self.repo.manifest("Packages"))
+
+    def test_settled_listing_reused(self):
+        packages = os.path.join(self.root, "Packages")
+        mtime = time.time() - 60
+        os.utime(packages, (mtime, mtime))
+        self.repo.manifest("Packages")
+        write(os.path.join(packages, "Other.pkg"))
+        os.utime(packages, (mtime, mtime))
+        assert_false("Other.pkg" in self.repo.manifest("Packages"))
+        # Misses are still checked on the share.
+        assert_true(self.repo.exists("Other.pkg"))
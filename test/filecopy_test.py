@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""Tests for filecopy.
+
+Files are copied within a temporary directory.
+
+"""
+
+
+import os
+import shutil
+import tempfile
+
+from nose.tools import *
+
+from jss import filecopy
+from jss.bulk import RateLimiter
+from jss.filecopy import copy_file, copy_tree, replace_path
+
+
+def write(path, contents="python-jss"):
+    """Write a file, creating its directory if needed."""
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as handle:
+        handle.write(contents)
+
+
+def read(path):
+    """Return a file's contents."""
+    with open(path, "rb") as handle:
+        return handle.read()
+
+
+class TestCopyFile(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.source = os.path.join(self.root, "source")
+        # Larger than one buffer, so copies take several calls.
+        self.contents = os.urandom(filecopy.BUFFER_SIZE + 1000)
+        write(self.source, self.contents)
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def test_copy(self):
+        destination = os.path.join(self.root, "destination")
+        copy_file(self.source, destination)
+        assert_equal(read(destination), self.contents)
+
+    def test_overwrite(self):
+        destination = os.path.join(self.root, "destination")
+        write(destination, "x" * (len(self.contents) * 2))
+        copy_file(self.source, destination)
+        assert_equal(read(destination), self.contents)
+
+    def test_buffered_copy(self):
+        functions = filecopy._KERNEL_COPY_FUNCTIONS
+        filecopy._KERNEL_COPY_FUNCTIONS = []
+        try:
+            destination = os.path.join(self.root, "destination")
+            copy_file(self.source, destination)
+        finally:
+            filecopy._KERNEL_COPY_FUNCTIONS = functions
+        assert_equal(read(destination), self.contents)
+
+    def test_rate_limited_copy(self):
+        destination = os.path.join(self.root, "destination")
+        copy_file(self.source, destination, RateLimiter(1024 ** 3))
+        assert_equal(read(destination), self.contents)
+
+    def test_same_file(self):
+        assert_raises(shutil.Error, copy_file, self.source, self.source)
+
+
+class TestCopyTree(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.source = os.path.join(self.root, "Test.pkg")
+        for index in range(20):
+            write(os.path.join(self.source, "Contents", "Resources",
+                               "%s.lproj" % index, "Localizable.strings"),
+                  str(index))
+        write(os.path.join(self.source, "Contents", "Info.plist"))
+        os.chmod(os.path.join(self.source, "Contents", "Info.plist"), 0o600)
+        os.symlink("Resources/0.lproj",
+                   os.path.join(self.source, "Contents", "Current"))
+        os.utime(os.path.join(self.source, "Contents"), (0, 0))
+        self.destination = os.path.join(self.root, "Copy.pkg")
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def test_copy_tree(self):
+        copy_tree(self.source, self.destination, workers=4)
+        for index in range(20):
+            assert_equal(read(os.path.join(
+                self.destination, "Contents", "Resources",
+                "%s.lproj" % index, "Localizable.strings")), str(index))
+        info = os.path.join(self.destination, "Contents", "Info.plist")
+        assert_equal(os.stat(info).st_mode & 0o777, 0o600)
+        assert_equal(os.stat(os.path.join(
+            self.destination, "Contents")).st_mtime, 0)
+
+    def test_symlinks_preserved(self):
+        copy_tree(self.source, self.destination)
+        link = os.path.join(self.destination, "Contents", "Current")
+        assert_true(os.path.islink(link))
+        assert_equal(os.readlink(link), "Resources/0.lproj")
+
+    def test_destination_exists(self):
+        os.makedirs(self.destination)
+        assert_raises(OSError, copy_tree, self.source, self.destination)
+
+
+class TestReplacePath(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.new = os.path.join(self.root, ".new")
+        self.destination = os.path.join(self.root, "Test.pkg")
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def test_replace_file(self):
+        write(self.new, "new")
+        write(self.destination, "old")
+        replace_path(self.new, self.destination)
+        assert_equal(read(self.destination), "new")
+        assert_equal(os.listdir(self.root), ["Test.pkg"])
+
+    def test_replace_directory(self):
+        write(os.path.join(self.new, "new"))
+        write(os.path.join(self.destination, "old"))
+        replace_path(self.new, self.destination)
+        assert_equal(os.listdir(self.destination), ["new"])
+        assert_equal(os.listdir(self.root), ["Test.pkg"])
+
+    def test_replace_file_with_directory(self):
+        write(os.path.join(self.new, "new"))
+        write(self.destination, "old")
+        replace_path(self.new, self.destination)
+        assert_equal(os.listdir(self.destination), ["new"])
+
+    def test_failure_keeps_destination(self):
+        write(os.path.join(self.destination, "old"))
+        assert_raises(OSError, replace_path, self.new, self.destination)
+        assert_equal(os.listdir(self.destination), ["old"])
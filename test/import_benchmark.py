@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# Copyright (C) 2014, 2015 Shea G Craig <shea.craig@da.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""import_benchmark.py
+
+Time how long it takes to start python and import python-jss.
+
+Each statement is run in a fresh interpreter, several times, and the
+best and median wall clock times are reported, along with the time for
+python to start and do nothing, for comparison.
+
+Usage:
+    python test/import_benchmark.py [repetitions]
+"""
+
+
+import os
+import subprocess
+import sys
+import time
+
+
+STATEMENTS = (
+    ("python startup", "pass"),
+    ("import jss", "import jss"),
+    ("jss.JSS", "import jss; jss.JSS"),
+    ("jss.Computer", "import jss; jss.Computer"),
+    ("from jss import *", "from jss import *"),
+)
+
+
+def time_statement(statement, repetitions):
+    """Return a sorted list of the times to run statement in a new
+    python process.
+    """
+    env = dict(os.environ)
+    # Import this checkout, rather than any installed python-jss.
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+        [path for path in [env.get("PYTHONPATH")] if path])
+    times = []
+    for _ in xrange(repetitions):
+        start = time.time()
+        subprocess.check_call([sys.executable, "-c", statement], env=env)
+        times.append(time.time() - start)
+    return sorted(times)
+
+
+def main():
+    """Run the benchmark and print the results."""
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print "%-20s %10s %10s" % ("", "best (ms)", "median (ms)")
+    for label, statement in STATEMENTS:
+        times = time_statement(statement, repetitions)
+        print "%-20s %10.1f %10.1f" % (label, times[0] * 1000,
+                                       times[len(times) // 2] * 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+"""Tests for inventory.
+
+Devices are built from JSS API XML, or served by a stand-in server, so
+no JSS is needed.
+
+"""
+
+
+import re
+from xml.etree import ElementTree
+
+from nose.tools import *
+
+from jss import Computer, MobileDevice, Policy
+from jss.inventory import ApplicationInventory, ExtensionAttributePivot
+from jss.jssobjectlist import JSSListData, JSSObjectList
+
+from fake_jss import fake_jss
+
+
+COMPUTER = """<computer>
+  <general><id>%s</id><name>Computer %s</name></general>
+  <extension_attributes>%s</extension_attributes>
+</computer>"""
+
+EXTENSION_ATTRIBUTE = """<extension_attribute>
+  <id>%s</id><name>%s</name><type>String</type><value>%s</value>
+</extension_attribute>"""
+
+
+APPLICATIONS = """<computer>
+  <general><id>%s</id><name>Computer %s</name></general>
+  <software><applications>%s</applications></software>
+</computer>"""
+
+APPLICATION = """<application>
+  <name>%s</name><version>%s</version><path>/Applications/%s</path>
+</application>"""
+
+MOBILE_APPLICATIONS = """<mobile_device>
+  <general><id>%s</id><name>Device %s</name></general>
+  <applications>%s</applications>
+</mobile_device>"""
+
+MOBILE_APPLICATION = """<application>
+  <application_name>%s</application_name>
+  <application_version>%s</application_version>
+  <identifier>com.example.%s</identifier>
+</application>"""
+
+
+def computer_xml(id_, **attributes):
+    """Return a Computer's XML with extension attribute values."""
+    attributes_xml = "".join(
+        EXTENSION_ATTRIBUTE % (index, name, value) for index, (name, value)
+        in enumerate(sorted(attributes.items())))
+    return COMPUTER % (id_, id_, attributes_xml)
+
+
+def make_computer(id_, **attributes):
+    """Return a Computer as retrieved from the JSS."""
+    return Computer(None, ElementTree.fromstring(
+        computer_xml(id_, **attributes)))
+
+
+def make_computer_with_apps(id_, *applications):
+    """Return a Computer with (name, version) applications."""
+    applications_xml = "".join(APPLICATION % (name, version, name) for
+                               name, version in applications)
+    return Computer(None, ElementTree.fromstring(
+        APPLICATIONS % (id_, id_, applications_xml)))
+
+
+class TestExtensionAttributePivot(object):
+
+    def setup(self):
+        self.pivot = ExtensionAttributePivot()
+        self.pivot.add(make_computer(1, Department="IT", Owner="alice"))
+        self.pivot.add(make_computer(2, Department="IT"))
+        self.pivot.add(make_computer(3, Department="Art", Owner="bob"))
+
+    def test_get(self):
+        assert_equal(self.pivot.get(1, "Owner"), "alice")
+        assert_is_none(self.pivot.get(2, "Owner"))
+        assert_equal(self.pivot.get(2, "Owner", "nobody"), "nobody")
+        assert_is_none(self.pivot.get(4, "Owner"))
+        assert_is_none(self.pivot.get(1, "Missing"))
+
+    def test_column_and_row(self):
+        assert_equal(self.pivot.column("Department"),
+                     {1: "IT", 2: "IT", 3: "Art"})
+        assert_equal(self.pivot.row(3), {"Department": "Art", "Owner": "bob"})
+
+    def test_add_replaces(self):
+        self.pivot.add(make_computer(1, Department="Art"))
+        assert_equal(self.pivot.row(1), {"Department": "Art"})
+        assert_equal(len(self.pivot), 3)
+
+    def test_remove(self):
+        self.pivot.remove(1)
+        assert_false(1 in self.pivot)
+        assert_equal(sorted(self.pivot.ids), [2, 3])
+        assert_equal(self.pivot.row(3), {"Department": "Art", "Owner": "bob"})
+        self.pivot.remove(1)
+
+    def test_to_dataframe(self):
+        frame = self.pivot.to_dataframe()
+        assert_equal(list(frame.columns), ["Department", "Owner"])
+        assert_equal(frame.loc[3, "Owner"], "bob")
+
+
+class TestExtensionAttributePivotRefresh(object):
+
+    def setup(self):
+        self.computers = {1: {"Department": "IT"}, 2: {"Department": "Art"}}
+        self.report_dates = {1: "100", 2: "100"}
+        self.retrieved = []
+        self.jss = fake_jss(self.handler)
+        self.pivot = ExtensionAttributePivot()
+
+    def handler(self, method, url, body):
+        """Serve computers' extension_attributes subsets."""
+        id_ = int(re.search(r"/id/(\d+)", url).group(1))
+        assert_true("/subset/extension_attributes" in url)
+        self.retrieved.append(id_)
+        return (200, computer_xml(id_, **self.computers[id_]))
+
+    def listing(self):
+        return JSSObjectList(self.jss.factory, Computer, [
+            JSSListData(Computer, {"id": str(id_), "name": "Computer %s" % id_,
+                                   "report_date_epoch": report_date},
+                        self.jss.factory)
+            for id_, report_date in self.report_dates.items()])
+
+    def test_refresh_retrieves_only_changed(self):
+        assert_equal(self.pivot.refresh(self.listing(), workers=2), 2)
+        assert_equal(self.pivot.get(2, "Department"), "Art")
+        assert_equal(self.pivot.refresh(self.listing()), 0)
+
+        self.computers[1] = {"Department": "Art"}
+        self.report_dates[1] = "200"
+        self.retrieved = []
+        assert_equal(self.pivot.refresh(self.listing()), 1)
+        assert_equal(self.retrieved, [1])
+        assert_equal(self.pivot.get(1, "Department"), "Art")
+
+    def test_refresh_removes_unlisted(self):
+        self.pivot.refresh(self.listing())
+        del self.report_dates[2]
+        self.pivot.refresh(self.listing())
+        assert_equal(list(self.pivot.ids), [1])
+
+
+class TestApplicationInventory(object):
+
+    def setup(self):
+        self.inventory = ApplicationInventory()
+        self.inventory.add(make_computer_with_apps(
+            1, ("Safari.app", "10.0"), ("Xcode.app", "8.0")))
+        self.inventory.add(make_computer_with_apps(
+            2, ("Safari.app", "10.1"), ("Safari.app", "10.1")))
+        self.inventory.add(make_computer_with_apps(3, ("Safari.app", "10.0")))
+
+    def test_names(self):
+        assert_equal(self.inventory.names(), ["Safari.app", "Xcode.app"])
+
+    def test_versions(self):
+        assert_equal(self.inventory.versions("Safari.app"),
+                     {"10.0": 2, "10.1": 1})
+        assert_equal(self.inventory.versions("Missing.app"), {})
+
+    def test_devices_and_count(self):
+        assert_equal(self.inventory.devices("Safari.app"), [1, 2, 3])
+        assert_equal(self.inventory.devices("Safari.app", "10.0"), [1, 3])
+        assert_equal(self.inventory.count("Safari.app", "10.1"), 1)
+        assert_equal(self.inventory.count("Missing.app"), 0)
+
+    def test_applications_discarded(self):
+        computer = make_computer_with_apps(4, ("Safari.app", "10.0"))
+        self.inventory.add(computer)
+        assert_equal(computer.findall("software/applications/application"),
+                     [])
+
+    def test_mobile_devices(self):
+        inventory = ApplicationInventory(MobileDevice)
+        inventory.add(MobileDevice(None, ElementTree.fromstring(
+            MOBILE_APPLICATIONS % (1, 1, MOBILE_APPLICATION % (
+                "Keynote", "7.0", "keynote")))))
+        assert_equal(inventory.devices("Keynote", "7.0"), [1])
+
+    def test_unsupported_class(self):
+        assert_raises(TypeError, ApplicationInventory, Policy)
+
+    def test_collect(self):
+        def handler(method, url, body):
+            """Serve computers' software subsets."""
+            id_ = int(re.search(r"/id/(\d+)", url).group(1))
+            return (200, APPLICATIONS % (id_, id_, APPLICATION % (
+                "Safari.app", "10.%s" % id_, "Safari.app")))
+
+        jss = fake_jss(handler)
+        listing = JSSObjectList(jss.factory, Computer, [
+            JSSListData(Computer, {"id": str(id_), "name": str(id_)},
+                        jss.factory) for id_ in range(1, 5)])
+        inventory = ApplicationInventory()
+        assert_equal(inventory.collect(listing, workers=2), 4)
+        assert_equal(inventory.versions("Safari.app"),
+                     {"10.1": 1, "10.2": 1, "10.3": 1, "10.4": 1})
@@ -27,7 +27,8 @@ from xml.etree import ElementTree
 from nose.tools import *
 
 from jss import *
-from jss.jssobjectlist import JSSObjectList
+from jss.jssobjectlist import (JSSObjectList, JSSListData,
+                              ColumnarJSSObjectList)
 try:
     from jss.contrib import FoundationPlist
 except ImportError as e:
@@ -396,6 +397,19 @@ class TestJSSObjectNewMethods(object):
         assert_not_equal(policy.__repr__(), policy_string)
         policy.delete()
 
+    def test_Policy_add_objects_to_scope(self):
+        policy = Policy(j_global, "python-jss-test-policy")
+        computers = [JSSListData(Computer, {"id": i, "name": "computer%s" % i},
+                                 j_global.factory) for i in (1, 2, 2, 3)]
+        assert_equal(policy.add_objects_to_scope(computers), 3)
+        assert_equal(policy.add_objects_to_scope(computers[:1]), 0)
+        assert_equal(
+            [item.findtext("id") for item in
+             policy.findall("scope/computers/computer")], ["1", "2", "3"])
+        assert_equal(policy.add_objects_to_exclusions(computers[3:]), 1)
+        assert_raises(TypeError, policy.add_objects_to_scope,
+                      [Category(j_global, "Python JSS Test Category")])
+
 
 class TestJSSListData(object):
     # The methods on JSSListData are indirectly tested in many of the above
@@ -435,3 +449,24 @@ class TestJSSObjectList(object):
         sorted = [True for policy in policies if policy.name >
                   first_policy_name]
         assert_not_in(False, sorted)
+
+    def test_columnar(self):
+        computers = j_global.factory.get_list(Computer, None, ["basic"],
+                                              columnar=True)
+        assert_is_instance(computers, ColumnarJSSObjectList)
+        assert_equal(len(computers), len(j_global.Computer()))
+        computers.sort()
+        assert_equal(list(computers.ids), sorted(computers.ids))
+        assert_is_instance(computers[0], JSSListData)
+        assert_in("serial_number", computers.columns)
+        assert_equal(computers.diff(j_global.Computer()), ([], []))
+
+    def test_to_dataframe(self):
+        computers = j_global.Computer()
+        frame = computers.to_dataframe()
+        assert_equal(list(frame.columns), ["id", "name"])
+        assert_equal(len(frame), len(computers))
+        full_computers = JSSObjectList(j_global.factory, Computer,
+                                       [computers.retrieve(0)])
+        frame = full_computers.to_dataframe(["id", "hardware/total_ram_mb"])
+        assert_equal(frame["id"][0], computers[0].id)
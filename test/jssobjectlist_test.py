@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""Tests for JSSObjectList and ColumnarJSSObjectList.
+
+These use listings built from JSS API XML, so no JSS is needed.
+
+"""
+
+
+from xml.etree import ElementTree
+
+from nose.tools import *
+
+from jss import Computer, jssobjectlist
+from jss.jssobjectlist import (ColumnarJSSObjectList, JSSListData,
+                               JSSObjectList)
+
+
+LISTING = """<computers>
+  <size>3</size>
+  <computer>
+    <id>1</id><name>one</name><asset_tag>000123</asset_tag>
+    <os_version>10.10</os_version><total_ram>8192</total_ram>
+  </computer>
+  <computer>
+    <id>2</id><name>two</name><asset_tag>000124</asset_tag>
+    <os_version>10.9</os_version><total_ram></total_ram>
+  </computer>
+  <computer>
+    <id>3</id><name>three</name><asset_tag>A1</asset_tag>
+    <os_version>10.12</os_version><total_ram>16384</total_ram>
+  </computer>
+</computers>"""
+
+
+class TestToDataframe(object):
+
+    def setup(self):
+        response = ElementTree.fromstring(LISTING)
+        self.columnar = ColumnarJSSObjectList.from_response(
+            None, Computer, response)
+        self.listing = JSSObjectList(None, Computer, [
+            JSSListData(Computer, {child.tag: child.text for child in item},
+                        None) for item in response if item.tag != "size"])
+
+    def test_values_left_as_strings(self):
+        for objects in (self.listing, self.columnar):
+            frame = objects.to_dataframe(["id", "asset_tag", "os_version"])
+            assert_equal(list(frame["id"]), [1, 2, 3])
+            assert_equal(list(frame["asset_tag"]), ["000123", "000124", "A1"])
+            assert_equal(list(frame["os_version"]), ["10.10", "10.9", "10.12"])
+
+    def test_dtypes(self):
+        for objects in (self.listing, self.columnar):
+            frame = objects.to_dataframe(["id", "total_ram"],
+                                         dtypes={"total_ram": float})
+            assert_equal(frame["total_ram"][0], 8192.0)
+            assert_true(frame["total_ram"].isnull()[1])
+
+    def test_unknown_field(self):
+        for objects in (self.listing, self.columnar):
+            frame = objects.to_dataframe(["id", "missing"])
+            assert_equal(list(frame["missing"]), [None, None, None])
+
+    def test_backends_agree(self):
+        fields = ["id", "name", "asset_tag", "os_version", "total_ram"]
+        assert_true(self.listing.to_dataframe(fields).equals(
+            self.columnar.to_dataframe(fields)))
+
+
+class TestInterning(object):
+
+    def setup(self):
+        self.columnar = ColumnarJSSObjectList(None, Computer)
+        for id_ in range(2 * jssobjectlist.INTERN_SAMPLE_SIZE):
+            self.columnar.append({
+                "id": id_, "name": "Computer %s" % id_,
+                "model": "".join(("Mac", "Pro")),
+                "serial_number": "C02%08d" % id_})
+
+    def test_repeated_values_interned(self):
+        models = self.columnar.columns["model"]
+        assert_true(all(model is models[0] for model in models))
+
+    def test_unique_columns_not_interned(self):
+        tables = self.columnar._interner._tables
+        assert_equal(len(tables["model"]), 1)
+        assert_is_none(tables["serial_number"])
+        assert_is_none(tables["name"])
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""Tests for orphans, and the JDS/CDP filename index.
+
+A small stand-in for the JSS serves Packages and Scripts from memory,
+and repositories are LocalRepositories in a temporary directory, so no
+JSS or file share is needed.
+
+"""
+
+
+import os
+import shutil
+import tempfile
+from xml.etree import ElementTree
+
+from nose.tools import *
+
+from jss import JDS, LocalRepository, Package, Script
+from jss.orphans import FilenameIndex, OrphanReport
+
+
+OBJECT = "<%s><id>%s</id><name>%s</name><filename>%s</filename></%s>"
+
+
+def make_object(obj_class, id_, filename):
+    """Return a Package or Script as retrieved from the JSS."""
+    return obj_class(None, ElementTree.fromstring(OBJECT % (
+        obj_class.list_type, id_, filename, filename, obj_class.list_type)))
+
+
+class FakeList(list):
+    """Object list which yields its (already full) objects."""
+
+    def iter_retrieve_all(self, subset=None, workers=1):
+        return iter(self)
+
+
+class FakeResponse(object):
+    status_code = 201
+
+
+class FakeJSS(object):
+    """Just enough of a JSS for FilenameIndex and dbfileupload."""
+
+    base_url = "https://jss.example.com:8443"
+    verbose = False
+    jss_migrated = False
+
+    def __init__(self, objects=()):
+        self.objects = list(objects)
+        self.save_callbacks = []
+        self.delete_callbacks = []
+        self.factory = self
+        self.session = self
+
+    def get_object(self, obj_class):
+        return FakeList(obj for obj in self.objects
+                        if isinstance(obj, obj_class))
+
+    def post(self, url, data, headers, timeout=None):
+        """Accept an upload, creating a Package as dbfileupload does."""
+        data.read()
+        self.objects.append(make_object(
+            Package, 100 + len(self.objects), headers["FILE_NAME"]))
+        return FakeResponse()
+
+
+class TestFilenameIndex(object):
+
+    def setup(self):
+        self.jss = FakeJSS([make_object(Package, 1, "Test.pkg"),
+                            make_object(Package, 2, "Test.pkg"),
+                            make_object(Script, 1, "test.sh")])
+        self.index = FilenameIndex()
+        self.index.build(self.jss)
+
+    def test_find(self):
+        assert_equal(self.index.find("Package", "Test.pkg"), {1, 2})
+        assert_equal(self.index.find("Script", "test.sh"), {1})
+        assert_equal(self.index.find("Script", "Test.pkg"), set())
+
+    def test_update_and_remove(self):
+        self.index.update(make_object(Package, 1, "Renamed.pkg"))
+        assert_equal(self.index.find("Package", "Test.pkg"), {2})
+        assert_equal(self.index.find("Package", "Renamed.pkg"), {1})
+        self.index.remove(("Package", 2))
+        assert_false("Test.pkg" in self.index.filenames["Package"])
+
+    def test_register(self):
+        self.index.register(self.jss)
+        for callback in self.jss.save_callbacks:
+            callback(make_object(Script, 2, "new.sh"))
+        assert_equal(self.index.find("Script", "new.sh"), {2})
+
+
+class TestOrphanReport(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        for folder in ("Packages", "Scripts"):
+            os.makedirs(os.path.join(self.root, folder))
+        for path in ("Packages/Test.pkg", "Packages/Orphan.pkg",
+                     "Packages/.DS_Store", "Scripts/test.sh"):
+            open(os.path.join(self.root, path), "w").close()
+        self.repo = LocalRepository(mount_point=self.root,
+                                    share_name="test")
+        self.jss = FakeJSS([make_object(Package, 1, "Test.pkg"),
+                            make_object(Package, 2, "Missing.pkg"),
+                            make_object(Script, 1, "test.sh")])
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def test_build(self):
+        report = OrphanReport()
+        report.build(self.jss, [self.repo])
+        assert_equal(report.orphaned_files,
+                     [(self.repo, "Packages", "Orphan.pkg")])
+        assert_equal(report.missing_files,
+                     [(self.repo, "Package", 2, "Missing.pkg")])
+
+
+class TestDistributionServerIndex(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.filename = os.path.join(self.root, "Uploaded.pkg")
+        with open(self.filename, "w") as handle:
+            handle.write("python-jss")
+        self.jss = FakeJSS([make_object(Package, 1, "Test.pkg")])
+        self.server = JDS(jss=self.jss)
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def test_exists(self):
+        assert_true(self.server.exists("Test.pkg"))
+        assert_false(self.server.exists("Uploaded.pkg"))
+
+    def test_exists_after_copy(self):
+        assert_false(self.server.exists("Uploaded.pkg"))
+        self.server.copy_pkg(self.filename)
+        assert_true(self.server.exists("Uploaded.pkg"))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Tests for Policy's batch scope methods.
+
+These use Policies and scope targets built from JSS API XML, so no JSS
+is needed.
+
+"""
+
+
+from xml.etree import ElementTree
+
+from nose.tools import *
+
+from jss import Building, Computer, ComputerGroup, Department, Package, Policy
+from jss.jssobjectlist import JSSListData
+
+
+POLICY = """<policy>
+  <general><id>1</id><name>Lab Software</name></general>
+  <scope>
+    <computers>
+      <computer><id>10</id><name>Teacher</name></computer>
+    </computers>
+    <computer_groups/>
+    <buildings/>
+    <departments/>
+    <exclusions>
+      <computers/>
+      <computer_groups/>
+      <buildings/>
+      <departments/>
+    </exclusions>
+  </scope>
+</policy>"""
+
+
+def make(cls, id_, name):
+    """Return a cls object as retrieved from the JSS."""
+    return cls(None, ElementTree.fromstring(
+        "<%s><id>%s</id><name>%s</name></%s>" % (
+            cls.list_type, id_, name, cls.list_type)))
+
+
+def scoped(policy, path):
+    """Return the (id, name) pairs in one of policy's scope lists."""
+    return [(item.findtext("id"), item.findtext("name")) for item in
+            policy.find(path)]
+
+
+class TestBatchScope(object):
+
+    def setup(self):
+        self.policy = Policy(None, ElementTree.fromstring(POLICY))
+
+    def test_add_objects_to_scope(self):
+        objects = [make(Computer, 11, "Spare"), make(ComputerGroup, 4, "Lab"),
+                   make(Building, 7, "Main"), make(Department, 2, "IT")]
+        assert_equal(self.policy.add_objects_to_scope(objects), 4)
+        assert_equal(scoped(self.policy, "scope/computers"),
+                     [("10", "Teacher"), ("11", "Spare")])
+        assert_equal(scoped(self.policy, "scope/computer_groups"),
+                     [("4", "Lab")])
+        assert_equal(scoped(self.policy, "scope/buildings"), [("7", "Main")])
+        assert_equal(scoped(self.policy, "scope/departments"), [("2", "IT")])
+
+    def test_duplicates_skipped(self):
+        objects = [make(Computer, 10, "Teacher"), make(Computer, 11, "Spare"),
+                   make(Computer, 11, "Spare")]
+        assert_equal(self.policy.add_objects_to_scope(objects), 1)
+        assert_equal(scoped(self.policy, "scope/computers"),
+                     [("10", "Teacher"), ("11", "Spare")])
+
+    def test_list_data(self):
+        objects = (JSSListData(Computer, {"id": str(id_), "name": "Computer"},
+                               None) for id_ in (12, 13))
+        assert_equal(self.policy.add_objects_to_exclusions(objects), 2)
+        assert_equal(scoped(self.policy, "scope/exclusions/computers"),
+                     [("12", "Computer"), ("13", "Computer")])
+        assert_equal(len(self.policy.find("scope/computers")), 1)
+
+    def test_bad_type_adds_nothing(self):
+        objects = [make(Computer, 11, "Spare"), Package(None, "Pkg")]
+        assert_raises(TypeError, self.policy.add_objects_to_scope, objects)
+        assert_equal(scoped(self.policy, "scope/computers"),
+                     [("10", "Teacher")])
+
+    def test_missing_scope_list(self):
+        policy = Policy(None, ElementTree.fromstring(
+            "<policy><general><id>2</id><name>Bare</name></general>"
+            "<scope><computers/></scope></policy>"))
+        objects = [make(Computer, 11, "Spare"), make(Building, 7, "Main")]
+        assert_raises(ValueError, policy.add_objects_to_scope, objects)
+        assert_equal(len(policy.find("scope/computers")), 0)
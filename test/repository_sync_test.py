@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""Tests for repository_sync.
+
+These run against LocalRepositories in a temporary directory, so no
+JSS or file share is needed.
+
+"""
+
+
+import os
+import shutil
+import tempfile
+
+from nose.tools import *
+
+from jss import LocalRepository
+from jss.repository_sync import RepositorySync
+
+
+def make_repo(root, name):
+    """Return a LocalRepository with Packages and Scripts folders."""
+    path = os.path.join(root, name)
+    for folder in ("Packages", "Scripts"):
+        os.makedirs(os.path.join(path, folder))
+    return LocalRepository(mount_point=path, share_name=name)
+
+
+def write(repo, folder, filename, contents="python-jss"):
+    """Write a file to a repository folder, and return its path."""
+    path = os.path.join(repo.connection["mount_point"], folder, filename)
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, "w") as handle:
+        handle.write(contents)
+    return path
+
+
+def repo_path(repo, *parts):
+    """Return a path within a repository."""
+    return os.path.join(repo.connection["mount_point"], *parts)
+
+
+class TestRepositorySync(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.source = make_repo(self.root, "source")
+        self.target = make_repo(self.root, "target")
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def run_sync(self, **kwargs):
+        sync = RepositorySync(self.source, [self.target], **kwargs)
+        results = sync.run()
+        for result in results:
+            assert_true(result.ok, result.error)
+        return results
+
+    def test_copies_new_files(self):
+        write(self.source, "Packages", "Test.pkg")
+        write(self.source, "Scripts", "test.sh")
+        write(self.source, "Packages", "Bundle.pkg/Contents/Info.plist")
+        self.run_sync()
+        assert_true(self.target.exists("Test.pkg"))
+        assert_true(self.target.exists("test.sh"))
+        assert_true(os.path.isfile(repo_path(
+            self.target, "Packages", "Bundle.pkg", "Contents", "Info.plist")))
+
+    def test_synced_repository_has_empty_plan(self):
+        write(self.source, "Packages", "Test.pkg")
+        write(self.source, "Packages", "Bundle.pkg/Contents/Info.plist")
+        self.run_sync()
+        sync = RepositorySync(self.source, [self.target])
+        assert_equal(sync.plan(), [])
+
+    def test_updates_changed_files(self):
+        write(self.source, "Packages", "Test.pkg", "new contents")
+        write(self.target, "Packages", "Test.pkg", "old")
+        plan = RepositorySync(self.source, [self.target]).plan()
+        assert_equal([action.action for action in plan], ["update"])
+        self.run_sync()
+        with open(repo_path(self.target, "Packages", "Test.pkg")) as handle:
+            assert_equal(handle.read(), "new contents")
+
+    def test_no_delete_by_default(self):
+        write(self.target, "Packages", "Old.pkg")
+        self.run_sync()
+        assert_true(os.path.exists(repo_path(
+            self.target, "Packages", "Old.pkg")))
+
+    def test_delete_uses_planned_folder(self):
+        # A .pkg-named file in Scripts must not be looked for in
+        # Packages, where a live package of the same name exists.
+        write(self.source, "Packages", "foo.pkg", "live package")
+        write(self.target, "Packages", "foo.pkg", "live package")
+        write(self.target, "Scripts", "foo.pkg")
+        self.run_sync(delete=True)
+        assert_false(os.path.exists(repo_path(
+            self.target, "Scripts", "foo.pkg")))
+        assert_true(os.path.exists(repo_path(
+            self.target, "Packages", "foo.pkg")))
+
+    def test_delete_bundle(self):
+        write(self.target, "Packages", "Old.mpkg/Contents/Info.plist")
+        self.target.manifest("Packages")
+        self.run_sync(delete=True)
+        assert_false(os.path.exists(repo_path(
+            self.target, "Packages", "Old.mpkg")))
+        assert_false(self.target.exists("Old.mpkg"))
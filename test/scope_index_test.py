@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""Tests for scope_index.
+
+These index Policies and profiles built from JSS API XML, or served by
+a stand-in server, so no JSS is needed.
+
+"""
+
+
+import re
+from xml.etree import ElementTree
+
+from nose.tools import *
+
+from jss import Computer, ComputerGroup, Package, Policy
+from jss.scope_index import ScopeIndex
+
+from fake_jss import fake_jss
+
+
+POLICY = """<%(tag)s>
+  <general><id>%(id)s</id><name>%(name)s</name></general>
+  <scope>
+    <all_computers>%(all_computers)s</all_computers>
+    %(targets)s
+    <exclusions>%(exclusions)s</exclusions>
+  </scope>
+</%(tag)s>"""
+
+COMPUTER = """<computer>
+  <general><id>%s</id><name>Computer</name></general>
+  <location><building>%s</building><department>%s</department></location>
+  <groups_accounts>
+    <computer_group_memberships>%s</computer_group_memberships>
+  </groups_accounts>
+</computer>"""
+
+
+def scope_xml(**targets):
+    """Return scope XML for targets like computer_groups=[(4, "Lab")]."""
+    return "".join(
+        "<%s>%s</%s>" % (container, "".join(
+            "<%s><id>%s</id><name>%s</name></%s>" % (
+                container[:-1], id_, name, container[:-1])
+            for id_, name in members), container)
+        for container, members in targets.items())
+
+
+def policy_xml(id_, name, all_computers=False, exclusions=None,
+               tag="policy", **targets):
+    """Return a Policy's (or profile's) XML."""
+    return POLICY % {"tag": tag, "id": id_, "name": name,
+                     "all_computers": str(all_computers).lower(),
+                     "targets": scope_xml(**targets),
+                     "exclusions": scope_xml(**(exclusions or {}))}
+
+
+def make_policy(*args, **kwargs):
+    """Return a Policy as retrieved from the JSS."""
+    return Policy(None, ElementTree.fromstring(policy_xml(*args, **kwargs)))
+
+
+def make_computer(id_, building="", department="", groups=()):
+    """Return a Computer as retrieved from the JSS."""
+    groups_xml = "".join("<group>%s</group>" % group for group in groups)
+    return Computer(None, ElementTree.fromstring(
+        COMPUTER % (id_, building, department, groups_xml)))
+
+
+class TestScopeIndex(object):
+
+    def setup(self):
+        self.index = ScopeIndex()
+        self.index.update(make_policy(
+            1, "Lab Software", computer_groups=[(4, "Lab")],
+            exclusions={"computers": [(10, "Teacher")]}))
+        self.index.update(make_policy(
+            2, "Main Building", buildings=[(7, "Main")]))
+        self.index.update(make_policy(3, "Everyone", all_computers=True))
+        self.index.update(make_policy(
+            4, "IT Only", departments=[(2, "IT")], computers=[(11, "Spare")]))
+
+    def test_targeting_and_excluding(self):
+        assert_equal(self.index.targeting(("computer_groups", 4)),
+                     {("Policy", 1)})
+        assert_equal(self.index.excluding(("computers", 10)),
+                     {("Policy", 1)})
+        assert_equal(self.index.targeting(("computers", 10)), set())
+        assert_equal(self.index.names[("Policy", 2)], "Main Building")
+
+    def test_targeting_objects(self):
+        group = ComputerGroup(None, ElementTree.fromstring(
+            "<computer_group><id>4</id><name>Lab</name></computer_group>"))
+        assert_equal(self.index.targeting(group), {("Policy", 1)})
+        assert_raises(TypeError, self.index.targeting, Package(None, "Pkg"))
+
+    def test_update_replaces(self):
+        self.index.update(make_policy(1, "Lab Software",
+                                      computer_groups=[(5, "Library")]))
+        assert_equal(self.index.targeting(("computer_groups", 4)), set())
+        assert_equal(self.index.excluding(("computers", 10)), set())
+        assert_equal(self.index.targeting(("computer_groups", 5)),
+                     {("Policy", 1)})
+
+    def test_remove(self):
+        self.index.remove(("Policy", "3"))
+        self.index.remove(make_policy(2, "Main Building"))
+        assert_false(("Policy", 3) in self.index.names)
+        assert_equal(self.index.targeting(("buildings", 7)), set())
+        assert_equal(self.index.for_computer(make_computer(12)), set())
+
+    def test_other_objects_ignored(self):
+        self.index.update(Package(None, "Pkg"))
+        self.index.remove(Package(None, "Pkg"))
+        assert_equal(len(self.index.names), 4)
+
+    def test_for_computer(self):
+        assert_equal(
+            self.index.for_computer(make_computer(
+                12, "Main", "IT", ["Lab"])),
+            {("Policy", 1), ("Policy", 2), ("Policy", 3), ("Policy", 4)})
+        assert_equal(
+            self.index.for_computer(make_computer(10, groups=["Lab"])),
+            {("Policy", 3)})
+        assert_equal(self.index.for_computer(make_computer(11)),
+                     {("Policy", 3), ("Policy", 4)})
+
+
+class TestScopeIndexBuild(object):
+
+    def setup(self):
+        self.jss = fake_jss(self.handler)
+
+    def handler(self, method, url, body):
+        """Serve one Policy and one profile, and accept saves."""
+        if url.endswith("/policies"):
+            return (200, "<policies><size>1</size><policy><id>1</id>"
+                    "<name>Lab Software</name></policy></policies>")
+        elif url.endswith("/osxconfigurationprofiles"):
+            return (200, "<os_x_configuration_profiles><size>1</size>"
+                    "<os_x_configuration_profile><id>2</id><name>WiFi</name>"
+                    "</os_x_configuration_profile>"
+                    "</os_x_configuration_profiles>")
+        elif "/policies/" in url:
+            return (200, policy_xml(1, "Lab Software",
+                                    computer_groups=[(4, "Lab")]))
+        assert_true(re.search(r"/osxconfigurationprofiles/id/2/subset/scope",
+                              url))
+        return (200, policy_xml(2, "WiFi", tag="os_x_configuration_profile",
+                                buildings=[(7, "Main")]))
+
+    def test_build(self):
+        index = ScopeIndex()
+        index.build(self.jss, workers=2)
+        assert_equal(index.targeting(("computer_groups", 4)),
+                     {("Policy", 1)})
+        assert_equal(index.targeting(("buildings", 7)),
+                     {("OSXConfigurationProfile", 2)})
+
+    def test_register(self):
+        index = ScopeIndex()
+        index.register(self.jss)
+        policy = make_policy(1, "Lab Software")
+        policy.jss = self.jss
+        policy.save()
+        assert_equal(index.targeting(("computer_groups", 4)),
+                     {("Policy", 1)})
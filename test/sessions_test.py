@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""Tests for per-thread Sessions.
+
+Requests are answered by a stand-in server, so no JSS is needed.
+
+"""
+
+
+import gc
+
+from nose.tools import *
+
+from jss import JSS, Building
+from jss.bulk import run_bulk
+from jss.jssobjectlist import _retrieve_objects
+
+from fake_jss import fake_jss
+
+
+class TestThreadSessions(object):
+
+    def setup(self):
+        self.jss = JSS(url="https://jss.example.com:8443", user="user",
+                       password="password", thread_safe=True)
+
+    def test_threads_get_own_sessions(self):
+        results = run_bulk(lambda _: self.jss.session, range(4), workers=2)
+        sessions = set(id(result.value) for result in results)
+        assert_false(id(self.jss.session) in sessions)
+        assert_true(all(result.value.auth == ("user", "password")
+                        for result in results))
+
+    def test_sessions_released_with_threads(self):
+        for _ in range(5):
+            run_bulk(lambda _: self.jss.session, range(8), workers=4)
+        gc.collect()
+        assert_equal(len(self.jss._sessions), 0)
+
+    def test_ssl_verify_applies_to_thread_sessions(self):
+        def check_verify(_):
+            session = self.jss.session
+            self.jss.ssl_verify = False
+            return session.verify
+        results = run_bulk(check_verify, [1])
+        assert_false(results[0].value)
+
+
+class TestForcedThreadSessions(object):
+
+    def setup(self):
+        self.sessions = []
+        self.jss = fake_jss(self.handler)
+
+    def handler(self, method, url, body):
+        """Record the Session each request was made with."""
+        self.sessions.append(id(self.jss.session))
+        return (200, "<building><id>%s</id><name>Building</name>"
+                "</building>" % url.rsplit("/", 1)[1])
+
+        assert_equal(len(self.sessions), 8)
+    def test_bulk_methods_use_thread_sessions(self):
+        self.jss.bulk_delete(["/buildings/id/%s" % id_ for id_ in range(8)],
+                             workers=4)
+        assert_false(id(self.jss.session) in self.sessions)
+        assert_equal(self.jss._forced_thread_sessions, 0)
+
+    def test_retrieve_with_workers_uses_thread_sessions(self):
+        objects = list(_retrieve_objects(self.jss.factory, Building,
+                                         range(1, 9), workers=4))
+        assert_equal([obj.id for obj in objects],
+                     [str(id_) for id_ in range(1, 9)])
+        assert_false(id(self.jss.session) in self.sessions)
+        assert_equal(self.jss._forced_thread_sessions, 0)
+
+    def test_shared_session_otherwise(self):
+        results = run_bulk(lambda _: self.jss.session, range(4), workers=2)
+        assert_true(all(result.value is self.jss.session
+                        for result in results))
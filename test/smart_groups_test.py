@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""Tests for smart_groups.
+
+These evaluate groups built from JSS API XML, so no JSS is needed.
+
+"""
+
+
+from xml.etree import ElementTree
+
+from nose.tools import *
+
+from jss import Computer, ComputerGroup
+from jss.smart_groups import SmartGroupEvaluator
+
+
+COMPUTER = """<computer>
+  <general><id>%s</id><name>%s</name></general>
+  <hardware><os_version>%s</os_version></hardware>
+</computer>"""
+
+GROUP = """<computer_group>
+  <id>%s</id>
+  <name>%s</name>
+  <is_smart>true</is_smart>
+  <criteria>
+    <size>%s</size>
+    %s
+  </criteria>
+  <computers><size>0</size></computers>
+</computer_group>"""
+
+CRITERION = """<criterion>
+  <name>%s</name>
+  <priority>%s</priority>
+  <and_or>%s</and_or>
+  <search_type>%s</search_type>
+  <value>%s</value>
+  <opening_paren>false</opening_paren>
+  <closing_paren>false</closing_paren>
+</criterion>"""
+
+
+def make_group(id_, name, *criteria):
+    """Return a smart ComputerGroup as retrieved from the JSS."""
+    criteria_xml = "".join(CRITERION % ((crit[0], priority) + crit[1:])
+                           for priority, crit in enumerate(criteria))
+    return ComputerGroup(None, ElementTree.fromstring(
+        GROUP % (id_, name, len(criteria), criteria_xml)))
+
+
+class TestSmartGroupEvaluator(object):
+
+    def setup(self):
+        computers = [
+            Computer(None, ElementTree.fromstring(COMPUTER % data))
+            for data in ((1, "lab-01", "10.11.6"), (2, "lab-02", "10.12.1"),
+                         (3, "office-01", "10.12.1"))]
+        self.lab = make_group(
+            1, "Lab", ("Computer Name", "and", "like", "lab"))
+        self.evaluator = SmartGroupEvaluator(computers, [self.lab])
+
+    def test_evaluate_group_with_size(self):
+        group = make_group(
+            2, "Sierra Lab", ("Computer Name", "and", "like", "lab"),
+            ("Operating System Version", "and", "is", "10.12.1"))
+        assert_equal(self.evaluator.evaluate(group), [2])
+
+    def test_evaluate_criteria_element(self):
+        assert_equal(self.evaluator.evaluate(self.lab.find("criteria")),
+                     [1, 2])
+
+    def test_nested_group(self):
+        group = make_group(
+            3, "Not Lab", ("Computer Group", "and", "not member of", "Lab"))
+        assert_equal(self.evaluator.evaluate(group), [3])
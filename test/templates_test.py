@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""Tests for the compiled _new() templates.
+
+Each class's template output is checked against building the same
+object with _set_xml_from_keys, so no JSS is needed.
+
+"""
+
+
+import inspect
+from xml.etree import ElementTree
+
+from nose.tools import *
+
+from jss import jssobjects, Policy
+from jss.jssobject import JSSObject
+
+
+def empty(cls):
+    """Return a cls object with no children.
+
+    Subclass __init__s are skipped, since some (e.g. Policy's) expect
+    a populated tree.
+    """
+    obj = cls.__new__(cls)
+    JSSObject.__init__(obj, None, ElementTree.Element(cls.list_type))
+    return obj
+
+
+def templated(cls, name, **kwargs):
+    """Return XML for a new cls object built from its template."""
+    obj = empty(cls)
+    JSSObject._new(obj, name, **kwargs)
+    return ElementTree.tostring(obj)
+
+
+def from_keys(cls, name, **kwargs):
+    """Return XML for a new cls object built with _set_xml_from_keys."""
+    obj = empty(cls)
+    if cls._name_path:
+        parent = obj
+        for path_element in cls._name_path.split("/"):
+            obj._set_xml_from_keys(parent, (path_element, None))
+            parent = parent.find(path_element)
+        parent.text = name
+    else:
+        ElementTree.SubElement(obj, "name").text = name
+    for item in cls.data_keys.items():
+        obj._set_xml_from_keys(obj, item, **kwargs)
+    return ElementTree.tostring(obj)
+
+
+def templated_classes():
+    """Return the JSSObject classes with data_keys."""
+    return [cls for _, cls in inspect.getmembers(jssobjects, inspect.isclass)
+            if issubclass(cls, JSSObject) and cls.data_keys]
+
+
+class TestTemplates(object):
+
+    def setup(self):
+        JSSObject._templates.clear()
+
+    def test_classes_found(self):
+        assert_true(Policy in templated_classes())
+
+    def test_matches_set_xml_from_keys(self):
+        for cls in templated_classes():
+            assert_equal(templated(cls, "New"), from_keys(cls, "New"))
+
+    def test_kwargs_match_set_xml_from_keys(self):
+        for cls in templated_classes():
+            # Give every leaf key a kwarg, of each type _new converts.
+            kwargs = {}
+            values = [10, False, None, "text"]
+            for node in cls._get_template():
+                key = node[2]
+                if isinstance(key, basestring):
+                    kwargs[key] = values[len(kwargs) % len(values)]
+            assert_equal(templated(cls, "New", **kwargs),
+                         from_keys(cls, "New", **kwargs))
+
+    def test_template_cached(self):
+        template = Policy._get_template()
+        assert_is(Policy._get_template(), template)
+        assert_is(JSSObject._templates[Policy], template)
+
+    def test_name_path(self):
+        policy = empty(Policy)
+        JSSObject._new(policy, "New", frequency="Ongoing")
+        assert_equal(policy.findtext("general/name"), "New")
+        assert_equal(policy.findtext("general/frequency"), "Ongoing")
+        assert_equal(policy.findtext("general/enabled"), "true")
+        assert_is_none(policy.find("name"))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""Tests for upload.
+
+Uploads are sent to a stand-in Session, so no JSS is needed.
+
+"""
+
+
+import os
+import shutil
+import tempfile
+import zipfile
+from StringIO import StringIO
+
+import requests
+from requests.packages.urllib3.exceptions import (MaxRetryError,
+                                                  NewConnectionError)
+
+from nose.tools import *
+
+from jss import upload, JSSPostError
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = u"<html><body><p>Error</p></body></html>"
+
+
+class FakeSession(object):
+    """Session which reads each upload, failing with each of errors
+    (exceptions or status codes) in turn, then succeeding.
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.bodies = []
+
+    def post(self, url, data, headers, timeout=None):
+        if hasattr(data, "read"):
+            body = "".join(iter(lambda: data.read(1024), ""))
+        else:
+            body = "".join(data)
+        self.bodies.append(body)
+        if self.errors:
+            error = self.errors.pop(0)
+            if isinstance(error, Exception):
+                raise error
+            return FakeResponse(error)
+        return FakeResponse(201)
+
+
+class TestUploadFile(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.filename = os.path.join(self.root, "Test.pkg")
+        with open(self.filename, "wb") as handle:
+            handle.write("x" * (upload.PROGRESS_INTERVAL * 2 + 10))
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def upload(self, session, object_id=-1, **kwargs):
+        return upload.upload_file(
+            session, "https://jss.example.com:8443/dbfileupload",
+            self.filename, {"OBJECT_ID": str(object_id)}, **kwargs)
+
+    def test_streams_file_with_progress(self):
+        session = FakeSession()
+        reports = []
+        response = self.upload(
+            session, callback=lambda progress: reports.append(
+                (progress.bytes_sent, progress.done)))
+        assert_equal(response.status_code, 201)
+        assert_equal(session.bodies[0], open(self.filename, "rb").read())
+        size = os.path.getsize(self.filename)
+        assert_equal(reports[-1], (size, True))
+        assert_true(len(reports) >= 3)
+
+    def test_update_retried_after_timeout(self):
+        session = FakeSession(requests.exceptions.ReadTimeout(), 500)
+        response = self.upload(session, object_id=5, retries=2)
+        assert_equal(response.status_code, 201)
+        assert_equal(len(session.bodies), 3)
+
+    def test_create_not_retried_after_timeout(self):
+        session = FakeSession(requests.exceptions.ReadTimeout())
+        assert_raises(requests.exceptions.ReadTimeout, self.upload, session)
+        assert_equal(len(session.bodies), 1)
+
+    def test_create_not_retried_after_500(self):
+        session = FakeSession(500)
+        with assert_raises(JSSPostError) as context:
+            self.upload(session)
+        assert_equal(context.exception.status_code, 500)
+        assert_equal(len(session.bodies), 1)
+
+    def test_error_raised_after_last_retry(self):
+        session = FakeSession(500, 502)
+        assert_raises(JSSPostError, self.upload, session, object_id=5,
+                      retries=1)
+        assert_equal(len(session.bodies), 2)
+
+    def test_client_error_raised(self):
+        session = FakeSession(401)
+        assert_raises(JSSPostError, self.upload, session, object_id=5)
+        assert_equal(len(session.bodies), 1)
+
+    def test_create_retried_after_connect_error(self):
+        reason = NewConnectionError(None, "Connection refused")
+        session = FakeSession(requests.exceptions.ConnectionError(
+            MaxRetryError(None, "/", reason)))
+        response = self.upload(session, retries=1)
+        assert_equal(response.status_code, 201)
+        assert_equal(len(session.bodies), 2)
+
+    def test_directory_zipped(self):
+        bundle = os.path.join(self.root, "Bundle.pkg")
+        os.makedirs(os.path.join(bundle, "Contents"))
+        shutil.copy(self.filename, os.path.join(bundle, "Contents"))
+        session = FakeSession()
+        upload.upload_file(
+            session, "https://jss.example.com:8443/dbfileupload", bundle,
+            {"OBJECT_ID": "-1"})
+        archive = zipfile.ZipFile(StringIO(session.bodies[0]))
+        assert_equal(archive.read("Bundle.pkg/Contents/Test.pkg"),
+                     open(self.filename, "rb").read())
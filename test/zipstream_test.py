@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Tests for zipstream.
+
+Archives are made from a temporary directory and read back with
+zipfile.
+
+"""
+
+
+import os
+import shutil
+import stat
+import tempfile
+import zipfile
+from StringIO import StringIO
+
+from nose.tools import *
+
+from jss import zipstream
+from jss.zipstream import ZipStream, prefetch
+
+
+class TestZipStream(object):
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.bundle = os.path.join(self.root, "Test.pkg")
+        resources = os.path.join(self.bundle, "Contents", "Resources")
+        os.makedirs(resources)
+        with open(os.path.join(resources, "Info.plist"), "w") as handle:
+            handle.write("python-jss" * 1000)
+        script = os.path.join(self.bundle, "Contents", "postinstall")
+        with open(script, "w") as handle:
+            handle.write("#!/bin/sh\n")
+        os.chmod(script, 0o755)
+        os.symlink("Resources/Info.plist",
+                   os.path.join(self.bundle, "Contents", "Info.plist"))
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def read_archive(self, **kwargs):
+        return zipfile.ZipFile(StringIO(
+            "".join(ZipStream(self.bundle, **kwargs))))
+
+    def test_contents(self):
+        archive = self.read_archive()
+        assert_is_none(archive.testzip())
+        assert_equal(sorted(archive.namelist()), [
+            "Test.pkg/", "Test.pkg/Contents/", "Test.pkg/Contents/Info.plist",
+            "Test.pkg/Contents/Resources/",
+            "Test.pkg/Contents/Resources/Info.plist",
+            "Test.pkg/Contents/postinstall"])
+        assert_equal(archive.read("Test.pkg/Contents/Resources/Info.plist"),
+                     "python-jss" * 1000)
+
+    def test_modes_and_symlinks(self):
+        archive = self.read_archive()
+        script = archive.getinfo("Test.pkg/Contents/postinstall")
+        assert_equal(stat.S_IMODE(script.external_attr >> 16), 0o755)
+        link = archive.getinfo("Test.pkg/Contents/Info.plist")
+        assert_true(stat.S_ISLNK(link.external_attr >> 16))
+        assert_equal(archive.read(link), "Resources/Info.plist")
+
+    def test_stored(self):
+        archive = self.read_archive(compression=zipfile.ZIP_STORED)
+        assert_is_none(archive.testzip())
+
+    def test_zip64(self):
+        limit = zipstream.ZIP64_LIMIT
+        zipstream.ZIP64_LIMIT = 100
+        try:
+            archive = self.read_archive()
+        finally:
+            zipstream.ZIP64_LIMIT = limit
+        assert_is_none(archive.testzip())
+        assert_equal(archive.read("Test.pkg/Contents/Resources/Info.plist"),
+                     "python-jss" * 1000)
+
+
+class TestPrefetch(object):
+
+    def test_items(self):
+        assert_equal(list(prefetch(xrange(100), depth=2)), range(100))
+
+    def test_error(self):
+        def fail():
+            yield 1
+            raise IOError("Read failed")
+
+        items = prefetch(fail())
+        assert_equal(next(items), 1)
+        assert_raises(IOError, next, items)